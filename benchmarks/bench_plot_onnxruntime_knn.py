@@ -0,0 +1,167 @@
+# coding: utf-8
+"""
+Benchmark of the approximate nearest neighbours search
+enabled by option *n_partitions* of the converter for
+*NearestNeighbors*. The benchmark measures the time
+onnxruntime spends to find the neighbours and the recall
+of the approximate graph against the exact graph,
+the proportion of the true neighbours it retrieves.
+"""
+# License: MIT
+
+from time import perf_counter as time
+
+import numpy as np
+from numpy.random import rand
+import matplotlib.pyplot as plt
+import pandas
+from sklearn.neighbors import NearestNeighbors
+from sklearn.utils.testing import ignore_warnings
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+from onnxruntime import InferenceSession
+
+
+##############################
+# Implementations to benchmark.
+##############################
+
+def fcts_model(model, n_features, n_partitions=None, n_probe=1):
+    "Converts the model, exact search if n_partitions is None."
+    initial_types = [('X', FloatTensorType([None, n_features]))]
+    options = None
+    if n_partitions is not None:
+        options = {id(model): {'n_partitions': n_partitions,
+                               'n_probe': n_probe}}
+    onx = convert_sklearn(model, initial_types=initial_types,
+                          options=options)
+    sess = InferenceSession(onx.SerializeToString())
+
+    def predict_onnxrt_kneighbors(X, sess=sess):
+        return sess.run(None, {'X': X})[0]
+
+    return predict_onnxrt_kneighbors
+
+
+def recall(exact, approx):
+    """
+    Returns the proportion of the neighbours in *exact*
+    (indices [B, K]) also found in *approx*.
+    """
+    found = [len(set(e) & set(a)) for e, a in zip(exact, approx)]
+    return sum(found) / float(exact.size)
+
+
+def measure(fct, Xs, max_time=1.):
+    "Returns the average time of fct over Xs."
+    st = time()
+    repeated = 0
+    for X in Xs:
+        fct(X)
+        repeated += 1
+        if time() - st >= max_time:
+            break  # stops if longer than a second
+    return (time() - st) / repeated
+
+
+##############################
+# Benchmarks
+##############################
+
+def bench(n_train, n_features, n_partitionss, n_probes, n_obs=1,
+          n_neighbors=5, repeat=100, verbose=False):
+    res = []
+    X_train = rand(n_train, n_features).astype(np.float32)
+    model = NearestNeighbors(n_neighbors=n_neighbors).fit(X_train)
+    X_test = rand(1000, n_features).astype(np.float32)
+    Xs = [rand(n_obs, n_features).astype(np.float32)
+          for r in range(repeat)]
+
+    exact_fct = fcts_model(model, n_features)
+    exact = exact_fct(X_test)
+    time_exact = measure(exact_fct, Xs)
+    res.append(dict(n_partitions=0, n_probe=0, recall=1.,
+                    time_ort=time_exact, speedup=1.))
+
+    for n_partitions in n_partitionss:
+        for n_probe in n_probes:
+            if n_probe > n_partitions:
+                continue
+            fct = fcts_model(model, n_features, n_partitions, n_probe)
+            obs = dict(n_partitions=n_partitions, n_probe=n_probe,
+                       recall=recall(exact, fct(X_test)),
+                       time_ort=measure(fct, Xs))
+            obs['speedup'] = time_exact / obs['time_ort']
+            res.append(obs)
+            if verbose:
+                print("bench", len(res), ":", obs)
+    return res
+
+
+##############################
+# Plots.
+##############################
+
+def plot_results(df, verbose=False):
+    fig, ax = plt.subplots(1, 2, figsize=(10, 4))
+    if verbose:
+        print(df)
+    for color, n_partitions in zip('brgyc', sorted(set(df.n_partitions))):
+        if n_partitions == 0:
+            continue
+        subset = df[df.n_partitions == n_partitions].sort_values("n_probe")
+        label = "partitions={}".format(n_partitions)
+        subset.plot(x="n_probe", y="recall", label=label, ax=ax[0],
+                    logx=True, c=color)
+        subset.plot(x="n_probe", y="speedup", label=label, ax=ax[1],
+                    logx=True, logy=True, c=color)
+    ax[0].set_ylabel("Recall", fontsize='x-small')
+    ax[1].set_ylabel("Speedup against exact search", fontsize='x-small')
+    for a in ax:
+        a.set_xlabel("N probe", fontsize='x-small')
+        a.legend(loc=0, fontsize='x-small')
+    plt.suptitle("Approximate nearest neighbours with onnxruntime",
+                 fontsize=16)
+
+
+@ignore_warnings(category=FutureWarning)
+def run_bench(repeat=100, verbose=False):
+    n_train = 100000
+    n_features = 10
+    n_partitionss = [100, 300, 1000]
+    n_probes = [1, 2, 5, 10, 20, 50]
+
+    start = time()
+    results = bench(n_train, n_features, n_partitionss, n_probes,
+                    repeat=repeat, verbose=verbose)
+    end = time()
+
+    results_df = pandas.DataFrame(results)
+    print("Total time = %0.3f sec\n" % (end - start))
+
+    # plot the results
+    plot_results(results_df, verbose=verbose)
+    return results_df
+
+
+if __name__ == '__main__':
+    from datetime import datetime
+    import sklearn
+    import numpy
+    import onnx
+    import onnxruntime
+    import skl2onnx
+    df = pandas.DataFrame([
+        {"name": "date", "version": str(datetime.now())},
+        {"name": "numpy", "version": numpy.__version__},
+        {"name": "scikit-learn", "version": sklearn.__version__},
+        {"name": "onnx", "version": onnx.__version__},
+        {"name": "onnxruntime", "version": onnxruntime.__version__},
+        {"name": "skl2onnx", "version": skl2onnx.__version__},
+    ])
+    df.to_csv("bench_plot_onnxruntime_knn.time.csv", index=False)
+    print(df)
+    df = run_bench(verbose=True)
+    plt.savefig("bench_plot_onnxruntime_knn.png")
+    df.to_csv("bench_plot_onnxruntime_knn.csv", index=False)
+    plt.show()
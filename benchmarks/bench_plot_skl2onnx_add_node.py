@@ -0,0 +1,115 @@
+# coding: utf-8
+"""
+Benchmark of ModelComponentContainer.add_node.
+The time spent to add one node should not depend on the number
+of nodes already added to the container.
+"""
+# License: MIT
+
+from time import perf_counter as time
+
+import numpy as np
+import matplotlib.pyplot as plt
+import pandas
+from skl2onnx.common._container import ModelComponentContainer
+
+
+##############################
+# Implementations to benchmark.
+##############################
+
+def fill_container(n_nodes, named):
+    "Adds *n_nodes* nodes into an empty container."
+    container = ModelComponentContainer(9, dtype=np.float32)
+    previous = 'X'
+    for i in range(n_nodes):
+        output = 'Y%d' % i
+        # the same name for every node forces the container
+        # to generate a unique one
+        name = 'ReduceSum' if named else None
+        container.add_node('ReduceSum', previous, output, name=name,
+                           axes=[1], keepdims=1)
+        previous = output
+    return container
+
+
+##############################
+# Benchmarks
+##############################
+
+def bench(n_nodes, repeat=3, verbose=False):
+    res = []
+    for named in [False, True]:
+        for n in n_nodes:
+            obs = dict(n_nodes=n, named=named)
+            times = []
+            for r in range(repeat):
+                st = time()
+                container = fill_container(n, named)
+                times.append(time() - st)
+            assert len(container.nodes) == n
+            assert len(set(node.name for node in container.nodes)) == n
+            obs["time"] = min(times)
+            obs["time_per_node"] = obs["time"] / n
+            res.append(obs)
+            if verbose:
+                print("bench", len(res), ":", obs)
+    return res
+
+
+##############################
+# Plots.
+##############################
+
+def plot_results(df, verbose=False):
+    fig, ax = plt.subplots(1, 2, figsize=(10, 4))
+    for named in sorted(set(df.named)):
+        subset = df[df.named == named].sort_values("n_nodes")
+        if verbose:
+            print(subset)
+        label = "named={}".format(named)
+        subset.plot(x="n_nodes", y="time", label=label, ax=ax[0],
+                    logx=True, logy=True)
+        subset.plot(x="n_nodes", y="time_per_node", label=label, ax=ax[1],
+                    logx=True)
+    ax[0].set_ylabel("Time (s)", fontsize='x-small')
+    ax[1].set_ylabel("Time per node (s)", fontsize='x-small')
+    for a in ax:
+        a.set_xlabel("N nodes", fontsize='x-small')
+        a.legend(loc=0, fontsize='x-small')
+    plt.suptitle("Benchmark for ModelComponentContainer.add_node",
+                 fontsize=16)
+
+
+def run_bench(repeat=3, verbose=False):
+    n_nodes = [1000, 3000, 10000, 30000, 100000]
+
+    start = time()
+    results = bench(n_nodes, repeat=repeat, verbose=verbose)
+    end = time()
+
+    results_df = pandas.DataFrame(results)
+    print("Total time = %0.3f sec\n" % (end - start))
+
+    # plot the results
+    plot_results(results_df, verbose=verbose)
+    return results_df
+
+
+if __name__ == '__main__':
+    from datetime import datetime
+    import numpy
+    import onnx
+    import skl2onnx
+    df = pandas.DataFrame([
+        {"name": "date", "version": str(datetime.now())},
+        {"name": "numpy", "version": numpy.__version__},
+        {"name": "onnx", "version": onnx.__version__},
+        {"name": "skl2onnx", "version": skl2onnx.__version__},
+    ])
+    df.to_csv("bench_plot_skl2onnx_add_node.time.csv", index=False)
+    print(df)
+    df = run_bench(verbose=True)
+    plt.savefig("bench_plot_skl2onnx_add_node.png")
+    df.to_csv("bench_plot_skl2onnx_add_node.csv", index=False)
+    plt.show()
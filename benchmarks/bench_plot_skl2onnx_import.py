@@ -0,0 +1,130 @@
+# coding: utf-8
+"""
+Benchmark of the import time of *skl2onnx* and of the
+first conversion of a model (cold start).
+Every measure runs in a new process. Heavy dependencies
+(*numpy*, *scipy*, *onnx*, *scikit-learn*, *pandas*) are imported
+before the timer starts so that only *skl2onnx* is measured.
+"""
+# License: MIT
+
+import subprocess
+import sys
+from time import perf_counter as time
+
+import matplotlib.pyplot as plt
+import pandas
+
+
+##############################
+# Implementations to benchmark.
+##############################
+
+PRELOAD = """
+import numpy, scipy.sparse, onnx, onnx.defs, pandas, sklearn
+"""
+
+SCRIPTS = {
+    # operators are created when requested
+    "onnx_ops": "import skl2onnx.algebra.onnx_ops",
+    "onnx_ops+OnnxAdd": "from skl2onnx.algebra.onnx_ops import OnnxAdd",
+    # former behaviour, every operator is created at import time
+    "onnx_ops+eager": ("from skl2onnx.algebra.onnx_ops import "
+                       "dynamic_class_creation\n"
+                       "dynamic_class_creation()"),
+    "onnx_ops+all": (
+        "import skl2onnx.algebra.onnx_ops as ops\n"
+        "for name in dir(ops):\n"
+        "    if name.startswith('Onnx'):\n"
+        "        getattr(ops, name)"),
+    "skl2onnx": "import skl2onnx",
+    # cold start, converters are imported when a model needs them
+    "skl2onnx+LogisticRegression": (
+        "from sklearn.linear_model import LogisticRegression\n"
+        "from skl2onnx import convert_sklearn\n"
+        "from skl2onnx.common.data_types import FloatTensorType\n"
+        "X = numpy.array([[0, 1], [1, 0], [1, 1], [0, 0]], "
+        "dtype=numpy.float32)\n"
+        "model = LogisticRegression(solver='liblinear').fit(X, [0, 1, 1, 0])\n"
+        "convert_sklearn(model, initial_types=[\n"
+        "    ('X', FloatTensorType([None, 2]))])"),
+    "skl2onnx+all converters": (
+        "from skl2onnx.common._registration import load_all_converters\n"
+        "load_all_converters()"),
+}
+
+
+def measure(script):
+    "Returns the time spent by *script* in a new process."
+    code = "\n".join([
+        PRELOAD, "from time import perf_counter",
+        "begin = perf_counter()", script,
+        "print(perf_counter() - begin)"])
+    out = subprocess.check_output([sys.executable, "-c", code])
+    return float(out.decode('ascii').strip().split('\n')[-1])
+
+
+##############################
+# Benchmarks
+##############################
+
+def bench(names, repeat=5, verbose=False):
+    res = []
+    for name in names:
+        times = [measure(SCRIPTS[name]) for r in range(repeat)]
+        obs = dict(name=name, time=min(times),
+                   average=sum(times) / len(times))
+        res.append(obs)
+        if verbose:
+            print("bench", len(res), ":", obs)
+    return res
+
+
+##############################
+# Plots.
+##############################
+
+def plot_results(df, verbose=False):
+    fig, ax = plt.subplots(1, 1, figsize=(8, 4))
+    if verbose:
+        print(df)
+    df.plot.barh(x="name", y=["time", "average"], ax=ax)
+    ax.set_xlabel("Time (s)", fontsize='x-small')
+    ax.legend(loc=0, fontsize='x-small')
+    plt.suptitle("Benchmark for the import time of skl2onnx", fontsize=16)
+
+
+def run_bench(repeat=5, verbose=False):
+    names = list(SCRIPTS)
+
+    start = time()
+    results = bench(names, repeat=repeat, verbose=verbose)
+    end = time()
+
+    results_df = pandas.DataFrame(results)
+    print("Total time = %0.3f sec\n" % (end - start))
+
+    # plot the results
+    plot_results(results_df, verbose=verbose)
+    return results_df
+
+
+if __name__ == '__main__':
+    from datetime import datetime
+    import sklearn
+    import numpy
+    import onnx
+    import skl2onnx
+    df = pandas.DataFrame([
+        {"name": "date", "version": str(datetime.now())},
+        {"name": "numpy", "version": numpy.__version__},
+        {"name": "scikit-learn", "version": sklearn.__version__},
+        {"name": "onnx", "version": onnx.__version__},
+        {"name": "skl2onnx", "version": skl2onnx.__version__},
+    ])
+    df.to_csv("bench_plot_skl2onnx_import.time.csv", index=False)
+    print(df)
+    df = run_bench(verbose=True)
+    plt.savefig("bench_plot_skl2onnx_import.png")
+    df.to_csv("bench_plot_skl2onnx_import.csv", index=False)
+    plt.show()
@@ -0,0 +1,120 @@
+# coding: utf-8
+"""
+Benchmark of the conversion of many models with
+function *convert_sklearn_many*. The throughput
+should grow with the number of processes.
+"""
+# License: MIT
+
+import os
+from time import perf_counter as time
+
+import numpy as np
+from numpy.random import rand
+import matplotlib.pyplot as plt
+import pandas
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.utils.testing import ignore_warnings
+from skl2onnx import convert_sklearn_many
+from skl2onnx.common.data_types import FloatTensorType
+
+
+##############################
+# Implementations to benchmark.
+##############################
+
+def fcts_model(X, y, n_models):
+    "Converts *n_models* random forests."
+    models = [RandomForestClassifier(n_estimators=10, max_depth=8).fit(X, y)
+              for i in range(n_models)]
+    initial_types = [('X', FloatTensorType([None, X.shape[1]]))]
+
+    def convert(n_jobs, models=models, initial_types=initial_types):
+        return list(convert_sklearn_many(
+            models, initial_types=initial_types, n_jobs=n_jobs))
+
+    return convert
+
+
+##############################
+# Benchmarks
+##############################
+
+def bench(n_models, n_jobs, n_obs=1000, n_features=10,
+          repeat=3, verbose=False):
+    res = []
+    X = rand(n_obs, n_features)
+    y = (X.sum(axis=1) + rand(n_obs) >= (n_features + 1) / 2).astype(
+        np.int64)
+    for n_mod in n_models:
+        convert = fcts_model(X, y, n_mod)
+        for nj in n_jobs:
+            times = []
+            for r in range(repeat):
+                st = time()
+                results = convert(nj)
+                times.append(time() - st)
+            obs = dict(n_models=n_mod, n_jobs=nj, time=min(times),
+                       failures=sum(res[2] is not None for res in results))
+            obs["models_per_second"] = n_mod / obs["time"]
+            res.append(obs)
+            if verbose:
+                print("bench", len(res), ":", obs)
+    return res
+
+
+##############################
+# Plots.
+##############################
+
+def plot_results(df, verbose=False):
+    fig, ax = plt.subplots(1, 1, figsize=(6, 4))
+    if verbose:
+        print(df)
+    for nm in sorted(set(df.n_models)):
+        sub = df[df.n_models == nm].sort_values("n_jobs")
+        sub.plot(x="n_jobs", y="models_per_second", ax=ax,
+                 label="%d models" % nm)
+    ax.set_xlabel("N processes", fontsize='x-small')
+    ax.set_ylabel("Models per second", fontsize='x-small')
+    ax.legend(loc=0, fontsize='x-small')
+    plt.suptitle("Benchmark for convert_sklearn_many", fontsize=16)
+
+
+@ignore_warnings(category=FutureWarning)
+def run_bench(repeat=3, verbose=False):
+    n_models = [20, 100]
+    n_jobs = [1, 2, 4, 8, os.cpu_count() or 1]
+    n_jobs = sorted(set(n_jobs))
+
+    start = time()
+    results = bench(n_models, n_jobs, repeat=repeat, verbose=verbose)
+    end = time()
+
+    results_df = pandas.DataFrame(results)
+    print("Total time = %0.3f sec\n" % (end - start))
+
+    # plot the results
+    plot_results(results_df, verbose=verbose)
+    return results_df
+
+
+if __name__ == '__main__':
+    from datetime import datetime
+    import sklearn
+    import numpy
+    import onnx
+    import skl2onnx
+    df = pandas.DataFrame([
+        {"name": "date", "version": str(datetime.now())},
+        {"name": "numpy", "version": numpy.__version__},
+        {"name": "scikit-learn", "version": sklearn.__version__},
+        {"name": "onnx", "version": onnx.__version__},
+        {"name": "skl2onnx", "version": skl2onnx.__version__},
+    ])
+    df.to_csv("bench_plot_skl2onnx_many.time.csv", index=False)
+    print(df)
+    df = run_bench(verbose=True)
+    plt.savefig("bench_plot_skl2onnx_many.png")
+    df.to_csv("bench_plot_skl2onnx_many.csv", index=False)
+    plt.show()
@@ -0,0 +1,131 @@
+# coding: utf-8
+"""
+Benchmark of the memory used by the topology of large ensembles.
+A *BaggingClassifier* declares one operator and two variables
+per estimator, the benchmark measures the memory retained by
+the topology once the conversion is done and the peak memory
+of the conversion.
+"""
+# License: MIT
+
+import gc
+import tracemalloc
+from time import perf_counter as time
+
+import numpy as np
+from numpy.random import rand
+import matplotlib.pyplot as plt
+import pandas
+from sklearn.ensemble import BaggingClassifier
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.utils.testing import ignore_warnings
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+
+##############################
+# Implementations to benchmark.
+##############################
+
+def fcts_model(X, y, n_estimators):
+    "Converts a bagging classifier and keeps the topology."
+    model = BaggingClassifier(DecisionTreeClassifier(max_depth=2),
+                              n_estimators=n_estimators)
+    model.fit(X, y)
+    initial_types = [('X', FloatTensorType([None, X.shape[1]]))]
+
+    def convert(model=model, initial_types=initial_types):
+        return convert_sklearn(model, 'bagging', initial_types=initial_types,
+                               intermediate=True)
+
+    return convert
+
+
+##############################
+# Benchmarks
+##############################
+
+def bench(n_estimators, n_obs=1000, n_features=10, verbose=False):
+    res = []
+    X = rand(n_obs, n_features)
+    y = (X.sum(axis=1) + rand(n_obs) >= (n_features + 1) / 2).astype(
+        np.int64)
+    for n_est in n_estimators:
+        convert = fcts_model(X, y, n_est)
+        gc.collect()
+        tracemalloc.start()
+        begin = tracemalloc.get_traced_memory()[0]
+        st = time()
+        onx, topology = convert()
+        end = time()
+        size = onx.ByteSize()
+        del onx
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        n_operators = len(list(topology.unordered_operator_iterator()))
+        n_variables = len(list(topology.unordered_variable_iterator()))
+        del topology
+        obs = dict(n_estimators=n_est, n_operators=n_operators,
+                   n_variables=n_variables, time=end - st,
+                   topology_memory=current - begin, peak_memory=peak - begin,
+                   size=size)
+        res.append(obs)
+        if verbose:
+            print("bench", len(res), ":", obs)
+    return res
+
+
+##############################
+# Plots.
+##############################
+
+def plot_results(df, verbose=False):
+    fig, ax = plt.subplots(1, 1, figsize=(6, 4))
+    if verbose:
+        print(df)
+    df = df.sort_values("n_estimators")
+    for col in ["topology_memory", "peak_memory"]:
+        df.plot(x="n_estimators", y=col, ax=ax, logx=True, logy=True,
+                label=col)
+    ax.set_xlabel("N estimators", fontsize='x-small')
+    ax.set_ylabel("Memory (bytes)", fontsize='x-small')
+    ax.legend(loc=0, fontsize='x-small')
+    plt.suptitle("Memory used to convert a BaggingClassifier", fontsize=16)
+
+
+@ignore_warnings(category=FutureWarning)
+def run_bench(verbose=False):
+    n_estimators = [10, 100, 1000, 5000]
+
+    start = time()
+    results = bench(n_estimators, verbose=verbose)
+    end = time()
+
+    results_df = pandas.DataFrame(results)
+    print("Total time = %0.3f sec\n" % (end - start))
+
+    # plot the results
+    plot_results(results_df, verbose=verbose)
+    return results_df
+
+
+if __name__ == '__main__':
+    from datetime import datetime
+    import sklearn
+    import numpy
+    import onnx
+    import skl2onnx
+    df = pandas.DataFrame([
+        {"name": "date", "version": str(datetime.now())},
+        {"name": "numpy", "version": numpy.__version__},
+        {"name": "scikit-learn", "version": sklearn.__version__},
+        {"name": "onnx", "version": onnx.__version__},
+        {"name": "skl2onnx", "version": skl2onnx.__version__},
+    ])
+    df.to_csv("bench_plot_skl2onnx_memory.time.csv", index=False)
+    print(df)
+    df = run_bench(verbose=True)
+    plt.savefig("bench_plot_skl2onnx_memory.png")
+    df.to_csv("bench_plot_skl2onnx_memory.csv", index=False)
+    plt.show()
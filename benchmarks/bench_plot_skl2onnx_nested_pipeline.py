@@ -0,0 +1,133 @@
+# coding: utf-8
+"""
+Benchmark of the conversion of nested pipelines.
+Every level adds a *Pipeline* and a *FeatureUnion*,
+the conversion time should grow linearly with the depth.
+"""
+# License: MIT
+
+from time import perf_counter as time
+
+import numpy as np
+from numpy.random import rand
+import matplotlib.pyplot as plt
+import pandas
+from sklearn.decomposition import PCA
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import FeatureUnion, Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from sklearn.utils.testing import ignore_warnings
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+
+##############################
+# Implementations to benchmark.
+##############################
+
+def nested_pipeline(depth, n_features):
+    "Builds a pipeline with *depth* nested pipelines and feature unions."
+    model = LogisticRegression(solver='liblinear')
+    for i in range(depth):
+        union = FeatureUnion([('std', StandardScaler()),
+                              ('minmax', MinMaxScaler())])
+        model = Pipeline([('union', union),
+                          ('pca', PCA(n_components=n_features)),
+                          ('next', model)])
+    return model
+
+
+def fcts_model(X, y, depth):
+    "Converts a nested pipeline."
+    model = nested_pipeline(depth, X.shape[1])
+    model.fit(X, y)
+    initial_types = [('X', FloatTensorType([None, X.shape[1]]))]
+
+    def convert(model=model, initial_types=initial_types):
+        return convert_sklearn(model, initial_types=initial_types,
+                               intermediate=True)
+
+    return convert
+
+
+##############################
+# Benchmarks
+##############################
+
+def bench(depths, n_features=4, repeat=3, verbose=False):
+    res = []
+    X = rand(100, n_features)
+    y = (X.sum(axis=1) >= n_features / 2).astype(np.int64)
+    for depth in depths:
+        convert = fcts_model(X, y, depth)
+        times = []
+        for r in range(repeat):
+            st = time()
+            onx, topology = convert()
+            times.append(time() - st)
+        n_operators = len(list(topology.unordered_operator_iterator()))
+        obs = dict(depth=depth, n_operators=n_operators,
+                   n_nodes=len(onx.graph.node),
+                   n_scopes=len(topology.scopes), time=min(times))
+        obs["time_per_operator"] = obs["time"] / n_operators
+        res.append(obs)
+        if verbose:
+            print("bench", len(res), ":", obs)
+    return res
+
+
+##############################
+# Plots.
+##############################
+
+def plot_results(df, verbose=False):
+    fig, ax = plt.subplots(1, 2, figsize=(10, 4))
+    df = df.sort_values("depth")
+    if verbose:
+        print(df)
+    df.plot(x="n_operators", y="time", ax=ax[0], logx=True, logy=True)
+    df.plot(x="n_operators", y="time_per_operator", ax=ax[1], logx=True)
+    ax[0].set_ylabel("Time (s)", fontsize='x-small')
+    ax[1].set_ylabel("Time per operator (s)", fontsize='x-small')
+    for a in ax:
+        a.set_xlabel("N operators", fontsize='x-small')
+        a.legend(loc=0, fontsize='x-small')
+    plt.suptitle("Benchmark for nested Pipeline/FeatureUnion conversion",
+                 fontsize=16)
+
+
+@ignore_warnings(category=FutureWarning)
+def run_bench(repeat=3, verbose=False):
+    depths = [1, 5, 10, 25, 50, 100, 200]
+
+    start = time()
+    results = bench(depths, repeat=repeat, verbose=verbose)
+    end = time()
+
+    results_df = pandas.DataFrame(results)
+    print("Total time = %0.3f sec\n" % (end - start))
+
+    # plot the results
+    plot_results(results_df, verbose=verbose)
+    return results_df
+
+
+if __name__ == '__main__':
+    from datetime import datetime
+    import sklearn
+    import numpy
+    import onnx
+    import skl2onnx
+    df = pandas.DataFrame([
+        {"name": "date", "version": str(datetime.now())},
+        {"name": "numpy", "version": numpy.__version__},
+        {"name": "scikit-learn", "version": sklearn.__version__},
+        {"name": "onnx", "version": onnx.__version__},
+        {"name": "skl2onnx", "version": skl2onnx.__version__},
+    ])
+    df.to_csv("bench_plot_skl2onnx_nested_pipeline.time.csv", index=False)
+    print(df)
+    df = run_bench(verbose=True)
+    plt.savefig("bench_plot_skl2onnx_nested_pipeline.png")
+    df.to_csv("bench_plot_skl2onnx_nested_pipeline.csv", index=False)
+    plt.show()
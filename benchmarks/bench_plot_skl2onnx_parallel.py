@@ -0,0 +1,127 @@
+# coding: utf-8
+"""
+Benchmark of the parallel conversion of ensembles.
+Every estimator of a *BaggingClassifier* is converted
+by a different process if *n_jobs > 1*,
+the converted model does not depend on *n_jobs*.
+"""
+# License: MIT
+
+import os
+from time import perf_counter as time
+
+import numpy as np
+from numpy.random import rand
+import matplotlib.pyplot as plt
+import pandas
+from sklearn.ensemble import BaggingClassifier
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.utils.testing import ignore_warnings
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+
+##############################
+# Implementations to benchmark.
+##############################
+
+def fcts_model(X, y, n_estimators):
+    "Converts a bagging classifier."
+    model = BaggingClassifier(DecisionTreeClassifier(),
+                              n_estimators=n_estimators)
+    model.fit(X, y)
+    initial_types = [('X', FloatTensorType([None, X.shape[1]]))]
+
+    def convert(n_jobs, model=model, initial_types=initial_types):
+        return convert_sklearn(model, 'bagging', initial_types=initial_types,
+                               n_jobs=n_jobs)
+
+    return convert
+
+
+##############################
+# Benchmarks
+##############################
+
+def bench(n_estimators, n_jobs, n_obs=10000, n_features=10,
+          repeat=3, verbose=False):
+    res = []
+    X = rand(n_obs, n_features)
+    y = (X.sum(axis=1) + rand(n_obs) >= (n_features + 1) / 2).astype(
+        np.int64)
+    for n_est in n_estimators:
+        convert = fcts_model(X, y, n_est)
+        serial = None
+        for nj in n_jobs:
+            times = []
+            for r in range(repeat):
+                st = time()
+                onx = convert(nj)
+                times.append(time() - st)
+            content = onx.SerializeToString()
+            if serial is None:
+                serial = content
+            obs = dict(n_estimators=n_est, n_jobs=nj, time=min(times),
+                       size=len(content), same=content == serial)
+            res.append(obs)
+            if verbose:
+                print("bench", len(res), ":", obs)
+    return res
+
+
+##############################
+# Plots.
+##############################
+
+def plot_results(df, verbose=False):
+    fig, ax = plt.subplots(1, 1, figsize=(6, 4))
+    if verbose:
+        print(df)
+    for nj in sorted(set(df.n_jobs)):
+        sub = df[df.n_jobs == nj].sort_values("n_estimators")
+        sub.plot(x="n_estimators", y="time", ax=ax, logx=True, logy=True,
+                 label="n_jobs=%d" % nj)
+    ax.set_xlabel("N estimators", fontsize='x-small')
+    ax.set_ylabel("Time (s)", fontsize='x-small')
+    ax.legend(loc=0, fontsize='x-small')
+    plt.suptitle("Benchmark for the parallel conversion of a "
+                 "BaggingClassifier", fontsize=16)
+
+
+@ignore_warnings(category=FutureWarning)
+def run_bench(repeat=3, verbose=False):
+    n_estimators = [10, 50, 200]
+    n_jobs = [1, 2, 4, 8, os.cpu_count() or 1]
+    n_jobs = sorted(set(n_jobs))
+
+    start = time()
+    results = bench(n_estimators, n_jobs, repeat=repeat, verbose=verbose)
+    end = time()
+
+    results_df = pandas.DataFrame(results)
+    print("Total time = %0.3f sec\n" % (end - start))
+
+    # plot the results
+    plot_results(results_df, verbose=verbose)
+    return results_df
+
+
+if __name__ == '__main__':
+    from datetime import datetime
+    import sklearn
+    import numpy
+    import onnx
+    import skl2onnx
+    df = pandas.DataFrame([
+        {"name": "date", "version": str(datetime.now())},
+        {"name": "numpy", "version": numpy.__version__},
+        {"name": "scikit-learn", "version": sklearn.__version__},
+        {"name": "onnx", "version": onnx.__version__},
+        {"name": "skl2onnx", "version": skl2onnx.__version__},
+    ])
+    df.to_csv("bench_plot_skl2onnx_parallel.time.csv", index=False)
+    print(df)
+    df = run_bench(verbose=True)
+    plt.savefig("bench_plot_skl2onnx_parallel.png")
+    df.to_csv("bench_plot_skl2onnx_parallel.csv", index=False)
+    plt.show()
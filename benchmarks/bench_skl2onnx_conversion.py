@@ -0,0 +1,338 @@
+# coding: utf-8
+"""
+Benchmark of the conversion of every model supported by
+:func:`supported_converters <skl2onnx.supported_converters>`
+at several scales. For every model and scale, the script
+measures the conversion time, the peak memory of the conversion
+and the size of the converted model and writes them into
+a JSON file. Another JSON file can be given to compare with
+a previous run and detect regressions.
+
+::
+
+    python bench_skl2onnx_conversion.py --output conversion.json
+    python bench_skl2onnx_conversion.py --scales small medium \\
+        --compare conversion.json
+
+Converters which do not convert a *scikit-learn* model
+(such as *ZipMap* or *Concat*) are not benchmarked.
+Models which cannot be trained or converted are reported
+with an error.
+"""
+# License: MIT
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+import warnings
+from time import perf_counter as time
+
+import numpy as np
+from numpy.random import RandomState
+from sklearn.base import is_classifier, is_regressor
+from skl2onnx import convert_sklearn, supported_converters
+from skl2onnx._supported_operators import build_sklearn_operator_name_map
+from skl2onnx.common.data_types import (
+    DictionaryType, FloatTensorType, Int64TensorType, StringTensorType
+)
+
+
+#: Every scale defines the size of the training set,
+#: the number of features and the number of estimators of ensembles.
+SCALES = {
+    'small': dict(n_samples=100, n_features=4, n_estimators=5),
+    'medium': dict(n_samples=1000, n_features=20, n_estimators=50),
+    'large': dict(n_samples=5000, n_features=100, n_estimators=200),
+}
+
+
+##############################
+# Models to benchmark.
+##############################
+
+def _linear():
+    from sklearn.linear_model import LinearRegression
+    return LinearRegression()
+
+
+def _logistic():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(solver='liblinear', multi_class='ovr')
+
+
+def _tree():
+    from sklearn.tree import DecisionTreeClassifier
+    return DecisionTreeClassifier(max_depth=3)
+
+
+# Models which cannot be built with the default parameters.
+_constructors = {
+    'CalibratedClassifierCV': lambda cl: cl(_tree(), cv=3),
+    'GridSearchCV': lambda cl: cl(_logistic(), {'C': [0.1, 1.]}, cv=3),
+    'KBinsDiscretizer': lambda cl: cl(encode='ordinal'),
+    'OneVsRestClassifier': lambda cl: cl(_logistic()),
+    'RFE': lambda cl: cl(_linear()),
+    'RFECV': lambda cl: cl(_linear(), cv=3),
+    'SelectFromModel': lambda cl: cl(_linear()),
+    'VotingClassifier': lambda cl: cl(
+        [('lr', _logistic()), ('dt', _tree())], voting='soft',
+        flatten_transform=False),
+    'VotingRegressor': lambda cl: cl([('lr', _linear())]),
+}
+
+# Models trained on the targets.
+_target_models = {'LabelBinarizer', 'LabelEncoder'}
+# Models which require several targets.
+_multi_target_models = {'MultiTaskElasticNet', 'MultiTaskElasticNetCV',
+                        'MultiTaskLasso', 'MultiTaskLassoCV'}
+# Models which require positive features.
+_positive_models = {'ComplementNB', 'MultinomialNB', 'TfidfTransformer'}
+# Models which require categories.
+_category_models = {'OneHotEncoder', 'OrdinalEncoder'}
+# Models which require missing values.
+_missing_models = {'Imputer', 'SimpleImputer'}
+# Models which require text.
+_text_models = {'CountVectorizer', 'TfidfVectorizer'}
+# Models whose training cost grows too fast with the number of samples.
+_max_samples = {'GaussianProcessRegressor': 1000}
+
+
+def _make_model(cl):
+    name = cl.__name__
+    if name in _constructors:
+        return _constructors[name](cl)
+    return cl()
+
+
+def _set_scale(model, n_features, n_estimators):
+    params = model.get_params()
+    if 'n_estimators' in params:
+        model.set_params(n_estimators=n_estimators)
+    if 'hidden_layer_sizes' in params:
+        model.set_params(hidden_layer_sizes=(n_estimators, ))
+    if model.__class__.__name__ == 'SelectKBest':
+        model.set_params(k=max(n_features // 2, 1))
+
+
+def _make_data(name, rs, n_samples, n_features):
+    """
+    Returns training data *(X, y)* and the initial types
+    to convert a model.
+    """
+    n_samples = min(n_samples, _max_samples.get(name, n_samples))
+    if name in _text_models:
+        words = np.array(['w%d' % i for i in range(n_features * 10)])
+        X = np.array([" ".join(rs.choice(words, 10))
+                      for i in range(n_samples)])
+        return X, None, [('X', StringTensorType([None, 1]))]
+    if name == 'DictVectorizer':
+        X = [dict(('f%d' % i, rs.rand()) for i in range(n_features)
+                  if rs.rand() > 0.5) for j in range(n_samples)]
+        return X, None, [('X', DictionaryType(
+            StringTensorType([1]), FloatTensorType([1])))]
+    y = rs.randint(0, 3, n_samples)
+    if name in _target_models:
+        return y, None, [('X', Int64TensorType([None]))]
+    if name in _category_models:
+        X = rs.randint(0, 5, (n_samples, n_features)).astype(np.int64)
+        return X, None, [('X', Int64TensorType([None, n_features]))]
+    X = rs.randn(n_samples, n_features)
+    if name in _positive_models:
+        X = np.abs(X)
+    elif name in _missing_models:
+        X[rs.rand(n_samples, n_features) < 0.1] = np.nan
+    # targets are correlated to the features to avoid degenerated models
+    y = ((X[:, 0] > 0).astype(np.int64) +
+         (np.nan_to_num(X).sum(axis=1) > 0).astype(np.int64))
+    return X, y, [('X', FloatTensorType([None, n_features]))]
+
+
+def _fit(model, X, y):
+    if is_classifier(model):
+        return model.fit(X, y)
+    if is_regressor(model):
+        y = y.astype(np.float64) + np.nan_to_num(X[:, 0])
+        if model.__class__.__name__ in _multi_target_models:
+            y = np.vstack([y, -y]).T
+        return model.fit(X, y)
+    if y is not None:
+        # feature selection and other supervised transformers
+        return model.fit(X, y)
+    return model.fit(X)
+
+
+def benchmarked_models(names=None):
+    """
+    Returns the *scikit-learn* classes to benchmark as a list of
+    ``(name, class, alias)``, the converter *alias* is one of
+    :func:`supported_converters <skl2onnx.supported_converters>`.
+    """
+    aliases = set(supported_converters())
+    models = []
+    for cl, alias in build_sklearn_operator_name_map().items():
+        if alias not in aliases or not cl.__module__.startswith('sklearn'):
+            continue
+        if names and cl.__name__ not in names:
+            continue
+        models.append((cl.__name__, cl, alias))
+    return sorted(models, key=lambda m: m[0])
+
+
+##############################
+# Benchmarks
+##############################
+
+def bench_model(name, cl, alias, scale, repeat=3, verbose=False):
+    """
+    Trains and converts one model, returns the measures.
+    """
+    params = SCALES[scale]
+    obs = dict(model=name, alias=alias, scale=scale,
+               n_estimators=params['n_estimators'])
+    rs = RandomState(0)
+    try:
+        X, y, initial_types = _make_data(
+            name, rs, params['n_samples'], params['n_features'])
+        obs['n_samples'] = len(X)
+        obs['n_features'] = (len(X[0]) if hasattr(X, 'shape') and
+                             len(X.shape) == 2 else 1)
+        model = _make_model(cl)
+        _set_scale(model, obs['n_features'], params['n_estimators'])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            _fit(model, X, y)
+    except Exception as e:
+        obs['error'] = "training: %s: %s" % (e.__class__.__name__, e)
+        return obs
+
+    def convert():
+        return convert_sklearn(model, name, initial_types=initial_types)
+
+    try:
+        times = []
+        for r in range(repeat):
+            st = time()
+            onx = convert()
+            times.append(time() - st)
+        size = len(onx.SerializeToString())
+        del onx
+
+        # tracemalloc slows down the conversion, it is measured apart
+        gc.collect()
+        tracemalloc.start()
+        begin = tracemalloc.get_traced_memory()[0]
+        onx = convert()
+        peak = tracemalloc.get_traced_memory()[1] - begin
+        tracemalloc.stop()
+        del onx
+    except Exception as e:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        obs['error'] = "conversion: %s: %s" % (e.__class__.__name__, e)
+        return obs
+
+    obs.update(dict(time=min(times), peak_memory=peak, size=size))
+    if verbose:
+        print("bench", name, scale, ":", obs)
+    return obs
+
+
+def bench(scales, names=None, repeat=3, verbose=False):
+    res = []
+    for name, cl, alias in benchmarked_models(names):
+        for scale in scales:
+            obs = bench_model(name, cl, alias, scale, repeat=repeat,
+                              verbose=verbose)
+            if verbose and 'error' in obs:
+                print("bench", name, scale, ":", obs['error'])
+            res.append(obs)
+    return res
+
+
+def compare(results, previous, threshold=1.5, min_time=1e-3):
+    """
+    Compares the results with the results of a previous run and
+    returns the regressions, every measure greater than *threshold*
+    times the previous one is a regression, times lower than
+    *min_time* are not compared, they are too noisy.
+    Conversions which succeeded in the previous run and fail
+    in this one are also reported.
+    """
+    before = dict(((obs['model'], obs['scale']), obs) for obs in previous)
+    regressions = []
+    for obs in results:
+        old = before.get((obs['model'], obs['scale']), None)
+        if old is None or 'error' in old:
+            continue
+        if 'error' in obs:
+            regressions.append(dict(model=obs['model'], scale=obs['scale'],
+                                    measure='error', before=None,
+                                    after=obs['error']))
+            continue
+        for measure in ['time', 'peak_memory', 'size']:
+            if measure == 'time' and old[measure] < min_time:
+                continue
+            if obs[measure] > old[measure] * threshold:
+                regressions.append(dict(
+                    model=obs['model'], scale=obs['scale'], measure=measure,
+                    before=old[measure], after=obs[measure]))
+    return regressions
+
+
+def versions():
+    from datetime import datetime
+    import sklearn
+    import onnx
+    import skl2onnx
+    return {"date": str(datetime.now()), "python": sys.version,
+            "numpy": np.__version__, "scikit-learn": sklearn.__version__,
+            "onnx": onnx.__version__, "skl2onnx": skl2onnx.__version__}
+
+
+def run_bench(args=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the conversion of every supported model.")
+    parser.add_argument('--scales', nargs='+', default=sorted(SCALES),
+                        choices=sorted(SCALES))
+    parser.add_argument('--models', nargs='+', default=None,
+                        help="class names of the models to benchmark, "
+                             "all of them by default")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default="bench_skl2onnx_conversion.json")
+    parser.add_argument('--compare', default=None,
+                        help="JSON file produced by a previous run")
+    parser.add_argument('--threshold', type=float, default=1.5)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(args)
+
+    start = time()
+    results = bench(args.scales, args.models, repeat=args.repeat,
+                    verbose=args.verbose)
+    end = time()
+    print("Total time = %0.3f sec\n" % (end - start))
+
+    report = dict(versions=versions(), scales=SCALES, results=results)
+    regressions = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)
+        regressions = compare(results, previous['results'],
+                              threshold=args.threshold)
+        report['regressions'] = regressions
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1)
+
+    errors = [obs for obs in results if 'error' in obs]
+    print("%d measures, %d errors, saved into %r" % (
+        len(results), len(errors), args.output))
+    if regressions:
+        for reg in regressions:
+            print("regression:", reg)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run_bench())
@@ -16,6 +16,7 @@ __model_version__ = 0
 
 
 from .convert import convert_sklearn, to_onnx, wrap_as_onnx_mixin # noqa
+from .convert import convert_sklearn_many # noqa
 from ._supported_operators import update_registered_converter # noqa
 from ._parse import update_registered_parser # noqa
 
@@ -34,12 +35,12 @@ def supported_converters(from_sklearn=False):
         whose name is prefixed by ``'Sklearn'``
     :return: list of supported models as string
     """
-    from .common._registration import _converter_pool # noqa
+    from .common._registration import _converter_pool, _converter_modules
     # The two following lines populates the list of supported converters.
     from . import shape_calculators # noqa
     from . import operator_converters # noqa
 
-    names = sorted(_converter_pool.keys())
+    names = sorted(set(_converter_pool) | set(_converter_modules))
     if from_sklearn:
         return [_[7:] for _ in names if _.startswith('Sklearn')]
     else:
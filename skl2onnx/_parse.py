@@ -17,21 +17,15 @@ except ImportError:
     class OutlierMixin:
         pass
 
-from sklearn.gaussian_process import GaussianProcessRegressor
-from sklearn.model_selection import GridSearchCV
-from sklearn.neighbors import NearestNeighbors
-from sklearn.mixture import GaussianMixture, BayesianGaussianMixture
-from sklearn.svm import LinearSVC, NuSVC, SVC
-try:
-    from sklearn.compose import ColumnTransformer
-except ImportError:
-    # ColumnTransformer was introduced in 0.20.
-    ColumnTransformer = None
 
 from ._supported_operators import (
     _get_sklearn_operator_name, cluster_list, outlier_list
 )
-from ._supported_operators import sklearn_classifier_list
+from ._supported_operators import (
+    sklearn_classifier_list, _sklearn_classifier_paths,
+    _get_loaded_class, _is_instance, _LazyClassMap
+)
+from .common import _profiling
 from .common._container import SklearnModelContainerNode
 from .common._topology import Topology
 from .common.data_types import DictionaryType
@@ -94,7 +88,7 @@ def _parse_sklearn_simple_model(scope, model, inputs, custom_parsers=None):
 
     if (type(model) in sklearn_classifier_list
             or isinstance(model, ClassifierMixin)
-            or (isinstance(model, GridSearchCV)
+            or (_is_instance(model, 'sklearn.model_selection.GridSearchCV')
                 and is_classifier(model))):
         # For classifiers, we may have two outputs, one for label and
         # the other one for probabilities of all classes. Notice that
@@ -126,7 +120,8 @@ def _parse_sklearn_simple_model(scope, model, inputs, custom_parsers=None):
             'scores', scope.tensor_type())
         this_operator.outputs.append(label_variable)
         this_operator.outputs.append(score_tensor_variable)
-    elif type(model) == NearestNeighbors:
+    elif type(model) is _get_loaded_class(
+            'sklearn.neighbors.NearestNeighbors'):
         # For Nearest Neighbours, we have two outputs, one for nearest
         # neighbours' indices and the other one for distances
         index_variable = scope.declare_local_variable('index',
@@ -135,7 +130,9 @@ def _parse_sklearn_simple_model(scope, model, inputs, custom_parsers=None):
                                                          scope.tensor_type())
         this_operator.outputs.append(index_variable)
         this_operator.outputs.append(distance_variable)
-    elif type(model) in {GaussianMixture, BayesianGaussianMixture}:
+    elif type(model) in (
+            _get_loaded_class('sklearn.mixture.GaussianMixture'),
+            _get_loaded_class('sklearn.mixture.BayesianGaussianMixture')):
         label_variable = scope.declare_local_variable('label',
                                                       Int64TensorType())
         prob_variable = scope.declare_local_variable('probabilities',
@@ -300,9 +297,18 @@ def _parse_sklearn_grid_search_cv(scope, model, inputs, custom_parsers=None):
 
 
 def _parse_sklearn_classifier(scope, model, inputs, custom_parsers=None):
+    options = scope.get_options(model, dict(zipmap=True, labels_only=False))
     probability_tensor = _parse_sklearn_simple_model(
             scope, model, inputs, custom_parsers=custom_parsers)
-    if model.__class__ in [NuSVC, SVC] and not model.probability:
+    if options['labels_only']:
+        # probabilities are not an output of the graph
+        return probability_tensor[:1]
+    if (model.__class__ in (_get_loaded_class('sklearn.svm.NuSVC'),
+                            _get_loaded_class('sklearn.svm.SVC'))
+            and not model.probability):
+        return probability_tensor
+    if not options['zipmap']:
+        # probabilities remain a tensor [N, n_classes]
         return probability_tensor
     this_operator = scope.declare_local_operator('SklearnZipMap')
     this_operator.inputs = probability_tensor
@@ -376,6 +382,9 @@ def parse_sklearn(scope, model, inputs, custom_parsers=None):
         model, inputs, custom_parsers=None) }``
     :return: The output variables produced by the input model
     """
+    profiler = _profiling.active_profiler
+    if profiler is not None:
+        profiler.start_parse(scope)
     tmodel = type(model)
     if custom_parsers is not None and tmodel in custom_parsers:
         outputs = custom_parsers[tmodel](scope, model, inputs,
@@ -389,6 +398,8 @@ def parse_sklearn(scope, model, inputs, custom_parsers=None):
     else:
         outputs = _parse_sklearn_simple_model(scope, model, inputs,
                                               custom_parsers=custom_parsers)
+    if profiler is not None:
+        profiler.stop_parse(scope, model)
     return outputs
 
 
@@ -463,18 +474,21 @@ def parse_sklearn_model(model, initial_types=None, target_opset=None,
 
 
 def build_sklearn_parsers_map():
-    map_parser = {
-        pipeline.Pipeline: _parse_sklearn_pipeline,
-        pipeline.FeatureUnion: _parse_sklearn_feature_union,
-        GaussianProcessRegressor: _parse_sklearn_gaussian_process,
-        GridSearchCV: _parse_sklearn_grid_search_cv,
-    }
-    if ColumnTransformer is not None:
-        map_parser[ColumnTransformer] = _parse_sklearn_column_transformer
-
-    for tmodel in sklearn_classifier_list:
-        if tmodel not in [LinearSVC]:
-            map_parser[tmodel] = _parse_sklearn_classifier
+    map_parser = _LazyClassMap({
+        'sklearn.gaussian_process.GaussianProcessRegressor':
+            _parse_sklearn_gaussian_process,
+        'sklearn.model_selection.GridSearchCV':
+            _parse_sklearn_grid_search_cv,
+        # ColumnTransformer was introduced in 0.20.
+        'sklearn.compose.ColumnTransformer':
+            _parse_sklearn_column_transformer,
+    })
+    map_parser[pipeline.Pipeline] = _parse_sklearn_pipeline
+    map_parser[pipeline.FeatureUnion] = _parse_sklearn_feature_union
+
+    for path in _sklearn_classifier_paths:
+        if path != 'sklearn.svm.LinearSVC':
+            map_parser.add_path(path, _parse_sklearn_classifier)
     return map_parser
 
 
@@ -4,149 +4,118 @@
 # license information.
 # --------------------------------------------------------------------------
 
+import importlib
+import sys
 import warnings
 
-# Calibrated classifier CV
-from sklearn.calibration import CalibratedClassifierCV
-
-# Linear classifiers
-from sklearn.linear_model import (
-    LogisticRegression, LogisticRegressionCV,
-    PassiveAggressiveClassifier,
-    Perceptron, SGDClassifier,
-    RidgeClassifier, RidgeClassifierCV,
-)
-from sklearn.svm import LinearSVC, OneClassSVM
-
-# Linear regressors
-from sklearn.linear_model import (
-    ARDRegression,
-    BayesianRidge,
-    ElasticNet, ElasticNetCV,
-    HuberRegressor,
-    Lars, LarsCV,
-    Lasso, LassoCV,
-    LassoLars, LassoLarsCV,
-    LassoLarsIC,
-    LinearRegression,
-    MultiTaskElasticNet, MultiTaskElasticNetCV,
-    MultiTaskLasso, MultiTaskLassoCV,
-    OrthogonalMatchingPursuit, OrthogonalMatchingPursuitCV,
-    PassiveAggressiveRegressor,
-    RANSACRegressor,
-    Ridge, RidgeCV,
-    SGDRegressor,
-    TheilSenRegressor,
-)
-from sklearn.svm import LinearSVR
-from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
-
-# Mixture
-from sklearn.mixture import (
-    GaussianMixture, BayesianGaussianMixture
-)
-
-# Multi-class
-from sklearn.multiclass import OneVsRestClassifier
-
-# Tree-based models
-from sklearn.ensemble import (
-    AdaBoostClassifier, AdaBoostRegressor,
-    BaggingClassifier, BaggingRegressor,
-    ExtraTreesClassifier, ExtraTreesRegressor,
-    GradientBoostingClassifier, GradientBoostingRegressor,
-    RandomForestClassifier, RandomForestRegressor,
-    VotingClassifier
-)
-try:
-    from sklearn.ensemble import VotingRegressor
-except ImportError:
-    # New in 0.21
-    VotingRegressor = None
-from sklearn.tree import (
-    DecisionTreeClassifier, DecisionTreeRegressor,
-    ExtraTreeClassifier, ExtraTreeRegressor
-)
-
-# Gaussian processes
-from sklearn.gaussian_process import GaussianProcessRegressor
-
-# GridSearchCV
-from sklearn.model_selection import GridSearchCV
-
-# Support vector machines
-from sklearn.svm import NuSVC, NuSVR, SVC, SVR
-
-# K-nearest neighbors
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.neighbors import KNeighborsRegressor
-from sklearn.neighbors import NearestNeighbors
-
-# Naive Bayes
-from sklearn.naive_bayes import (
-    BernoulliNB,
-    GaussianNB,
-    MultinomialNB,
-)
-try:
-    from sklearn.naive_bayes import ComplementNB
-except ImportError:
-    # scikit-learn versions <= 0.19
-    ComplementNB = None
-
-# Neural Networks
-from sklearn.neural_network import MLPClassifier, MLPRegressor
-
-# Clustering
-from sklearn.cluster import KMeans, MiniBatchKMeans
-
-# Operators for preprocessing and feature engineering
-from sklearn.decomposition import (
-    PCA, IncrementalPCA, TruncatedSVD
-)
-from sklearn.feature_extraction import DictVectorizer
-from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.feature_selection import GenericUnivariateSelect, RFE, RFECV
-from sklearn.feature_selection import SelectFdr, SelectFpr, SelectFromModel
-from sklearn.feature_selection import SelectFwe, SelectKBest, SelectPercentile
-from sklearn.feature_selection import VarianceThreshold
-try:
-    # 0.20
-    from sklearn.impute import SimpleImputer
-except ImportError:
-    # 0.19
-    from sklearn.preprocessing import Imputer as SimpleImputer
-from sklearn.preprocessing import Binarizer
-try:
-    from sklearn.preprocessing import Imputer
-except ImportError:
-    # removed in 0.21
-    Imputer = None
-try:
-    from sklearn.preprocessing import KBinsDiscretizer
-except ImportError:
-    # not available in 0.19
-    KBinsDiscretizer = None
-    pass
-from sklearn.preprocessing import LabelBinarizer
-from sklearn.preprocessing import LabelEncoder
-from sklearn.preprocessing import Normalizer
-from sklearn.preprocessing import OneHotEncoder
-try:
-    from sklearn.preprocessing import OrdinalEncoder
-except ImportError:
-    # Not available in scikit-learn < 0.20.0
-    OrdinalEncoder = None
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.preprocessing import RobustScaler
-from sklearn.preprocessing import StandardScaler
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.preprocessing import MaxAbsScaler
-from sklearn.preprocessing import FunctionTransformer
-
 from .common._registration import register_converter, register_shape_calculator
 
+
+def _get_loaded_class(path):
+    """
+    Returns the class defined by its path (``'sklearn.svm.SVC'``)
+    if its module was already imported, None otherwise.
+    A model cannot be created without importing its class first,
+    the function is used to check the type of a model without
+    importing every module of *scikit-learn*.
+    """
+    module, name = path.rsplit('.', 1)
+    mod = sys.modules.get(module, None)
+    return None if mod is None else getattr(mod, name, None)
+
+
+def _is_instance(model, path):
+    """
+    Checks that *model* is an instance of the class defined by *path*
+    without importing it.
+    """
+    cls = _get_loaded_class(path)
+    return cls is not None and isinstance(model, cls)
+
+
+class _LazyClassMap(dict):
+    """
+    Dictionary keyed by classes. A class can be added with its path
+    (``'sklearn.svm.SVC'``) without being imported. A lookup
+    imports nothing, it only considers the modules already imported
+    (see :func:`_get_loaded_class`). Enumerating the dictionary
+    imports every class added by its path.
+    """
+
+    def __init__(self, paths=None):
+        dict.__init__(self)
+        self._paths = {}
+        if paths:
+            for path, value in paths.items():
+                self.add_path(path, value)
+
+    def add_path(self, path, value):
+        """
+        Adds a class defined by its path.
+        """
+        name = path.rsplit('.', 1)[-1]
+        self._paths.setdefault(name, []).append((path, value))
+
+    def _resolve(self, cls):
+        candidates = self._paths.get(getattr(cls, '__name__', None), None)
+        if not candidates:
+            return False
+        for i, (path, value) in enumerate(candidates):
+            if _get_loaded_class(path) is cls:
+                del candidates[i]
+                dict.__setitem__(self, cls, value)
+                return True
+        return False
+
+    def __contains__(self, cls):
+        return dict.__contains__(self, cls) or self._resolve(cls)
+
+    def __missing__(self, cls):
+        if self._resolve(cls):
+            return dict.__getitem__(self, cls)
+        raise KeyError(cls)
+
+    def get(self, cls, default=None):
+        return self[cls] if cls in self else default
+
+    def load(self):
+        """
+        Imports every class added by its path.
+        """
+        paths = self._paths
+        self._paths = {}
+        for candidates in paths.values():
+            for path, value in candidates:
+                module, name = path.rsplit('.', 1)
+                try:
+                    cls = getattr(importlib.import_module(module), name)
+                except (ImportError, AttributeError):
+                    # not available in this version of scikit-learn
+                    continue
+                if not dict.__contains__(self, cls):
+                    dict.__setitem__(self, cls, value)
+
+    def __iter__(self):
+        self.load()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.load()
+        return dict.__len__(self)
+
+    def keys(self):
+        self.load()
+        return dict.keys(self)
+
+    def values(self):
+        self.load()
+        return dict.values(self)
+
+    def items(self):
+        self.load()
+        return dict.items(self)
+
+
 # In most cases, scikit-learn operator produces only one output.
 # However, each classifier has basically two outputs; one is the
 # predicted label and the other one is the probabilities of all
@@ -154,104 +123,184 @@ from .common._registration import register_converter, register_shape_calculator
 # classifiers. In the parsing stage, we produce two outputs for objects
 # included in the following list and one output for everything not in
 # the list.
-sklearn_classifier_list = [
-    LogisticRegression, LogisticRegressionCV, Perceptron, SGDClassifier,
-    PassiveAggressiveClassifier,
-    LinearSVC, SVC, NuSVC,
-    GradientBoostingClassifier, RandomForestClassifier,
-    DecisionTreeClassifier, ExtraTreeClassifier, ExtraTreesClassifier,
-    BaggingClassifier,
-    BernoulliNB, ComplementNB, GaussianNB, MultinomialNB,
-    KNeighborsClassifier,
-    CalibratedClassifierCV, OneVsRestClassifier, VotingClassifier,
-    AdaBoostClassifier, MLPClassifier, LinearDiscriminantAnalysis
+_sklearn_classifier_paths = [
+    'sklearn.linear_model.LogisticRegression',
+    'sklearn.linear_model.LogisticRegressionCV',
+    'sklearn.linear_model.Perceptron',
+    'sklearn.linear_model.SGDClassifier',
+    'sklearn.linear_model.PassiveAggressiveClassifier',
+    'sklearn.svm.LinearSVC', 'sklearn.svm.SVC', 'sklearn.svm.NuSVC',
+    'sklearn.ensemble.GradientBoostingClassifier',
+    'sklearn.ensemble.RandomForestClassifier',
+    'sklearn.tree.DecisionTreeClassifier',
+    'sklearn.tree.ExtraTreeClassifier',
+    'sklearn.ensemble.ExtraTreesClassifier',
+    'sklearn.ensemble.BaggingClassifier',
+    'sklearn.naive_bayes.BernoulliNB', 'sklearn.naive_bayes.ComplementNB',
+    'sklearn.naive_bayes.GaussianNB', 'sklearn.naive_bayes.MultinomialNB',
+    'sklearn.neighbors.KNeighborsClassifier',
+    'sklearn.calibration.CalibratedClassifierCV',
+    'sklearn.multiclass.OneVsRestClassifier',
+    'sklearn.ensemble.VotingClassifier',
+    'sklearn.ensemble.AdaBoostClassifier',
+    'sklearn.neural_network.MLPClassifier',
+    'sklearn.discriminant_analysis.LinearDiscriminantAnalysis',
 ]
+sklearn_classifier_list = _LazyClassMap(
+    {path: True for path in _sklearn_classifier_paths})
 
 # Clustering algorithms: produces two outputs, label and score for
 # each cluster in most cases.
-cluster_list = [KMeans, MiniBatchKMeans]
+cluster_list = _LazyClassMap({
+    'sklearn.cluster.KMeans': True,
+    'sklearn.cluster.MiniBatchKMeans': True,
+})
 
 # Classifiers with converters supporting decision_function().
-decision_function_classifiers = (
-    SGDClassifier,
-)
+decision_function_classifiers = _LazyClassMap({
+    'sklearn.linear_model.SGDClassifier': True,
+})
 
 # Outlier detection algorithms:
 # produces two outputs, label and scores
-outlier_list = [OneClassSVM]
-
+outlier_list = _LazyClassMap({
+    'sklearn.svm.OneClassSVM': True,
+})
 
 # Associate scikit-learn types with our operator names. If two
 # scikit-learn models share a single name, it means their are
-# equivalent in terms of conversion.
+# equivalent in terms of conversion. Classes are given by their path
+# so that scikit-learn submodules are only imported when needed,
+# the registration of converters is lazy as well
+# (see operator_converters/__init__.py).
+_sklearn_operator_paths = {
+    'sklearn.ensemble.AdaBoostClassifier': 'SklearnAdaBoostClassifier',
+    'sklearn.ensemble.AdaBoostRegressor': 'SklearnAdaBoostRegressor',
+    'sklearn.ensemble.BaggingClassifier': 'SklearnBaggingClassifier',
+    'sklearn.ensemble.BaggingRegressor': 'SklearnBaggingRegressor',
+    'sklearn.ensemble.ExtraTreesClassifier': 'SklearnExtraTreesClassifier',
+    'sklearn.ensemble.ExtraTreesRegressor': 'SklearnExtraTreesRegressor',
+    'sklearn.ensemble.GradientBoostingClassifier':
+        'SklearnGradientBoostingClassifier',
+    'sklearn.ensemble.GradientBoostingRegressor':
+        'SklearnGradientBoostingRegressor',
+    'sklearn.ensemble.RandomForestClassifier': 'SklearnRandomForestClassifier',
+    'sklearn.ensemble.RandomForestRegressor': 'SklearnRandomForestRegressor',
+    'sklearn.ensemble.VotingClassifier': 'SklearnVotingClassifier',
+    'sklearn.ensemble.VotingRegressor': 'SklearnVotingRegressor',
+    'sklearn.naive_bayes.BernoulliNB': 'SklearnBernoulliNB',
+    'sklearn.naive_bayes.ComplementNB': 'SklearnComplementNB',
+    'sklearn.naive_bayes.GaussianNB': 'SklearnGaussianNB',
+    'sklearn.naive_bayes.MultinomialNB': 'SklearnMultinomialNB',
+    'sklearn.calibration.CalibratedClassifierCV':
+        'SklearnCalibratedClassifierCV',
+    'sklearn.tree.DecisionTreeClassifier': 'SklearnDecisionTreeClassifier',
+    'sklearn.tree.DecisionTreeRegressor': 'SklearnDecisionTreeRegressor',
+    'sklearn.tree.ExtraTreeClassifier': 'SklearnExtraTreeClassifier',
+    'sklearn.tree.ExtraTreeRegressor': 'SklearnExtraTreeRegressor',
+    'sklearn.neighbors.KNeighborsClassifier': 'SklearnKNeighborsClassifier',
+    'sklearn.neighbors.KNeighborsRegressor': 'SklearnKNeighborsRegressor',
+    'sklearn.neighbors.NearestNeighbors': 'SklearnNearestNeighbors',
+    'sklearn.svm.LinearSVC': 'SklearnLinearSVC',
+    'sklearn.svm.LinearSVR': 'SklearnLinearSVR',
+    'sklearn.svm.SVC': 'SklearnSVC',
+    'sklearn.svm.SVR': 'SklearnSVR',
+    'sklearn.svm.OneClassSVM': 'SklearnOneClassSVM',
+    'sklearn.linear_model.RANSACRegressor': 'SklearnRANSACRegressor',
+    'sklearn.linear_model.SGDClassifier': 'SklearnSGDClassifier',
+    'sklearn.neural_network.MLPClassifier': 'SklearnMLPClassifier',
+    'sklearn.neural_network.MLPRegressor': 'SklearnMLPRegressor',
+    'sklearn.multiclass.OneVsRestClassifier': 'SklearnOneVsRestClassifier',
+    'sklearn.cluster.KMeans': 'SklearnKMeans',
+    'sklearn.cluster.MiniBatchKMeans': 'SklearnMiniBatchKMeans',
+    'sklearn.decomposition.PCA': 'SklearnPCA',
+    'sklearn.decomposition.TruncatedSVD': 'SklearnTruncatedSVD',
+    'sklearn.decomposition.IncrementalPCA': 'SklearnIncrementalPCA',
+    'sklearn.feature_extraction.DictVectorizer': 'SklearnDictVectorizer',
+    'sklearn.feature_extraction.text.CountVectorizer':
+        'SklearnCountVectorizer',
+    'sklearn.feature_extraction.text.TfidfVectorizer':
+        'SklearnTfidfVectorizer',
+    'sklearn.feature_extraction.text.TfidfTransformer':
+        'SklearnTfidfTransformer',
+    'sklearn.feature_selection.GenericUnivariateSelect':
+        'SklearnGenericUnivariateSelect',
+    'sklearn.feature_selection.RFE': 'SklearnRFE',
+    'sklearn.feature_selection.RFECV': 'SklearnRFECV',
+    'sklearn.feature_selection.SelectFdr': 'SklearnSelectFdr',
+    'sklearn.feature_selection.SelectFpr': 'SklearnSelectFpr',
+    'sklearn.feature_selection.SelectFromModel': 'SklearnSelectFromModel',
+    'sklearn.feature_selection.SelectFwe': 'SklearnSelectFwe',
+    'sklearn.feature_selection.SelectKBest': 'SklearnSelectKBest',
+    'sklearn.feature_selection.SelectPercentile': 'SklearnSelectPercentile',
+    'sklearn.feature_selection.VarianceThreshold': 'SklearnVarianceThreshold',
+    'sklearn.impute.SimpleImputer': 'SklearnSimpleImputer',
+    'sklearn.preprocessing.Binarizer': 'SklearnBinarizer',
+    'sklearn.preprocessing.MinMaxScaler': 'SklearnMinMaxScaler',
+    'sklearn.preprocessing.MaxAbsScaler': 'SklearnMaxAbsScaler',
+    'sklearn.preprocessing.Normalizer': 'SklearnNormalizer',
+    'sklearn.preprocessing.FunctionTransformer': 'SklearnFunctionTransformer',
+    'sklearn.preprocessing.KBinsDiscretizer': 'SklearnKBinsDiscretizer',
+    'sklearn.preprocessing.PolynomialFeatures': 'SklearnPolynomialFeatures',
+    'sklearn.preprocessing.Imputer': 'SklearnImputer',
+    'sklearn.preprocessing.LabelBinarizer': 'SklearnLabelBinarizer',
+    'sklearn.preprocessing.LabelEncoder': 'SklearnLabelEncoder',
+    'sklearn.preprocessing.RobustScaler': 'SklearnRobustScaler',
+    'sklearn.preprocessing.OneHotEncoder': 'SklearnOneHotEncoder',
+    'sklearn.preprocessing.OrdinalEncoder': 'SklearnOrdinalEncoder',
+    'sklearn.mixture.GaussianMixture': 'SklearnGaussianMixture',
+    'sklearn.mixture.BayesianGaussianMixture':
+        'SklearnBayesianGaussianMixture',
+    'sklearn.gaussian_process.GaussianProcessRegressor':
+        'SklearnGaussianProcessRegressor',
+    'sklearn.discriminant_analysis.LinearDiscriminantAnalysis':
+        'SklearnLinearClassifier',
+    'sklearn.linear_model.ARDRegression': 'SklearnLinearRegressor',
+    'sklearn.linear_model.BayesianRidge': 'SklearnLinearRegressor',
+    'sklearn.linear_model.ElasticNet': 'SklearnLinearRegressor',
+    'sklearn.linear_model.ElasticNetCV': 'SklearnLinearRegressor',
+    'sklearn.linear_model.HuberRegressor': 'SklearnLinearRegressor',
+    'sklearn.linear_model.Lars': 'SklearnLinearRegressor',
+    'sklearn.linear_model.LarsCV': 'SklearnLinearRegressor',
+    'sklearn.linear_model.Lasso': 'SklearnLinearRegressor',
+    'sklearn.linear_model.LassoCV': 'SklearnLinearRegressor',
+    'sklearn.linear_model.LassoLars': 'SklearnLinearRegressor',
+    'sklearn.linear_model.LassoLarsCV': 'SklearnLinearRegressor',
+    'sklearn.linear_model.LassoLarsIC': 'SklearnLinearRegressor',
+    'sklearn.linear_model.LinearRegression': 'SklearnLinearRegressor',
+    'sklearn.linear_model.LogisticRegression': 'SklearnLinearClassifier',
+    'sklearn.linear_model.LogisticRegressionCV': 'SklearnLinearClassifier',
+    'sklearn.linear_model.MultiTaskElasticNet': 'SklearnLinearRegressor',
+    'sklearn.linear_model.MultiTaskElasticNetCV': 'SklearnLinearRegressor',
+    'sklearn.linear_model.MultiTaskLasso': 'SklearnLinearRegressor',
+    'sklearn.linear_model.MultiTaskLassoCV': 'SklearnLinearRegressor',
+    'sklearn.linear_model.OrthogonalMatchingPursuit': 'SklearnLinearRegressor',
+    'sklearn.linear_model.OrthogonalMatchingPursuitCV':
+        'SklearnLinearRegressor',
+    'sklearn.linear_model.PassiveAggressiveClassifier': 'SklearnSGDClassifier',
+    'sklearn.linear_model.PassiveAggressiveRegressor':
+        'SklearnLinearRegressor',
+    'sklearn.linear_model.Perceptron': 'SklearnSGDClassifier',
+    'sklearn.linear_model.Ridge': 'SklearnLinearRegressor',
+    'sklearn.linear_model.RidgeCV': 'SklearnLinearRegressor',
+    'sklearn.linear_model.RidgeClassifier': 'SklearnLinearClassifier',
+    'sklearn.linear_model.RidgeClassifierCV': 'SklearnLinearClassifier',
+    'sklearn.linear_model.SGDRegressor': 'SklearnLinearRegressor',
+    'sklearn.linear_model.TheilSenRegressor': 'SklearnLinearRegressor',
+    'sklearn.model_selection.GridSearchCV': 'SklearnGridSearchCV',
+    'sklearn.preprocessing.StandardScaler': 'SklearnScaler',
+    'sklearn.svm.NuSVC': 'SklearnSVC',
+    'sklearn.svm.NuSVR': 'SklearnSVR',
+}
+
+
 def build_sklearn_operator_name_map():
-    res = {k: "Sklearn" + k.__name__ for k in [
-                AdaBoostClassifier, AdaBoostRegressor,
-                BaggingClassifier, BaggingRegressor,
-                BernoulliNB, ComplementNB, GaussianNB, MultinomialNB,
-                CalibratedClassifierCV,
-                DecisionTreeClassifier, DecisionTreeRegressor,
-                ExtraTreeClassifier, ExtraTreeRegressor,
-                ExtraTreesClassifier, ExtraTreesRegressor,
-                GradientBoostingClassifier, GradientBoostingRegressor,
-                KNeighborsClassifier, KNeighborsRegressor, NearestNeighbors,
-                LinearSVC, LinearSVR, SVC, SVR,
-                LinearRegression, RANSACRegressor,
-                MLPClassifier, MLPRegressor,
-                OneVsRestClassifier,
-                RandomForestClassifier, RandomForestRegressor,
-                SGDClassifier,
-                VotingClassifier, VotingRegressor,
-                KMeans, MiniBatchKMeans,
-                PCA, TruncatedSVD, IncrementalPCA,
-                Binarizer, MinMaxScaler, MaxAbsScaler, Normalizer,
-                CountVectorizer, TfidfVectorizer, TfidfTransformer,
-                FunctionTransformer, KBinsDiscretizer, PolynomialFeatures,
-                Imputer, SimpleImputer, LabelBinarizer, LabelEncoder,
-                RobustScaler, OneHotEncoder, DictVectorizer, OrdinalEncoder,
-                GenericUnivariateSelect, RFE, RFECV, SelectFdr, SelectFpr,
-                SelectFromModel, SelectFwe, SelectKBest, SelectPercentile,
-                VarianceThreshold, GaussianMixture, GaussianProcessRegressor,
-                BayesianGaussianMixture, OneClassSVM
-    ] if k is not None}
-    res.update({
-        ARDRegression: 'SklearnLinearRegressor',
-        BayesianRidge: 'SklearnLinearRegressor',
-        ElasticNet: 'SklearnLinearRegressor',
-        ElasticNetCV: 'SklearnLinearRegressor',
-        GridSearchCV: 'SklearnGridSearchCV',
-        HuberRegressor: 'SklearnLinearRegressor',
-        LinearRegression: 'SklearnLinearRegressor',
-        Lars: 'SklearnLinearRegressor',
-        LarsCV: 'SklearnLinearRegressor',
-        Lasso: 'SklearnLinearRegressor',
-        LassoCV: 'SklearnLinearRegressor',
-        LassoLars: 'SklearnLinearRegressor',
-        LassoLarsCV: 'SklearnLinearRegressor',
-        LassoLarsIC: 'SklearnLinearRegressor',
-        LinearDiscriminantAnalysis: 'SklearnLinearClassifier',
-        LogisticRegression: 'SklearnLinearClassifier',
-        LogisticRegressionCV: 'SklearnLinearClassifier',
-        MultiTaskElasticNet: 'SklearnLinearRegressor',
-        MultiTaskElasticNetCV: 'SklearnLinearRegressor',
-        MultiTaskLasso: 'SklearnLinearRegressor',
-        MultiTaskLassoCV: 'SklearnLinearRegressor',
-        NuSVC: 'SklearnSVC',
-        NuSVR: 'SklearnSVR',
-        OrthogonalMatchingPursuit: 'SklearnLinearRegressor',
-        OrthogonalMatchingPursuitCV: 'SklearnLinearRegressor',
-        PassiveAggressiveClassifier: 'SklearnSGDClassifier',
-        PassiveAggressiveRegressor: 'SklearnLinearRegressor',
-        Perceptron: 'SklearnSGDClassifier',
-        Ridge: 'SklearnLinearRegressor',
-        RidgeCV: 'SklearnLinearRegressor',
-        RidgeClassifier: 'SklearnLinearClassifier',
-        RidgeClassifierCV: 'SklearnLinearClassifier',
-        SGDRegressor: 'SklearnLinearRegressor',
-        StandardScaler: 'SklearnScaler',
-        TheilSenRegressor: 'SklearnLinearRegressor',
-    })
-    return res
+    """
+    Returns a dictionary mapping every supported *scikit-learn*
+    class to the name of its operator. Classes are only imported
+    when the dictionary is enumerated.
+    """
+    return _LazyClassMap(_sklearn_operator_paths)
 
 
 def update_registered_converter(model, alias, shape_fct, convert_fct,
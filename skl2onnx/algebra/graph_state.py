@@ -101,7 +101,7 @@ class GraphState:
                     "sklearn-onnx/issues.".format(
                         cst.dtype))
             self.container.add_initializer(
-                name, ty, shape, cst.astype(astype).flatten(),
+                name, ty, shape, cst.astype(astype, copy=False).ravel(),
                 can_cast=can_cast)
             return name
         elif isinstance(cst, TensorProto):
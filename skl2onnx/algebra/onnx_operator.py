@@ -54,6 +54,20 @@ class OnnxOperatorItem:
         """
         return self.onx_op.outputs[self.index:self.index + 1]
 
+    @property
+    def onnx_prefix_name(self):
+        """
+        Returns the prefix of the node.
+        """
+        return self.onx_op.onnx_prefix_name
+
+    def set_onnx_name_prefix(self, onnx_prefix_name):
+        """
+        Propagates the prefix to the node,
+        see :meth:`OnnxOperator.set_onnx_name_prefix`.
+        """
+        self.onx_op.set_onnx_name_prefix(onnx_prefix_name)
+
 
 class OnnxOperator:
     """
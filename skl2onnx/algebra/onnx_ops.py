@@ -74,6 +74,63 @@ def ClassFactory(class_name, op_name, inputs, outputs,
     return newclass
 
 
+def _get_schemas():
+    """
+    Returns the schemas of every operator *onnx* defines,
+    indexed by operator name for the last version and by
+    ``name + '_' + since_version`` for every version.
+    The result is computed once.
+    """
+    global _schemas
+    if _schemas is None:
+        res = {}
+        for schema in onnx.defs.get_all_schemas_with_history():
+            if schema.support_level == schema.SupportType.EXPERIMENTAL:
+                # Skips experimental operators.
+                continue
+            # Multiple version can coexist. The last one is kept.
+            if schema.name in res:
+                if schema.since_version > res[schema.name].since_version:
+                    # We keep the most recent one.
+                    res[schema.name] = schema
+            else:
+                res[schema.name] = schema
+            res[schema.name + '_' + str(schema.since_version)] = schema
+        _schemas = res
+    return _schemas
+
+
+_schemas = None
+
+
+def _create_class(name, schema):
+    """
+    Creates the class for operator *name* (``'Add'`` or ``'Add_7'``).
+    """
+    def _c(obj, label, i):
+        name = '%s%d' % (obj.name or label, i)
+        tys = obj.typeStr or ''
+        return (name, tys)
+
+    doc = get_rst_doc(schema)
+    inputs = [_c(o, 'I', i) for i, o in enumerate(schema.inputs)]
+    outputs = [_c(o, 'O', i) for i, o in enumerate(schema.outputs)]
+    args = [p for p in schema.attributes]
+
+    if '_' in name:
+        class_name = "Onnx" + name
+    else:
+        class_name = "Onnx" + schema.name
+
+    return ClassFactory(class_name, schema.name, inputs, outputs,
+                        [schema.min_input, schema.max_input],
+                        [schema.min_output, schema.max_output],
+                        schema.domain, args,
+                        "**Version**" + doc.split('**Version**')[-1],
+                        getattr(schema, 'deprecated', False),
+                        schema.since_version, {})
+
+
 def dynamic_class_creation():
     """
     Automatically generates classes for each of the operators
@@ -84,46 +141,11 @@ def dynamic_class_creation():
     <https://github.com/onnx/onnx/blob/master/docs/
     Operators-ml.md>`_.
     """
-    res = {}
-    for schema in onnx.defs.get_all_schemas_with_history():
-        if schema.support_level == schema.SupportType.EXPERIMENTAL:
-            # Skips experimental operators.
-            continue
-        # Multiple version can coexist. The last one is kept.
-        if schema.name in res:
-            if schema.since_version > res[schema.name].since_version:
-                # We keep the most recent one.
-                res[schema.name] = schema
-        else:
-            res[schema.name] = schema
-        res[schema.name + '_' + str(schema.since_version)] = schema
+    res = _get_schemas()
     cls = {}
-
-    def _c(obj, label, i):
-        name = '%s%d' % (obj.name or label, i)
-        tys = obj.typeStr or ''
-        return (name, tys)
-
     for name in sorted(res):
-        schema = res[name]
-        doc = get_rst_doc(schema)
-        inputs = [_c(o, 'I', i) for i, o in enumerate(schema.inputs)]
-        outputs = [_c(o, 'O', i) for i, o in enumerate(schema.outputs)]
-        args = [p for p in schema.attributes]
-
-        if '_' in name:
-            class_name = "Onnx" + name
-        else:
-            class_name = "Onnx" + schema.name
-
-        cl = ClassFactory(class_name, schema.name, inputs, outputs,
-                          [schema.min_input, schema.max_input],
-                          [schema.min_output, schema.max_output],
-                          schema.domain, args,
-                          "**Version**" + doc.split('**Version**')[-1],
-                          getattr(schema, 'deprecated', False),
-                          schema.since_version, {})
-        cls[class_name] = cl
+        cl = _create_class(name, res[name])
+        cls[cl.__name__] = cl
 
     # Retrieves past classes.
     for name in cls:
@@ -147,4 +169,34 @@ def _update_module():
         setattr(this, k, v)
 
 
-_update_module()
+def __getattr__(name):
+    """
+    Creates class *name* the first time it is requested
+    (`PEP 562 <https://www.python.org/dev/peps/pep-0562/>`_).
+    The class of the last version of an operator and the classes
+    of its previous versions are created together.
+    """
+    res = _get_schemas()
+    if not name.startswith('Onnx') or name[4:] not in res:
+        raise AttributeError("module '{}' has no attribute '{}'".format(
+            __name__, name))
+    main = name[4:].split('_')[0]
+    last = _create_class(main, res[main])
+    this = sys.modules[__name__]
+    setattr(this, last.__name__, last)
+    prefix = main + '_'
+    for key in res:
+        if key.startswith(prefix):
+            cl = _create_class(key, res[key])
+            last.past_version[cl.__name__] = cl
+            setattr(this, cl.__name__, cl)
+    return getattr(this, name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set('Onnx' + k for k in _get_schemas()))
+
+
+if sys.version_info[:2] < (3, 7):
+    # module __getattr__ is not available
+    _update_module()
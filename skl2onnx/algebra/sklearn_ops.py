@@ -29,14 +29,14 @@ def dynamic_class_creation_sklearn():
     """
     Automatically generates classes for each of the converter.
     """
-    from ..common._registration import _shape_calculator_pool, _converter_pool
+    from ..common._registration import get_converter, get_shape_calculator
     from .._supported_operators import sklearn_operator_name_map
 
     cls = {}
 
     for skl_obj, name in sklearn_operator_name_map.items():
-        conv = _converter_pool[name]
-        shape_calc = _shape_calculator_pool[name]
+        conv = get_converter(name)
+        shape_calc = get_shape_calculator(name)
         skl_name = skl_obj.__name__
         doc = ["OnnxOperatorMixin for **{}**".format(skl_name), ""]
         if conv.__doc__:
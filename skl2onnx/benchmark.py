@@ -0,0 +1,241 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Measures the latency and the throughput of a model with
+*scikit-learn* and with *onnxruntime* once converted.
+
+::
+
+    python -m skl2onnx.benchmark model.pkl data.npy --output results.csv
+
+The model is a pickled fitted estimator or pipeline, the data
+is a *.npy* or a *.csv* file (without header) of numerical
+features, its rows are repeated to build the largest batches.
+"""
+import argparse
+import csv
+import json
+import pickle
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from .convert import to_onnx
+
+
+#: Default batch sizes.
+BATCH_SIZES = (1, 10, 100, 1000, 10000, 100000)
+
+_columns = ['runtime', 'method', 'batch_size', 'threads', 'n_runs',
+            'mean', 'p50', 'p99', 'rows_per_sec']
+
+
+def _make_batch(X, batch_size):
+    if batch_size <= X.shape[0]:
+        return X[:batch_size]
+    # rows are repeated to reach the batch size
+    return X[np.arange(batch_size) % X.shape[0]]
+
+
+def _measure(fct, X, repeat, max_time):
+    """
+    Calls *fct(X)* at most *repeat* times or until the cumulated
+    time exceeds *max_time*, returns the latencies of every call.
+    """
+    # the first call may initialize caches
+    fct(X)
+    times = []
+    total = 0.
+    while len(times) < repeat and (not times or total < max_time):
+        begin = perf_counter()
+        fct(X)
+        times.append(perf_counter() - begin)
+        total += times[-1]
+    return np.array(times)
+
+
+def _row(runtime, method, batch_size, threads, times):
+    p50 = float(np.percentile(times, 50))
+    return dict(runtime=runtime, method=method, batch_size=batch_size,
+                threads=threads, n_runs=len(times),
+                mean=float(times.mean()), p50=p50,
+                p99=float(np.percentile(times, 99)),
+                rows_per_sec=batch_size / p50 if p50 > 0 else float('inf'))
+
+
+def _sklearn_method(model):
+    for method in ['predict', 'transform']:
+        if hasattr(model, method):
+            return method
+    raise TypeError(
+        "Model '{}' has no method predict or transform.".format(
+            model.__class__.__name__))
+
+
+def _onnx_input(sess, X):
+    inputs = sess.get_inputs()
+    if len(inputs) != 1:
+        raise NotImplementedError(
+            "The benchmark only supports models with one input "
+            "not {}.".format(len(inputs)))
+    dtypes = {'tensor(float)': np.float32, 'tensor(double)': np.float64,
+              'tensor(int64)': np.int64, 'tensor(string)': np.str_}
+    dtype = dtypes.get(inputs[0].type, None)
+    if dtype is not None and X.dtype != dtype:
+        X = X.astype(dtype)
+    return inputs[0].name, X
+
+
+def benchmark_model(model, X, batch_sizes=BATCH_SIZES, threads=(1, ),
+                    repeat=100, max_time=5.,
+                    runtimes=('sklearn', 'onnxruntime'), onx=None,
+                    target_opset=None, options=None, verbose=False):
+    """
+    Measures the latency of a fitted model with *scikit-learn*
+    and *onnxruntime* for every batch size and every number of threads.
+
+    :param model: fitted estimator or pipeline
+    :param X: numpy array, rows are repeated if a batch size is greater
+        than the number of rows
+    :param batch_sizes: batch sizes to measure
+    :param threads: numbers of threads *onnxruntime* may use,
+        *scikit-learn* is limited to the same number of threads
+        if *threadpoolctl* is installed, otherwise it is
+        measured once with the default number of threads
+    :param repeat: maximum number of calls for every configuration
+    :param max_time: the calls stop once their cumulated time
+        exceeds *max_time* seconds (at least one call is measured)
+    :param runtimes: runtimes to measure
+    :param onx: converted model, the model is converted with
+        :func:`to_onnx` if not specified
+    :param target_opset: see :func:`to_onnx`
+    :param options: see :func:`to_onnx`
+    :param verbose: prints every result
+    :return: list of dictionaries, one per configuration,
+        *mean*, *p50*, *p99* are the average latency, the median
+        and the 99th percentile in seconds, *rows_per_sec* is the
+        batch size divided by the median latency
+
+    *scikit-learn* calls method *predict* or *transform* with *X*,
+    *onnxruntime* only computes the first output of the graph,
+    the labels of a classifier, *X* is cast into the type of
+    the input before the measures.
+    """
+    X = np.asarray(X)
+    res = []
+
+    def add(row):
+        res.append(row)
+        if verbose:
+            print(row)
+
+    if 'sklearn' in runtimes:
+        method = _sklearn_method(model)
+        fct = getattr(model, method)
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            threadpool_limits = None
+        for batch_size in batch_sizes:
+            batch = _make_batch(X, batch_size)
+            if threadpool_limits is None:
+                add(_row('sklearn', method, batch_size, None,
+                         _measure(fct, batch, repeat, max_time)))
+                continue
+            for nth in threads:
+                with threadpool_limits(limits=nth):
+                    times = _measure(fct, batch, repeat, max_time)
+                add(_row('sklearn', method, batch_size, nth, times))
+
+    if 'onnxruntime' in runtimes:
+        from onnxruntime import InferenceSession, SessionOptions
+        if onx is None:
+            onx = to_onnx(model, X.astype(np.float32)
+                          if X.dtype == np.float64 else X,
+                          target_opset=target_opset, options=options)
+        content = onx.SerializeToString()
+        for nth in threads:
+            so = SessionOptions()
+            so.intra_op_num_threads = nth
+            sess = InferenceSession(content, so)
+            name, XO = _onnx_input(sess, X)
+            output = sess.get_outputs()[0].name
+
+            def fct(batch, sess=sess, name=name, output=output):
+                return sess.run([output], {name: batch})
+
+            for batch_size in batch_sizes:
+                batch = _make_batch(XO, batch_size)
+                add(_row('onnxruntime', 'run', batch_size, nth,
+                         _measure(fct, batch, repeat, max_time)))
+    return res
+
+
+def save_results(results, filename):
+    """
+    Saves the results of :func:`benchmark_model` into
+    a *.json* or a *.csv* file depending on the extension.
+    """
+    if filename.endswith('.json'):
+        with open(filename, 'w') as f:
+            json.dump(results, f, indent=1)
+    elif filename.endswith('.csv'):
+        with open(filename, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=_columns)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        raise ValueError(
+            "Unable to guess the format of '{}', the extension must be "
+            ".json or .csv.".format(filename))
+
+
+def _load_data(filename):
+    if filename.endswith('.npy'):
+        return np.load(filename)
+    return np.loadtxt(filename, delimiter=',', ndmin=2)
+
+
+def main(args=None):
+    """
+    Command line, see ``python -m skl2onnx.benchmark --help``.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m skl2onnx.benchmark",
+        description="Measures the latency of a model with scikit-learn "
+                    "and onnxruntime.")
+    parser.add_argument('model', help="pickled fitted model")
+    parser.add_argument('data', help=".npy or .csv file")
+    parser.add_argument('--batch-sizes', type=int, nargs='+',
+                        default=list(BATCH_SIZES))
+    parser.add_argument('--threads', type=int, nargs='+', default=[1])
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--max-time', type=float, default=5.)
+    parser.add_argument('--target-opset', type=int, default=None)
+    parser.add_argument('--output', default=None,
+                        help=".json or .csv file")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(args)
+
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    X = _load_data(args.data)
+    results = benchmark_model(
+        model, X, batch_sizes=args.batch_sizes, threads=args.threads,
+        repeat=args.repeat, max_time=args.max_time,
+        target_opset=args.target_opset, verbose=args.verbose)
+    if args.output:
+        save_results(results, args.output)
+    else:
+        writer = csv.DictWriter(sys.stdout, fieldnames=_columns)
+        writer.writeheader()
+        writer.writerows(results)
+    return results
+
+
+if __name__ == '__main__':
+    main()
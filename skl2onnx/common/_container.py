@@ -4,14 +4,19 @@
 # license information.
 # --------------------------------------------------------------------------
 
-import inspect
-import re
 import six
 import sys
 import traceback
-import warnings
 import numpy as np
 from onnx import onnx_pb as onnx_proto
+try:
+    from onnx.helper import tensor_dtype_to_np_dtype
+except ImportError:
+    # onnx < 1.13
+    from onnx.mapping import TENSOR_TYPE_TO_NP_TYPE
+
+    def tensor_dtype_to_np_dtype(tensor_dtype):
+        return TENSOR_TYPE_TO_NP_TYPE[tensor_dtype]
 from onnxconverter_common.onnx_ops import __dict__ as dict_apply_operation
 from ..proto import TensorProto
 from ..proto.onnx_helper_modified import (
@@ -21,33 +26,94 @@ from .interface import ModelContainer
 from .utils import get_domain
 
 
+# Maps every ONNX operator added by one function *apply_** of
+# *onnxconverter_common* to the name of this function. The table
+# replaces a parsing of the source of these functions at import time.
+_apply_operation_names = {
+    'Abs': 'apply_abs',
+    'Add': 'apply_add',
+    'Affine': 'apply_affine',
+    'ArgMax': 'apply_argmax',
+    'ArgMin': 'apply_argmin',
+    'BatchNormalization': 'apply_batch_norm',
+    'Cast': 'apply_cast',
+    'Clip': 'apply_clip',
+    'Concat': 'apply_concat',
+    'Constant': 'apply_constant',
+    'ConstantOfShape': 'apply_constant_of_shape',
+    'Conv': 'apply_conv',
+    'Crop': 'apply_crop_height_width',
+    'Div': 'apply_div',
+    'Elu': 'apply_elu',
+    'Equal': 'apply_equal',
+    'Exp': 'apply_exp',
+    'Flatten': 'apply_flatten',
+    'Floor': 'apply_floor',
+    'GRU': 'apply_gru',
+    'Gather': 'apply_gather',
+    'Gemm': 'apply_gemm',
+    'Greater': 'apply_greater',
+    'HardSigmoid': 'apply_hard_sigmoid',
+    'Identity': 'apply_identity',
+    'InstanceNormalization': 'apply_instance_norm',
+    'Inverse': 'apply_inverse',
+    'LSTM': 'apply_lstm',
+    'LeakyRelu': 'apply_leaky_relu',
+    'Less': 'apply_less',
+    'Log': 'apply_log',
+    'LpNormalization': 'apply_normalization',
+    'MatMul': 'apply_matmul',
+    'Max': 'apply_max',
+    'Mean': 'apply_mean',
+    'Min': 'apply_min',
+    'Mul': 'apply_mul',
+    'Neg': 'apply_neg',
+    'Not': 'apply_not',
+    'PRelu': 'apply_prelu',
+    'Pad': 'apply_pad',
+    'ParametricSoftplus': 'apply_parametric_softplus',
+    'Pow': 'apply_pow',
+    'RNN': 'apply_rnn',
+    'Range': 'apply_range',
+    'Reciprocal': 'apply_reciprocal',
+    'ReduceSum': 'apply_reducesum',
+    'Relu': 'apply_relu',
+    'Reshape': 'apply_reshape',
+    'Resize': 'apply_resize',
+    'ScaledTanh': 'apply_scaled_tanh',
+    'Selu': 'apply_selu',
+    'Shape': 'apply_shape',
+    'Sigmoid': 'apply_sigmoid',
+    'Slice': 'apply_slice',
+    'Softmax': 'apply_softmax',
+    'Softsign': 'apply_softsign',
+    'Split': 'apply_split',
+    'Sqrt': 'apply_sqrt',
+    'Squeeze': 'apply_squeeze',
+    'Sub': 'apply_sub',
+    'Sum': 'apply_sum',
+    'Tanh': 'apply_tanh',
+    'ThresholdedRelu': 'apply_thresholded_relu',
+    'Tile': 'apply_tile',
+    'TopK': 'apply_topk',
+    'Transpose': 'apply_transpose',
+    'Unsqueeze': 'apply_unsqueeze',
+    'Upsample': 'apply_upsample',
+}
+
+
 def _get_operation_list():
     """
-    Investigates this module to extract all ONNX functions
-    which needs to be converted with these functions.
+    Returns a dictionary mapping every ONNX operator of
+    *_apply_operation_names* to its function *apply_**.
+    Functions missing in the installed version of
+    *onnxconverter_common* are skipped.
     """
-    regs = [re.compile("container.add_node[(]'([A-Z][a-zA-Z0-9]*)', "
-                       "\\[?input_name"),
-            re.compile("container.add_node[(]'([A-Z][a-zA-Z0-9]*)', "
-                       "\\[\\]"),
-            re.compile("container.add_node[(]'([A-Z][a-zA-Z0-9]*)', "
-                       "inputs"),
-            re.compile("scope, '([A-Z][a-zA-Z0-9]*)', \\[?input_name"),
-            re.compile("op_type = '([A-Z][a-zA-Z0-9]*)'")]
     res = {}
-    for k, v in dict_apply_operation.items():
-        if k.startswith("apply_") and callable(v):
-            found = None
-            source = inspect.getsource(v)
-            for reg in regs:
-                g = reg.search(source)
-                if g:
-                    found = g.groups()[0]
-                    break
-            if found is None:
-                warnings.warn("Unable to find an ONNX name in function "
-                              "'{0}', source=\n{1}".format(k, source))
-            res[found] = v
+    for op_type, name in _apply_operation_names.items():
+        fct = dict_apply_operation.get(name, None)
+        if callable(fct):
+            res[op_type] = fct
     return res
 
 
@@ -144,6 +210,57 @@ class SklearnModelContainerNode(RawModelContainerNode):
             self._outputs.append(variable)
 
 
+# Size in bytes of one element of every ONNX type *_make_raw_tensor*
+# may store in field *raw_data*, types the installed onnx does not
+# define are skipped.
+_onnx_element_sizes = {
+    getattr(TensorProto, name): size for name, size in [
+        ('FLOAT', 4), ('DOUBLE', 8), ('FLOAT16', 2), ('BFLOAT16', 2),
+        ('FLOAT8E4M3FN', 1), ('FLOAT8E4M3FNUZ', 1), ('FLOAT8E5M2', 1),
+        ('FLOAT8E5M2FNUZ', 1), ('BOOL', 1), ('INT8', 1), ('INT16', 2),
+        ('INT32', 4), ('INT64', 8), ('UINT8', 1), ('UINT16', 2),
+        ('UINT32', 4), ('UINT64', 8)]
+    if hasattr(TensorProto, name)}
+
+
+def _make_raw_tensor(name, onnx_type, shape, content):
+    """
+    Creates a *TensorProto* storing *content* in field *raw_data*.
+    Returns None if *content* is not a numerical array
+    whose size matches *shape* or if numpy has no type with the
+    size of an element of *onnx_type* (*BFLOAT16*, *FLOAT8...*).
+    Raises an exception if *content* has decimals and the tensor
+    stores integers.
+    """
+    if not isinstance(content, np.ndarray) or content.dtype.kind not in 'biuf':
+        return None
+    try:
+        np_type = np.dtype(tensor_dtype_to_np_dtype(onnx_type))
+    except KeyError:
+        return None
+    if np_type.kind not in 'biuf':
+        return None
+    # recent versions of onnx map BFLOAT16 and FLOAT8 types to float32
+    if _onnx_element_sizes.get(onnx_type, None) != np_type.itemsize:
+        return None
+    if content.size != int(np.prod(shape, dtype=np.int64)):
+        return None
+    if (content.dtype.kind == 'f' and np_type.kind in 'biu' and
+            not np.all(np.mod(content, 1) == 0)):
+        raise ValueError(
+            "Initializer '{}' stores integers ({}), its values cannot "
+            "be truncated.".format(name, np_type))
+    # ONNX stores raw data in little endian order
+    content = np.ascontiguousarray(
+        content, dtype=np_type.newbyteorder('<'))
+    tensor = TensorProto()
+    tensor.name = name
+    tensor.data_type = onnx_type
+    tensor.dims.extend(shape)
+    tensor.raw_data = content.tobytes()
+    return tensor
+
+
 class ModelComponentContainer(ModelContainer):
     """
     In the conversion phase, this class is used to collect all materials
@@ -151,6 +268,13 @@ class ModelComponentContainer(ModelContainer):
     *ONNX* *ModelProto*.
     """
 
+    #: If True, method *add_node* checks that every operator
+    #: defined in :mod:`skl2onnx.common._apply_operation` is added
+    #: with the corresponding function. The check looks into the call
+    #: stack for every added node and slows down the conversion,
+    #: it is only meant to debug converters.
+    check_operators = False
+
     def __init__(self, target_opset, options=None, dtype=None):
         """
         :param target_opset: number, for example, 7 for *ONNX 1.2*, and
@@ -174,6 +298,9 @@ class ModelComponentContainer(ModelContainer):
         # ONNX nodes (type: NodeProto) used to define computation
         # structure
         self.nodes = []
+        # Names of the nodes in self.nodes, it avoids building
+        # the set of existing names every time a node is added.
+        self.node_names = set()
         # ONNX operators' domain-version pair set. They will be added
         # into opset_import field in the final ONNX model.
         self.node_domain_version_pair_sets = set()
@@ -266,6 +393,9 @@ class ModelComponentContainer(ModelContainer):
         :param can_cast: the method can take the responsability
             to cast the constant
         :return: created tensor
+
+        A numerical *numpy* array is directly copied into field
+        *raw_data* instead of being converted into a list first.
         """
         if (can_cast and isinstance(content, np.ndarray) and
                 onnx_type in (TensorProto.FLOAT, TensorProto.DOUBLE) and
@@ -284,7 +414,9 @@ class ModelComponentContainer(ModelContainer):
         else:
             if any(d is None for d in shape):
                 raise ValueError('Shape of initializer cannot contain None')
-            tensor = make_tensor(name, onnx_type, shape, content)
+            tensor = _make_raw_tensor(name, onnx_type, shape, content)
+            if tensor is None:
+                tensor = make_tensor(name, onnx_type, shape, content)
         self.initializers.append(tensor)
         return tensor
 
@@ -296,7 +428,8 @@ class ModelComponentContainer(ModelContainer):
         Checks that if *op_type* is one of the operators defined in
         :mod:`skl2onnx.common._apply_container`, then it was called
         from a function defined in this submodule by looking
-        into the callstack. The test is enabled for *python >= 3.6*.
+        into the callstack. The test is enabled for *python >= 3.6*
+        and only if attribute *check_operators* is True.
         """
         if (op_type in _apply_operation_specific and
                 sys.version_info[:2] >= (3, 6)):
@@ -315,6 +448,22 @@ class ModelComponentContainer(ModelContainer):
                     "'{1}' in submodule _apply_operation.".format(
                         op_type, fct.__name__))
 
+    def _get_unique_node_name(self, name):
+        """
+        Returns a node name not used by any node already added.
+        Names are generated from the number of nodes if *name* is empty.
+        """
+        n_nodes = len(self.nodes)
+        if name is None or not isinstance(
+                name, str) or name == '':
+            name = "N%d" % n_nodes
+        if name in self.node_names:
+            name += "-N%d" % n_nodes
+            while name in self.node_names:
+                n_nodes += 1
+                name += "-N%d" % n_nodes
+        return name
+
     def add_node(self, op_type, inputs, outputs, op_domain='', op_version=1,
                  name=None, **attrs):
         """
@@ -337,16 +486,12 @@ class ModelComponentContainer(ModelContainer):
                       attributes' names and attributes' values,
                       respectively.
         """
-        if name is None or not isinstance(
-                name, str) or name == '':
-            name = "N%d" % len(self.nodes)
-        existing_names = set(n.name for n in self.nodes)
-        if name in existing_names:
-            name += "-N%d" % len(self.nodes)
+        name = self._get_unique_node_name(name)
 
         if op_domain is None:
             op_domain = get_domain()
-        self._check_operator(op_type)
+        if self.check_operators:
+            self._check_operator(op_type)
 
         if isinstance(inputs, (six.string_types, six.text_type)):
             inputs = [inputs]
@@ -385,6 +530,7 @@ class ModelComponentContainer(ModelContainer):
 
         self.node_domain_version_pair_sets.add((op_domain, op_version))
         self.nodes.append(node)
+        self.node_names.add(name)
         if (self.target_opset is not None and
                 op_version is not None and
                 op_version > self.target_opset):
@@ -0,0 +1,579 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Converts the operators of a topology in parallel
+or with fragments cached by a previous conversion.
+
+Every converter receives a :class:`_BranchScope` and a
+:class:`_BranchContainer`. The scope returns placeholders instead of
+names and logs every request. Once all converters of a batch are done,
+the branches are merged one after another in the order a serial
+conversion would have followed. The logged requests are replayed on the
+real scope to get the final names and the placeholders are replaced
+in every node and initializer. The merged model is the same as
+the one a serial conversion produces. A fragment is the result of
+a converter given an operator whose inputs and outputs are placeholders
+as well, it can be merged in any other conversion of the same operator.
+
+Converters only run in parallel on Linux, in processes forked once
+at the beginning of the conversion. Operators declared later by
+a converter are pickled and sent to the processes, the objects
+the processes already have are replaced by references. Forking is
+unsafe on macOS and is not available on Windows, threads would not
+run converters in parallel either because of the GIL, operators are
+converted one after another on these systems.
+"""
+import copy
+import io
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import sys
+from contextlib import contextmanager
+from types import ModuleType
+from onnx import AttributeProto, GraphProto, helper
+from ._container import ModelComponentContainer, _build_options
+from ._topology import Scope, _get_converter
+
+_placeholder = re.compile('\x01[io]?[0-9]+\x02')
+_placeholder_bytes = re.compile(b'\x01[io]?[0-9]+\x02')
+
+# Conversions using a pool of forked processes, the processes
+# find them here, (key, value) = (id(operators),
+# (topology, container, operators, objects, fragment))
+_conversions = {}
+
+
+class _BranchError(RuntimeError):
+    """
+    Raised by a converter which cannot be run in a branch,
+    the operator is then converted by *_merge_branch*.
+    """
+    pass
+
+
+class _BranchScope(Scope):
+    """
+    Scope given to a converter running in parallel with others.
+    Method *get_unique_variable_name* and *get_unique_operator_name*
+    return placeholders, the requests are stored in *requests*.
+    """
+
+    def __init__(self, scope):
+        Scope.__init__(
+            self, scope.name, scope.parent_scopes,
+            target_opset=scope.target_opset,
+            custom_shape_calculators=scope.custom_shape_calculators,
+            options=scope.options, dtype=scope.dtype)
+        self.requests = []
+
+    def _get_placeholder(self, kind, seed):
+        placeholder = '\x01%d\x02' % len(self.requests)
+        self.requests.append((kind, seed, placeholder))
+        return placeholder
+
+    def get_unique_variable_name(self, seed):
+        return self._get_placeholder('variable', seed)
+
+    def get_unique_operator_name(self, seed):
+        return self._get_placeholder('operator', seed)
+
+    def declare_local_variable(self, raw_name, type=None, prepend=False):
+        variable = Scope.declare_local_variable(
+            self, raw_name, type=type, prepend=prepend)
+        self.requests.append(('declare_variable', variable, prepend))
+        return variable
+
+    def declare_local_operator(self, type, raw_model=None):
+        operator = Scope.declare_local_operator(
+            self, type, raw_model=raw_model)
+        self.requests.append(('declare_operator', operator, None))
+        return operator
+
+    def delete_local_operator(self, onnx_name):
+        raise _BranchError(
+            "An operator cannot be removed by a parallel conversion.")
+
+    def delete_local_variable(self, onnx_name):
+        raise _BranchError(
+            "A variable cannot be removed by a parallel conversion.")
+
+
+class _BranchContainer(ModelComponentContainer):
+    """
+    Container given to a converter running in parallel with others.
+    It keeps the arguments the final node names depend on.
+    """
+
+    def __init__(self, container):
+        ModelComponentContainer.__init__(
+            self, container.target_opset, options=container.options,
+            dtype=container.dtype)
+        self.check_operators = container.check_operators
+        # (requested name, domain, version) for every node
+        self.node_log = []
+
+    def add_node(self, op_type, inputs, outputs, op_domain='', op_version=1,
+                 name=None, **attrs):
+        ModelComponentContainer.add_node(
+            self, op_type, inputs, outputs, op_domain=op_domain,
+            op_version=op_version, name=name, **attrs)
+        self.node_log.append((name, self.nodes[-1].domain, op_version))
+
+
+def _convert_branch(topology, container, operator, fragment=False):
+    """
+    Converts one operator, returns the requests of the scope and
+    the content of the container or None if the converter cannot
+    run in a branch. The operator is then converted again by
+    *_merge_branch*. Any other exception is raised.
+    If *fragment* is True, the converter first receives a copy of
+    the operator whose inputs and outputs are placeholders too.
+    The result does not depend on the other operators and can be
+    cached unless the converter declares new operators, the operator
+    is then converted again as if *fragment* were False.
+    """
+    if fragment:
+        shadow = copy.copy(operator)
+        shadow.inputs = [_shadow_variable(var, 'i', i)
+                         for i, var in enumerate(operator.inputs)]
+        shadow.outputs = [_shadow_variable(var, 'o', i)
+                          for i, var in enumerate(operator.outputs)]
+        result = _convert_branch(topology, container, shadow)
+        if result is None:
+            return None
+        if not any(req[0].startswith('declare') for req in result[0]):
+            return result[:-1] + (True, )
+    try:
+        scope = _BranchScope(topology.scope_map[operator.scope])
+        branch = _BranchContainer(container)
+        conv = _get_converter(topology, operator)
+        conv(scope, operator, branch)
+    except _BranchError:
+        return None
+    return (scope.requests, branch.nodes, branch.node_log,
+            branch.initializers, branch.value_info,
+            branch.inputs, branch.outputs, False)
+
+
+def _shadow_variable(variable, prefix, index):
+    shadow = copy.copy(variable)
+    shadow.onnx_name = '\x01%s%d\x02' % (prefix, index)
+    return shadow
+
+
+def _replace_in_node(node, replace, replace_bytes):
+    """
+    Replaces the placeholders in the inputs, outputs and attributes
+    of *node*, including the subgraphs of operators such as *Scan*.
+    """
+    for i, text in enumerate(node.input):
+        node.input[i] = replace(text)
+    for i, text in enumerate(node.output):
+        node.output[i] = replace(text)
+    for att in node.attribute:
+        if att.type == AttributeProto.STRING:
+            att.s = replace_bytes(att.s)
+        elif (att.type == AttributeProto.STRINGS and
+                b'\x01' in b''.join(att.strings)):
+            for i, text in enumerate(att.strings):
+                att.strings[i] = replace_bytes(text)
+        elif att.type == AttributeProto.GRAPH:
+            _replace_in_graph(att.g, replace, replace_bytes)
+        elif att.type == AttributeProto.GRAPHS:
+            for graph in att.graphs:
+                _replace_in_graph(graph, replace, replace_bytes)
+
+
+def _replace_in_graph(graph, replace, replace_bytes):
+    "Replaces the placeholders in a subgraph."
+    graph.name = replace(graph.name)
+    for node in graph.node:
+        node.name = replace(node.name)
+        _replace_in_node(node, replace, replace_bytes)
+    for protos in [graph.input, graph.output, graph.value_info,
+                   graph.initializer]:
+        for proto in protos:
+            proto.name = replace(proto.name)
+
+
+def _merge_branch(topology, container, operator, result):
+    """
+    Adds the result of *_convert_branch* to *container*.
+    """
+    scope = topology.scope_map[operator.scope]
+    if result is None:
+        conv = _get_converter(topology, operator)
+        conv(scope, operator, container)
+        return
+
+    (requests, nodes, node_log, initializers, value_info, inputs, outputs,
+     fragment) = result
+    names = {}
+    if fragment:
+        for prefix, variables in [('i', operator.inputs),
+                                  ('o', operator.outputs)]:
+            for i, var in enumerate(variables):
+                names['\x01%s%d\x02' % (prefix, i)] = var.full_name
+
+    def replace(text):
+        if isinstance(text, str) and '\x01' in text:
+            return _placeholder.sub(lambda m: names[m.group(0)], text)
+        return text
+
+    def replace_bytes(text):
+        if b'\x01' in text:
+            return _placeholder_bytes.sub(
+                lambda m: names[m.group(0).decode()].encode('utf-8'), text)
+        return text
+
+    # Names are allocated in the same order as a serial conversion.
+    for kind, seed, value in requests:
+        if kind == 'variable':
+            names[value] = scope.get_unique_variable_name(replace(seed))
+        elif kind == 'operator':
+            names[value] = scope.get_unique_operator_name(replace(seed))
+        elif kind == 'declare_variable':
+            seed.onnx_name = names[seed.onnx_name]
+            seed.raw_name = replace(seed.raw_name)
+            scope._register_variable(seed, prepend=value)
+        else:
+            seed.onnx_name = names[seed.onnx_name]
+            scope._register_operator(seed)
+
+    for node, (name, domain, version) in zip(nodes, node_log):
+        _replace_in_node(node, replace, replace_bytes)
+        node.name = container._get_unique_node_name(replace(name))
+        container.node_domain_version_pair_sets.add((domain, version))
+        container.nodes.append(node)
+        container.node_names.add(node.name)
+
+    for protos, added in [(container.initializers, initializers),
+                          (container.value_info, value_info),
+                          (container.inputs, inputs),
+                          (container.outputs, outputs)]:
+        for proto in added:
+            proto.name = replace(proto.name)
+            protos.append(proto)
+
+
+def _reachable_objects(operators, variables, known=None):
+    """
+    Returns the objects a forked process must not copy when
+    it sends back its results, (key, value) = (id(obj), obj).
+    It includes *operators*, *variables* and every estimator
+    converters may give to the operators they declare,
+    objects in *known* are skipped.
+    """
+    known = {} if known is None else known
+    objects = {}
+    stack = []
+    for operator in operators:
+        if id(operator) not in known:
+            objects[id(operator)] = operator
+            stack.append(operator.raw_operator)
+    for variable in variables:
+        if id(variable) not in known:
+            objects[id(variable)] = variable
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif (hasattr(obj, '__dict__') and id(obj) not in objects and
+                id(obj) not in known and
+                not isinstance(obj, (type, ModuleType))):
+            objects[id(obj)] = obj
+            stack.extend(obj.__dict__.values())
+    return objects
+
+
+def _shared_objects(topology):
+    """
+    Returns the objects of *topology* a forked process
+    shares with this one (see *_reachable_objects*).
+    """
+    return _reachable_objects(topology.unordered_operator_iterator(),
+                              topology.unordered_variable_iterator())
+
+
+class _Pickler(pickle.Pickler):
+    """
+    Replaces the objects of *objects* by their id and the objects
+    of *extra* by the associated value, (key, value) = (id(obj), pid).
+    """
+
+    def __init__(self, file, objects, extra=None):
+        pickle.Pickler.__init__(self, file, pickle.HIGHEST_PROTOCOL)
+        self.objects = objects
+        self.extra = {} if extra is None else extra
+
+    def persistent_id(self, obj):
+        pid = self.extra.get(id(obj), None)
+        if pid is not None:
+            return pid
+        return id(obj) if id(obj) in self.objects else None
+
+
+class _Unpickler(pickle.Unpickler):
+    """
+    Restores the objects replaced by *_Pickler*, *objects* and *extra*
+    map a pid to an object.
+    """
+
+    def __init__(self, file, objects, extra=None):
+        pickle.Unpickler.__init__(self, file)
+        self.objects = objects
+        self.extra = {} if extra is None else extra
+
+    def persistent_load(self, pid):
+        if pid in self.extra:
+            return self.extra[pid]
+        return self.objects[pid]
+
+
+def _pickle_operator(operator, objects):
+    """
+    Pickles an operator declared by a converter after the processes
+    were forked, the objects they share are not copied. Returns the
+    pickled operator and the objects it copies,
+    (key, value) = (id(obj), obj), or None if it cannot be pickled.
+    """
+    extra = _reachable_objects(
+        [operator], list(operator.inputs) + list(operator.outputs),
+        known=objects)
+    buffer = io.BytesIO()
+    try:
+        _Pickler(buffer, objects).dump((id(operator), list(extra.items())))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return buffer.getvalue(), extra
+
+
+def _convert_forked_branch(args):
+    """
+    Runs in a forked process, *args* is (conversion key, operator index,
+    pickled operator), the operator is either the one at *index* in the
+    operators of the conversion or the pickled one if index is None.
+    Returns None if the result cannot be pickled, the operator is
+    then converted by the main process.
+    """
+    key, index, pickled = args
+    topology, container, operators, objects, fragment = _conversions[key]
+    if index is None:
+        # Objects copied from the main process are sent back as
+        # references to the original objects.
+        pid, copied = _Unpickler(io.BytesIO(pickled), objects).load()
+        operator = dict(copied)[pid]
+        extra = {id(obj): pid for pid, obj in copied}
+    else:
+        operator = operators[index]
+        extra = None
+    result = _convert_branch(topology, container, operator,
+                             fragment=fragment)
+    if result is None:
+        return None
+    buffer = io.BytesIO()
+    try:
+        _Pickler(buffer, objects, extra).dump(result)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return buffer.getvalue()
+
+
+def _fragment_key(topology, container, operator, fingerprints):
+    """
+    Returns the key of the fragment converting *operator*,
+    None if the operator has no converter or cannot be hashed
+    reliably. *fingerprints*
+    keeps the fingerprint of every model already hashed.
+    """
+    from ..helpers.conversion_cache import (
+        FingerprintError, get_fragment_key, get_model_fingerprint)
+    try:
+        conv = _get_converter(topology, operator)
+    except Exception:
+        return None
+    model = operator.raw_operator
+    options = _build_options(model, container.options, None)
+    try:
+        if id(model) not in fingerprints:
+            fingerprints[id(model)] = get_model_fingerprint(model)
+        return get_fragment_key(
+            fingerprints[id(model)], operator.type, conv,
+            [var.type for var in operator.inputs],
+            [var.type for var in operator.outputs],
+            container.target_opset, container.dtype, options)
+    except FingerprintError:
+        # the operator is converted but not cached
+        return None
+
+
+def _dump_fragment(result):
+    """
+    Serializes a fragment returned by *_convert_branch*,
+    returns a JSON manifest and a serialized *GraphProto*.
+    """
+    (requests, nodes, node_log, initializers, value_info, inputs, outputs,
+     fragment) = result
+    manifest = dict(requests=[list(req) for req in requests],
+                    node_log=[list(log) for log in node_log])
+    graph = helper.make_graph(nodes, 'fragment', inputs, outputs,
+                              initializer=initializers,
+                              value_info=value_info)
+    return json.dumps(manifest), graph.SerializeToString()
+
+
+def _load_fragment(manifest, graph):
+    "Restores a fragment serialized by *_dump_fragment*."
+    manifest = json.loads(manifest)
+    proto = GraphProto()
+    proto.ParseFromString(graph)
+    return ([tuple(req) for req in manifest['requests']],
+            list(proto.node), [tuple(log) for log in manifest['node_log']],
+            list(proto.initializer), list(proto.value_info),
+            list(proto.input), list(proto.output), True)
+
+
+def _convert_batch(topology, container, batch, forked=None,
+                   fragment_cache=None, fingerprints=None):
+    """
+    Converts a batch of operators whose converters may run
+    in any order and merges the results. Fragments found in
+    *fragment_cache* replace the conversion of an operator,
+    new fragments are added to the cache.
+    """
+    results = [None] * len(batch)
+    keys = [None] * len(batch)
+    todo = list(range(len(batch)))
+    if fragment_cache is not None:
+        todo = []
+        for i, operator in enumerate(batch):
+            keys[i] = _fragment_key(topology, container, operator,
+                                    fingerprints)
+            content = (None if keys[i] is None
+                       else fragment_cache.get(keys[i]))
+            if content is None:
+                todo.append(i)
+            else:
+                results[i] = _load_fragment(*content)
+                keys[i] = None
+
+    fragment = fragment_cache is not None
+    converted = _convert_branches(
+        topology, container, [batch[i] for i in todo], fragment,
+        forked=forked)
+    for i, result in zip(todo, converted):
+        results[i] = result
+        if keys[i] is not None and result is not None and result[-1]:
+            fragment_cache.put(keys[i], *_dump_fragment(result))
+
+    for operator, result in zip(batch, results):
+        _merge_branch(topology, container, operator, result)
+
+
+def _convert_branches(topology, container, operators, fragment,
+                      forked=None):
+    """
+    Converts *operators* with *_convert_branch*, a result is None
+    if the operator must be converted by *_merge_branch*.
+    *forked* is given by *_fork_pool*, the operators it does not
+    know were declared by converters and are pickled to be sent
+    to the processes, they are converted in this process
+    if they cannot be pickled.
+    """
+    tasks = []
+    if forked is not None:
+        pool, key, positions, objects = forked
+        for i, operator in enumerate(operators):
+            if id(operator) in positions:
+                tasks.append((i, (key, positions[id(operator)], None), None))
+                continue
+            pickled = _pickle_operator(operator, objects)
+            if pickled is not None:
+                tasks.append((i, (key, None, pickled[0]), pickled[1]))
+    if len(tasks) <= 1:
+        if not fragment:
+            return [None] * len(operators)
+        return [_convert_branch(topology, container, op, fragment=True)
+                for op in operators]
+
+    results = [None] * len(operators)
+    converted = pool.map(_convert_forked_branch, [t[1] for t in tasks])
+    for (i, _, extra), res in zip(tasks, converted):
+        if res is not None:
+            results[i] = _Unpickler(io.BytesIO(res), objects, extra).load()
+    if fragment:
+        remote = set(t[0] for t in tasks)
+        for i, operator in enumerate(operators):
+            if i not in remote:
+                results[i] = _convert_branch(topology, container, operator,
+                                             fragment=True)
+    return results
+
+
+def _can_fork():
+    """
+    Tells if converters can run in forked processes,
+    only Linux is considered safe.
+    """
+    return (sys.platform.startswith('linux') and
+            'fork' in multiprocessing.get_all_start_methods())
+
+
+@contextmanager
+def _fork_pool(topology, container, n_jobs, fragment):
+    """
+    Forks *n_jobs* processes which share the topology with this one,
+    only the results need to be pickled. Yields None if processes
+    cannot be forked or are not needed.
+    """
+    if n_jobs <= 1 or not _can_fork():
+        yield None
+        return
+    operators = list(topology.unordered_operator_iterator())
+    objects = _shared_objects(topology)
+    key = id(operators)
+    positions = {id(op): i for i, op in enumerate(operators)}
+    _conversions[key] = topology, container, operators, objects, fragment
+    try:
+        with multiprocessing.get_context('fork').Pool(n_jobs) as pool:
+            yield pool, key, positions, objects
+    finally:
+        del _conversions[key]
+
+
+def convert_operators_parallel(topology, container, n_jobs,
+                               fragment_cache=None):
+    """
+    Converts every operator of *topology* into *container*,
+    *n_jobs* converters run at the same time (-1 for every core).
+    Processes are forked once for the whole conversion and only on
+    Linux, operators are converted one after another on other systems.
+    Operators found in *fragment_cache* (see :class:`FragmentCache
+    <skl2onnx.helpers.conversion_cache.FragmentCache>`) are not
+    converted again.
+    """
+    if n_jobs is None:
+        n_jobs = 1
+    elif n_jobs < 0:
+        n_jobs = max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    fragment = fragment_cache is not None
+    with _fork_pool(topology, container, n_jobs, fragment) as forked:
+        batch = []
+        fingerprints = {}
+        for operator in topology._topological_operator_iterator():
+            if operator is not None:
+                batch.append(operator)
+                continue
+            if batch:
+                _convert_batch(topology, container, batch, forked=forked,
+                               fragment_cache=fragment_cache,
+                               fingerprints=fingerprints)
+                batch = []
@@ -0,0 +1,180 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Measures the cost of every operator of a conversion.
+"""
+import tracemalloc
+from time import perf_counter
+
+#: Profiler receiving the measures, None if no profiler is active.
+active_profiler = None
+
+
+class ConversionProfiler:
+    """
+    Measures the time and the memory spent to parse, compute the shapes
+    and convert every operator of the models converted while
+    the profiler is active, and the size of the produced graph.
+
+    ::
+
+        with ConversionProfiler() as prof:
+            onx = convert_sklearn(model, initial_types=initial_types)
+        print(prof.to_dataframe())
+
+    Every row of the report describes one operator:
+
+    * *name*, *type*, *model*: operator name, alias and the class
+      of the converted model, rows with an empty name gather the parsing
+      of models no operator converts such as a *Pipeline*
+    * *parse_time*, *parse_memory*: time spent in the parser of the model
+      and memory it retained (the parsers of sub-models are excluded)
+    * *shape_time*, *shape_memory*: time and peak memory of
+      the shape calculator
+    * *convert_time*, *convert_memory*: time and peak memory of
+      the converter
+    * *n_nodes*, *initializer_bytes*: number of nodes and size of the
+      initializers added by the converter
+
+    Times are in seconds, memory in bytes (0 if *memory* is False).
+    Memory is measured with :mod:`tracemalloc` which slows down
+    the conversion. Operators are converted one after another,
+    parameters *n_jobs* and *fragment_cache* are ignored
+    while the profiler is active.
+    """
+
+    _columns = ['name', 'type', 'model', 'parse_time', 'parse_memory',
+                'shape_time', 'shape_memory', 'convert_time',
+                'convert_memory', 'n_nodes', 'initializer_bytes']
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.rows = {}
+        # measured objects are kept alive so that their ids stay unique
+        self._objects = []
+        self._parse_stack = []
+        self._previous = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        global active_profiler
+        self._previous = active_profiler
+        active_profiler = self
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global active_profiler
+        active_profiler = self._previous
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _row(self, key, operator=None, model=None):
+        if key not in self.rows:
+            row = dict((c, 0) for c in self._columns)
+            if operator is not None:
+                row['name'] = operator.onnx_name
+                row['type'] = operator.type
+                model = operator.raw_operator
+            else:
+                row['name'] = row['type'] = ''
+            row['model'] = ('' if model is None
+                            else model.__class__.__name__)
+            self.rows[key] = row
+            self._objects.append(operator or model)
+        return self.rows[key]
+
+    def _memory(self):
+        return tracemalloc.get_traced_memory() if self.memory else (0, 0)
+
+    def _reset_peak(self):
+        if not self.memory:
+            return
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        else:
+            # it also resets the peak before python 3.9
+            tracemalloc.clear_traces()
+
+    def start(self):
+        """
+        Starts the measure of a shape calculator or a converter.
+        """
+        self._reset_peak()
+        return perf_counter(), self._memory()[0]
+
+    def stop(self, kind, operator, start, container=None, n_nodes=0,
+             n_initializers=0):
+        """
+        Ends the measure started by :meth:`start`, *kind* is
+        ``'shape'`` or ``'convert'``. If *container* is specified,
+        the nodes and initializers added after the first
+        *n_nodes* and *n_initializers* are counted.
+        """
+        elapsed = perf_counter() - start[0]
+        peak = self._memory()[1] - start[1]
+        row = self._row(id(operator), operator)
+        row[kind + '_time'] += elapsed
+        row[kind + '_memory'] = max(row[kind + '_memory'], peak)
+        if container is not None:
+            row['n_nodes'] += len(container.nodes) - n_nodes
+            row['initializer_bytes'] += sum(
+                init.ByteSize()
+                for init in container.initializers[n_initializers:])
+
+    def start_parse(self, scope):
+        """
+        Starts the measure of a parser. Parsers call the parsers
+        of the sub-models, the measures exclude them.
+        """
+        self._parse_stack.append(dict(
+            begin=perf_counter(), memory=self._memory()[0],
+            n_operators=len(scope.operators), nested=set(),
+            nested_time=0., nested_memory=0))
+
+    def stop_parse(self, scope, model):
+        """
+        Ends the measure started by :meth:`start_parse`.
+        """
+        frame = self._parse_stack.pop()
+        elapsed = perf_counter() - frame['begin']
+        memory = self._memory()[0] - frame['memory']
+        declared = list(scope.operators.values())[frame['n_operators']:]
+        own = [op for op in declared if id(op) not in frame['nested']]
+        if self._parse_stack:
+            parent = self._parse_stack[-1]
+            parent['nested'].update(id(op) for op in declared)
+            parent['nested_time'] += elapsed
+            parent['nested_memory'] += memory
+
+        # the time goes to the operator converting the model
+        main = [op for op in own if op.raw_operator is model]
+        if main:
+            row = self._row(id(main[0]), main[0])
+        else:
+            row = self._row(id(model), model=model)
+        row['parse_time'] += elapsed - frame['nested_time']
+        row['parse_memory'] += memory - frame['nested_memory']
+        # the other declared operators appear in the report
+        for op in own:
+            self._row(id(op), op)
+
+    def report(self):
+        """
+        Returns the measures as a list of dictionaries,
+        one per operator, in the order they were first seen.
+        """
+        return [dict(row) for row in self.rows.values()]
+
+    def to_dataframe(self):
+        """
+        Returns the measures as a :class:`pandas.DataFrame`.
+        """
+        import pandas
+        return pandas.DataFrame(self.report(), columns=self._columns)
@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for
 # license information.
 # --------------------------------------------------------------------------
+import importlib
 
 # This dictionary defines the converters which can be invoked in the
 # conversion framework defined in _topology.py. A key in this dictionary
@@ -18,6 +19,55 @@ _converter_pool = {}
 # shape(s) for the operator specified by the key.
 _shape_calculator_pool = {}
 
+# These dictionaries map an operator's unique ID to the module which
+# registers its converter or its shape calculator. The module is only
+# imported the first time the converter or the shape calculator is
+# needed (see register_converter_modules).
+_converter_modules = {}
+_shape_calculator_modules = {}
+
+
+def _import_registration_module(modules, operator_name):
+    """
+    Imports the module registering *operator_name* if it was not
+    imported yet. Every operator registered by the same module
+    is removed from *modules*.
+    """
+    module = modules.get(operator_name, None)
+    if module is None:
+        return
+    for name in [k for k, v in modules.items() if v == module]:
+        del modules[name]
+    importlib.import_module(module)
+
+
+def register_converter_modules(converter_modules=None,
+                               shape_calculator_modules=None):
+    """
+    Declares which module registers the converter or the shape
+    calculator of every operator without importing it.
+
+    :param converter_modules: dictionary ``{ operator_name: module }``
+    :param shape_calculator_modules: dictionary
+        ``{ operator_name: module }``
+    """
+    if converter_modules:
+        _converter_modules.update(converter_modules)
+    if shape_calculator_modules:
+        _shape_calculator_modules.update(shape_calculator_modules)
+
+
+def load_all_converters():
+    """
+    Imports every module declared with :func:`register_converter_modules`.
+    """
+    while _converter_modules:
+        _import_registration_module(
+            _converter_modules, next(iter(_converter_modules)))
+    while _shape_calculator_modules:
+        _import_registration_module(
+            _shape_calculator_modules, next(iter(_shape_calculator_modules)))
+
 
 def register_converter(operator_name, conversion_function, overwrite=False):
     """
@@ -30,6 +80,7 @@ def register_converter(operator_name, conversion_function, overwrite=False):
                       (i.e., conversion_function). Set this flag to True
                       to enable overwriting.
     """
+    _import_registration_module(_converter_modules, operator_name)
     if not overwrite and operator_name in _converter_pool:
         raise ValueError('We do not overwrite registered converter '
                          'by default')
@@ -37,6 +88,7 @@ def register_converter(operator_name, conversion_function, overwrite=False):
 
 
 def get_converter(operator_name):
+    _import_registration_module(_converter_modules, operator_name)
     if operator_name not in _converter_pool:
         msg = 'Unsupported conversion for operator %s (%d registered)' % (
             operator_name, len(_converter_pool))
@@ -56,6 +108,7 @@ def register_shape_calculator(operator_name, calculator_function,
                       (i.e., calculator_function). Set this flag to True
                       to enable overwriting.
     """
+    _import_registration_module(_shape_calculator_modules, operator_name)
     if not overwrite and operator_name in _shape_calculator_pool:
         raise ValueError('We do not overwrite registrated shape calculator '
                          'by default')
@@ -63,6 +116,7 @@ def register_shape_calculator(operator_name, calculator_function,
 
 
 def get_shape_calculator(operator_name):
+    _import_registration_module(_shape_calculator_modules, operator_name)
     if operator_name not in _shape_calculator_pool:
         msg = 'Unsupported shape calculator for operator %s' % operator_name
         raise ValueError(msg)
@@ -4,6 +4,7 @@
 # license information.
 # --------------------------------------------------------------------------
 
+import heapq
 import re
 import warnings
 import numpy as np
@@ -21,6 +22,7 @@ from ..proto import get_opset_number_from_onnx
 from ..proto.onnx_helper_modified import (
     make_graph, make_model, make_tensor_value_info
 )
+from . import _profiling
 from . import _registration
 from . import utils
 from .exceptions import MissingShapeCalculator, MissingConverter
@@ -35,6 +37,11 @@ class Variable:
     from *ONNX* types.
     """
 
+    # large ensembles declare thousands of variables,
+    # slots avoid one dictionary per instance
+    __slots__ = ('raw_name', 'onnx_name', 'scope', 'type', 'is_fed',
+                 'is_root', 'is_leaf', 'is_abandoned')
+
     def __init__(self, raw_name, onnx_name, scope, type=None):
         """
         :param raw_name: A string indicating the variable's name in the
@@ -132,6 +139,12 @@ class Operator(OperatorBase):
     Defines an operator available in *ONNX*.
     """
 
+    # parsers and converters may add attributes such as
+    # *classlabels_strings*, the dictionary is only created then
+    __slots__ = ('onnx_name', 'scope', 'type', 'raw_operator', 'inputs',
+                 'outputs', 'is_evaluated', 'is_abandoned', 'target_opset',
+                 'dtype', '__dict__')
+
     def __init__(self, onnx_name, scope, type, raw_operator,
                  target_opset, dtype):
         """
@@ -226,6 +239,75 @@ class Operator(OperatorBase):
                              "np.float64.")
 
 
+class VariableConsumers:
+    """
+    Maps every variable to the operators using it as an input.
+    Operators are registered when they are declared but they are
+    only indexed the next time the map is queried because their
+    inputs are usually set after the declaration.
+    """
+
+    def __init__(self):
+        # (key, value) = (variable onnx_name, {operator onnx_name: operator})
+        self._consumers = {}
+        # Operators declared but not indexed yet.
+        self._pending = {}
+
+    def _index_pending(self):
+        for operator in self._pending.values():
+            for variable in operator.inputs:
+                name = variable.onnx_name
+                if name in self._consumers:
+                    self._consumers[name][operator.onnx_name] = operator
+                else:
+                    self._consumers[name] = {operator.onnx_name: operator}
+        self._pending.clear()
+
+    def add_operator(self, operator):
+        """
+        Registers a new operator.
+        """
+        self._pending[operator.onnx_name] = operator
+
+    def remove_operator(self, operator):
+        """
+        Removes an operator from the map.
+        """
+        if operator.onnx_name in self._pending:
+            del self._pending[operator.onnx_name]
+            return
+        for variable in operator.inputs:
+            consumers = self._consumers.get(variable.onnx_name, None)
+            if consumers is not None:
+                consumers.pop(operator.onnx_name, None)
+
+    def get_consumers(self, variable):
+        """
+        Returns the operators using *variable* as an input.
+        """
+        self._index_pending()
+        consumers = self._consumers.get(variable.onnx_name, None)
+        return [] if consumers is None else list(consumers.values())
+
+    def replace_input(self, variable, new_variable):
+        """
+        Replaces *variable* by *new_variable* in the inputs of
+        every operator using it.
+        """
+        self._index_pending()
+        consumers = self._consumers.pop(variable.onnx_name, None)
+        if consumers is None:
+            return
+        for operator in consumers.values():
+            for i in range(len(operator.inputs)):
+                if operator.inputs[i].onnx_name == variable.onnx_name:
+                    operator.inputs[i] = new_variable
+        if new_variable.onnx_name in self._consumers:
+            self._consumers[new_variable.onnx_name].update(consumers)
+        else:
+            self._consumers[new_variable.onnx_name] = consumers
+
+
 class Scope:
     """
     Every node of an *ONNX* graph must be unique. This class holds the list
@@ -233,10 +315,16 @@ class Scope:
     provides functions to create a unique unused name.
     """
 
+    __slots__ = ('name', 'parent_scopes', 'onnx_variable_names',
+                 'onnx_operator_names', 'target_opset',
+                 'custom_shape_calculators', 'dtype', 'tensor_type',
+                 'variable_name_mapping', 'variables', 'operators',
+                 'options', 'variable_consumers')
+
     def __init__(self, name, parent_scopes=None, variable_name_set=None,
                  operator_name_set=None, target_opset=None,
                  custom_shape_calculators=None, options=None,
-                 dtype=np.float32):
+                 dtype=np.float32, variable_consumers=None):
         """
         :param name: A string, the unique ID of this scope in a
                      Topology object
@@ -256,6 +344,9 @@ class Scope:
         :param dtype: select the computation for real type,
             by default it is float but double is sometime needed
         :param options: see :ref:`l-conv-options`
+        :param variable_consumers: instance of :class:`VariableConsumers`
+            shared by every scope of a topology, it is updated
+            every time an operator is declared or deleted
         """
         self.name = name
         self.parent_scopes = parent_scopes if parent_scopes else list()
@@ -295,6 +386,9 @@ class Scope:
         # Additional options given to converters.
         self.options = options
 
+        # Operators using every variable as an input.
+        self.variable_consumers = variable_consumers
+
     def get_shape_calculator(self, model_type):
         """
         Returns the shape calculator for the given model type.
@@ -331,6 +425,16 @@ class Scope:
 
         # Create the variable
         variable = Variable(raw_name, onnx_name, self.name, type)
+        self._register_variable(variable, prepend=prepend)
+        return variable
+
+    def _register_variable(self, variable, prepend=False):
+        """
+        Adds a variable whose name was obtained with
+        *get_unique_variable_name* to this scope.
+        """
+        raw_name = variable.raw_name
+        onnx_name = variable.onnx_name
         self.variables[onnx_name] = variable
 
         if raw_name in self.variable_name_mapping:
@@ -341,7 +445,6 @@ class Scope:
                 self.variable_name_mapping[raw_name].insert(0, onnx_name)
         else:
             self.variable_name_mapping[raw_name] = [onnx_name]
-        return variable
 
     def declare_local_operator(self, type, raw_model=None):
         """
@@ -350,9 +453,18 @@ class Scope:
         onnx_name = self.get_unique_operator_name(str(type))
         operator = Operator(onnx_name, self.name, type, raw_model,
                             self.target_opset, self.dtype)
-        self.operators[onnx_name] = operator
+        self._register_operator(operator)
         return operator
 
+    def _register_operator(self, operator):
+        """
+        Adds an operator whose name was obtained with
+        *get_unique_operator_name* to this scope.
+        """
+        self.operators[operator.onnx_name] = operator
+        if self.variable_consumers is not None:
+            self.variable_consumers.add_operator(operator)
+
     def delete_local_operator(self, onnx_name):
         """
         Removes the operator whose onnx_name is the input *onnx_name*.
@@ -361,6 +473,8 @@ class Scope:
                 onnx_name not in self.operators):
             raise RuntimeError('The operator to remove was not found.')
         self.onnx_operator_names.discard(onnx_name)
+        if self.variable_consumers is not None:
+            self.variable_consumers.remove_operator(self.operators[onnx_name])
         del self.operators[onnx_name]
 
     def delete_local_variable(self, onnx_name):
@@ -426,7 +540,13 @@ class Topology:
                                         user customized shape calculator
         """
         self.scopes = []
+        # A map of scopes by name.
+        # (key, value) = (scope name, scope)
+        self.scope_map = {}
         self.raw_model = model
+        # Operators using every variable as an input, shared by
+        # all scopes.
+        self.variable_consumers = VariableConsumers()
         self.scope_names = set()
         self.variable_name_set = (
                     reserved_variable_names
@@ -515,8 +635,10 @@ class Topology:
             self.get_unique_scope_name(seed), parent_scopes,
             self.variable_name_set, self.operator_name_set, self.target_opset,
             custom_shape_calculators=self.custom_shape_calculators,
-            options=options, dtype=dtype)
+            options=options, dtype=dtype,
+            variable_consumers=self.variable_consumers)
         self.scopes.append(scope)
+        self.scope_map[scope.name] = scope
         return scope
 
     def unordered_operator_iterator(self):
@@ -537,19 +659,66 @@ class Topology:
         topological structure, please use another function,
         unordered_operator_iterator.
         """
+        for operator in self._topological_operator_iterator():
+            if operator is not None:
+                yield operator
+
+    def _topological_operator_iterator(self):
+        """
+        Implements *topological_operator_iterator* but also
+        yields None every time the operators already yielded
+        are the only ones the next operators may depend on.
+        Variable names are known before the conversion starts so
+        the operators yielded since the previous None can be
+        converted in any order, new operators declared by
+        their converters are only looked for after the None.
+        """
         self._initialize_graph_status_for_traversing()
         priorities = {
             'tensorToProbabilityMap': 2,
             'tensorToLabel': 1
         }
-        while not all(operator.is_evaluated for scope in self.scopes
-                      for operator in scope.operators.values()):
-            is_evaluation_happened = False
-            for operator in sorted(self.unordered_operator_iterator(),
-                                   key=lambda op: priorities[op.type]
-                                   if op.type in priorities else 0):
-                if (all(variable.is_fed for variable in operator.inputs)
-                        and not operator.is_evaluated):
+
+        # Operators are visited in the same order as a scan of all
+        # operators sorted by priority, repeated until every operator
+        # is evaluated. Instead of rescanning, every operator keeps the
+        # number of inputs not fed yet and is scheduled once it reaches
+        # zero, either in the current scan if it comes after the last
+        # evaluated operator or in the next one.
+        n_operators = -1
+        while True:
+            operators = sorted(self.unordered_operator_iterator(),
+                               key=lambda op: priorities[op.type]
+                               if op.type in priorities else 0)
+            if len(operators) == n_operators:
+                # No new operator was declared since the last scan.
+                break
+            n_operators = len(operators)
+
+            # Index of consumers for every variable not fed yet.
+            consumers = {}
+            missing = [0] * n_operators
+            current = []
+            for i, operator in enumerate(operators):
+                if operator.is_evaluated:
+                    continue
+                for variable in operator.inputs:
+                    if not variable.is_fed:
+                        missing[i] += 1
+                        key = id(variable)
+                        if key in consumers:
+                            consumers[key].append(i)
+                        else:
+                            consumers[key] = [i]
+                if missing[i] == 0:
+                    current.append(i)
+
+            following = []
+            while current:
+                position = -1
+                while current:
+                    i = heapq.heappop(current)
+                    operator = operators[i]
                     # Check if over-writing problem occurs (i.e., multiple
                     # operators produce results on one variable).
                     for variable in operator.outputs:
@@ -563,14 +732,23 @@ class Topology:
                         variable.is_fed = True
                     # Make this operator as handled
                     operator.is_evaluated = True
-                    is_evaluation_happened = True
                     # Send out an operator
                     yield operator
-            # After scanning through the whole computational graph, at
-            # least one operator should be evaluated. If not, we need
-            # to terminate this procedure to avoid dead lock.
-            if not is_evaluation_happened:
-                break
+                    position = i
+                    for variable in operator.outputs:
+                        for j in consumers.get(id(variable), []):
+                            missing[j] -= 1
+                            if missing[j] == 0:
+                                heapq.heappush(
+                                    current if j > position else following,
+                                    j)
+                yield None
+                # Converters may declare new operators while the graph
+                # is traversed, they are added before the next scan.
+                if sum(len(scope.operators) for scope in self.scopes) != \
+                        n_operators:
+                    break
+                current, following = following, []
 
     def _check_structure(self):
         """
@@ -669,7 +847,10 @@ class Topology:
                         variable.type = initial_type
 
         # Traverse the graph from roots to leaves
+        profiler = _profiling.active_profiler
         for operator in self.topological_operator_iterator():
+            if profiler is not None:
+                start = profiler.start()
             mtype = type(operator.raw_operator)
             if mtype in self.custom_shape_calculators:
                 # overwritten operator.
@@ -681,6 +862,8 @@ class Topology:
                 shape_calc(operator)
             else:
                 operator.infer_types()
+            if profiler is not None:
+                profiler.stop('shape', operator, start)
 
     def _resolve_duplicates(self):
         """
@@ -701,13 +884,7 @@ class Topology:
             # Replace the output variable with the input variable everywhere
             original = operator.inputs[0]
             duplicate = operator.outputs[0]
-            for another_scope in self.scopes:
-                for another_operator in another_scope.operators.values():
-                    for i in range(len(another_operator.inputs)):
-                        if (another_operator.inputs[i].onnx_name
-                                != duplicate.onnx_name):
-                            continue
-                        another_operator.inputs[i] = original
+            self.variable_consumers.replace_input(duplicate, original)
 
             # When original variable's documentation string or
             # denotation is empty but duplicate's is not, we copy that
@@ -831,9 +1008,33 @@ class Topology:
         self._check_structure()
 
 
+def _get_converter(topology, operator):
+    """
+    Returns the function converting *operator*.
+    """
+    mtype = type(operator.raw_operator)
+    if mtype in topology.custom_conversion_functions:
+        return topology.custom_conversion_functions[mtype]
+    if operator.type in topology.custom_conversion_functions:
+        return topology.custom_conversion_functions[operator.type]
+    if hasattr(operator.raw_operator, "onnx_converter"):
+        return operator.raw_operator.onnx_converter()
+    # Convert the selected operator into some ONNX objects and
+    # save them into the container
+    try:
+        return _registration.get_converter(operator.type)
+    except ValueError:
+        raise MissingConverter(
+            "Unable to find converter for alias '{}' type "
+            "'{}'. You may raise an issue at "
+            "https://github.com/onnx/sklearn-onnx/issues."
+            "".format(operator.type,
+                      type(getattr(operator, 'raw_model', None))))
+
+
 def convert_topology(topology, model_name, doc_string, target_opset,
                      channel_first_inputs=None, dtype=None,
-                     options=None):
+                     options=None, n_jobs=None, fragment_cache=None):
     """
     This function is used to convert our Topology object defined in
     _parser.py into a ONNX model (type: ModelProto).
@@ -847,6 +1048,12 @@ def convert_topology(topology, model_name, doc_string, target_opset,
     :param dtype: float type to use everywhere in the graph,
         `np.float32` or `np.float64`
     :param options: see :ref:`l-conv-options`
+    :param n_jobs: number of operators converted at the same time,
+        None or 1 converts them one after another, -1 uses every core,
+        the model is the same in every case, only used on Linux
+    :param fragment_cache: None or an instance of :class:`FragmentCache
+        <skl2onnx.helpers.conversion_cache.FragmentCache>`, operators
+        already converted are taken from it
     include '1.1.2', '1.2', and so on.
     :return: a ONNX ModelProto
     """
@@ -937,30 +1144,26 @@ def convert_topology(topology, model_name, doc_string, target_opset,
             container.add_output(other_outputs[name])
 
     # Traverse the graph from roots to leaves
-    # This loop could eventually be parallelized.
-    for operator in topology.topological_operator_iterator():
-        scope = next(scope for scope in topology.scopes
-                     if scope.name == operator.scope)
-        mtype = type(operator.raw_operator)
-        if mtype in topology.custom_conversion_functions:
-            conv = topology.custom_conversion_functions[mtype]
-        elif operator.type in topology.custom_conversion_functions:
-            conv = topology.custom_conversion_functions[operator.type]
-        elif hasattr(operator.raw_operator, "onnx_converter"):
-            conv = operator.raw_operator.onnx_converter()
-        else:
-            # Convert the selected operator into some ONNX objects and
-            # save them into the container
-            try:
-                conv = _registration.get_converter(operator.type)
-            except ValueError:
-                raise MissingConverter(
-                    "Unable to find converter for alias '{}' type "
-                    "'{}'. You may raise an issue at "
-                    "https://github.com/onnx/sklearn-onnx/issues."
-                    "".format(operator.type,
-                              type(getattr(operator, 'raw_model', None))))
-        conv(scope, operator, container)
+    profiler = _profiling.active_profiler
+    if profiler is None and (
+            (n_jobs is not None and n_jobs != 1) or
+            fragment_cache is not None):
+        from ._parallel import convert_operators_parallel
+        convert_operators_parallel(topology, container, n_jobs,
+                                   fragment_cache=fragment_cache)
+    else:
+        for operator in topology.topological_operator_iterator():
+            scope = topology.scope_map[operator.scope]
+            conv = _get_converter(topology, operator)
+            if profiler is None:
+                conv(scope, operator, container)
+                continue
+            n_nodes = len(container.nodes)
+            n_initializers = len(container.initializers)
+            start = profiler.start()
+            conv(scope, operator, container)
+            profiler.stop('convert', operator, start, container=container,
+                          n_nodes=n_nodes, n_initializers=n_initializers)
 
     # Create a graph from its main components
     if container.target_opset < 9:
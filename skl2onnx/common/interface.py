@@ -59,6 +59,7 @@ class ModelContainer:
 @six.add_metaclass(abc.ABCMeta)
 class OperatorBase:
     __metaclass__ = abc.ABCMeta
+    __slots__ = ()
 
     @property
     @abc.abstractmethod
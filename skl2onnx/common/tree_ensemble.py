@@ -110,6 +110,70 @@ def sklearn_threshold(dy, dtype, mode):
                        "'BRANCH_LEQ' (actually '{}').".format(mode))
 
 
+def find_switch_point_array(fy, nfy):
+    """
+    Vectorized version of :func:`find_switch_point`.
+    The bisection runs on all values at the same time, a value
+    stops moving once it converged and the loop stops when
+    every value converged.
+    """
+    a = np.array(fy, dtype=np.float64)
+    b = np.array(nfy, dtype=np.float64)
+    fa = a.astype(np.float32)
+    active = a != b
+    while active.any():
+        ia = a[active]
+        ib = b[active]
+        m = (ia + ib) / 2
+        fm = m.astype(np.float32)
+        same = fm == fa[active]
+        na = np.where(same, m, ia)
+        nb = np.where(same, ib, m)
+        a[active] = na
+        b[active] = nb
+        active[active] = (na != ia) | (nb != ib)
+    return a
+
+
+def sklearn_threshold_array(dy, dtype, mode):
+    """
+    Vectorized version of :func:`sklearn_threshold`,
+    *dy* is an array of thresholds. The results are
+    identical to the ones returned by the scalar version.
+    """
+    if mode == "BRANCH_LEQ":
+        dy = np.asarray(dy, dtype=np.float64)
+        fy = dy.astype(np.float32)
+        with np.errstate(over='ignore'):
+            eps = np.maximum(np.abs(fy), np.finfo(np.float32).eps) * 10
+        if dtype == np.float32:
+            # fy <= dy keeps fy, the previous float is taken otherwise
+            nfy = np.nextafter(fy, fy - eps, dtype=np.float32)
+            return np.where(fy <= dy, fy, nfy).astype(np.float64)
+        elif dtype == np.float64:
+            res = fy.astype(np.float64)
+            below = fy > dy
+            if below.any():
+                fyb = fy[below]
+                afy = np.nextafter(fyb, fyb - eps[below], dtype=np.float32)
+                afy2 = find_switch_point_array(afy, fyb)
+                idx = np.nonzero(below)[0]
+                keep = dy[idx] > afy2
+                res[idx[keep]] = afy2[keep]
+            above = ~below
+            if above.any():
+                fya = fy[above]
+                bfy = np.nextafter(fya, fya + eps[above], dtype=np.float32)
+                bfy2 = find_switch_point_array(fya, bfy)
+                idx = np.nonzero(above)[0]
+                keep = dy[idx] <= bfy2
+                res[idx[keep]] = bfy2[keep]
+            return res
+        raise TypeError("Unexpected dtype {}.".format(dtype))
+    raise RuntimeError("Threshold is not changed for other mode and "
+                       "'BRANCH_LEQ' (actually '{}').".format(mode))
+
+
 def add_node(attr_pairs, is_classifier, tree_id, tree_weight, node_id,
              feature_id, mode, value, true_child_id, false_child_id,
              weights, weight_id_bias, leaf_weights_are_counts,
@@ -184,3 +248,115 @@ def add_tree_to_attribute_pairs(attr_pairs, is_classifier, tree, tree_id,
                  weight, weight_id_bias, leaf_weights_are_counts,
                  adjust_threshold_for_sklearn=adjust_threshold_for_sklearn,
                  dtype=dtype)
+
+
+def get_tree_attribute_arrays(is_classifier, tree, tree_id, tree_weight,
+                              weight_id_bias, leaf_weights_are_counts,
+                              adjust_threshold_for_sklearn=False,
+                              dtype=None):
+    """
+    Vectorized version of :func:`add_tree_to_attribute_pairs`.
+    It builds every attribute describing one tree as an array
+    directly from the arrays stored in *tree*
+    (``children_left``, ``feature``, ``threshold``, ``value``)
+    instead of appending one scalar at a time.
+
+    :return: dictionary ``{ attribute name: array }``, attributes
+        ``class_*`` are returned for a classifier, ``target_*``
+        for a regressor
+    """
+    n_nodes = tree.node_count
+    node_ids = np.arange(n_nodes, dtype=np.int64)
+    children_left = np.asarray(tree.children_left[:n_nodes], dtype=np.int64)
+    children_right = np.asarray(tree.children_right[:n_nodes],
+                                dtype=np.int64)
+    is_branch = (children_left > node_ids) | (children_right > node_ids)
+    is_leaf = ~is_branch
+
+    thresholds = np.where(
+        is_branch, np.asarray(tree.threshold[:n_nodes], dtype=np.float64), 0.)
+    if adjust_threshold_for_sklearn:
+        thresholds[is_branch] = sklearn_threshold_array(
+            thresholds[is_branch], dtype, 'BRANCH_LEQ')
+
+    attrs = {}
+    attrs['nodes_treeids'] = np.full(n_nodes, tree_id, dtype=np.int64)
+    attrs['nodes_nodeids'] = node_ids
+    attrs['nodes_featureids'] = np.where(
+        is_branch, np.asarray(tree.feature[:n_nodes], dtype=np.int64), 0)
+    attrs['nodes_modes'] = np.where(is_branch, 'BRANCH_LEQ', 'LEAF')
+    attrs['nodes_values'] = thresholds
+    attrs['nodes_truenodeids'] = np.where(is_branch, children_left, 0)
+    attrs['nodes_falsenodeids'] = np.where(is_branch, children_right, 0)
+    attrs['nodes_missing_value_tracks_true'] = np.zeros(
+        n_nodes, dtype=np.int64)
+    attrs['nodes_hitrates'] = np.ones(n_nodes, dtype=np.float64)
+
+    # Add leaf information for making prediction
+    leaf_ids = node_ids[is_leaf]
+    n_leaves = leaf_ids.shape[0]
+    weights = np.asarray(tree.value[:n_nodes], dtype=np.float64)
+    weights = weights[is_leaf].reshape((n_leaves, -1))
+    factor = np.full(n_leaves, tree_weight, dtype=np.float64)
+    # If the values stored at leaves are counts of possible classes, we
+    # need convert them to probabilities by doing a normalization.
+    if leaf_weights_are_counts:
+        # cumulated sum to sum up in the same order as function sum
+        s = np.add.accumulate(weights, axis=1)[:, -1]
+        s[s == 0] = 1.
+        factor /= s
+    weights = weights * factor.reshape((-1, 1))
+    if weights.shape[1] == 2 and is_classifier:
+        weights = weights[:, 1:]
+    n_weights = weights.shape[1]
+
+    # Note that attribute names for making prediction are different for
+    # classifiers and regressors
+    prefix = 'class' if is_classifier else 'target'
+    attrs[prefix + '_treeids'] = np.full(
+        n_leaves * n_weights, tree_id, dtype=np.int64)
+    attrs[prefix + '_nodeids'] = np.repeat(leaf_ids, n_weights)
+    attrs[prefix + '_ids'] = np.tile(
+        np.arange(n_weights, dtype=np.int64) + weight_id_bias, n_leaves)
+    attrs[prefix + '_weights'] = weights.ravel()
+    return attrs
+
+
+def add_tree_to_attribute_pairs_array(attr_pairs, is_classifier, tree,
+                                      tree_id, tree_weight, weight_id_bias,
+                                      leaf_weights_are_counts,
+                                      adjust_threshold_for_sklearn=False,
+                                      dtype=None):
+    """
+    Same signature as :func:`add_tree_to_attribute_pairs` but
+    every list in *attr_pairs* receives one array per tree.
+    Function :func:`concatenate_tree_attribute_pairs` must be
+    called once all trees were added.
+    """
+    attrs = get_tree_attribute_arrays(
+        is_classifier, tree, tree_id, tree_weight, weight_id_bias,
+        leaf_weights_are_counts,
+        adjust_threshold_for_sklearn=adjust_threshold_for_sklearn,
+        dtype=dtype)
+    for k, v in attrs.items():
+        attr_pairs[k].append(v)
+
+
+def concatenate_tree_attribute_pairs(attr_pairs):
+    """
+    Concatenates the arrays added by
+    :func:`add_tree_to_attribute_pairs_array` into
+    one array per attribute. The modification happens inplace.
+
+    :param attr_pairs: attributes
+    :return: attributes
+    """
+    for k, v in attr_pairs.items():
+        if (not isinstance(v, list) or len(v) == 0 or
+                not all(isinstance(a, np.ndarray) for a in v)):
+            continue
+        value = np.concatenate(v)
+        if value.dtype.kind == 'U':
+            value = value.tolist()
+        attr_pairs[k] = value
+    return attr_pairs
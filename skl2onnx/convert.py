@@ -4,9 +4,15 @@
 # license information.
 # --------------------------------------------------------------------------
 
+import multiprocessing
+import numbers
+import os
+import pickle
+from collections import deque
 from uuid import uuid4
 import numpy as np
 from .proto import get_opset_number_from_onnx
+from .common._parallel import _can_fork
 from .common._topology import convert_topology
 from ._parse import parse_sklearn_model
 
@@ -19,7 +25,9 @@ def convert_sklearn(model, name=None, initial_types=None, doc_string='',
                     target_opset=None, custom_conversion_functions=None,
                     custom_shape_calculators=None,
                     custom_parsers=None, options=None,
-                    dtype=np.float32, intermediate=False):
+                    dtype=np.float32, intermediate=False,
+                    external_data=None, external_data_threshold=1024,
+                    n_jobs=None, fragment_cache=None):
     """
     This function produces an equivalent ONNX model of the given scikit-learn model.
     The supported converters is returned by function
@@ -50,6 +58,20 @@ def convert_sklearn(model, name=None, initial_types=None, doc_string='',
         `np.float32` or `np.float64`
     :param intermediate: if True, the function returns the converted model and , and :class:`Topology`,
         it returns the converted model otherwise
+    :param external_data: filename, if not None, every initializer bigger than
+        *external_data_threshold* bytes is written into this file and the model
+        only keeps a reference to it (see :func:`save_initializers_as_external_data
+        <skl2onnx.helpers.onnx_helper.save_initializers_as_external_data>`),
+        the model must then be saved in the same folder
+    :param external_data_threshold: see *external_data*
+    :param n_jobs: number of operators converted at the same time, None or 1
+        converts them one after another, -1 uses every core, the produced model
+        does not depend on this parameter, it is ignored on systems other
+        than Linux (see :ref:`l-conv-parallel`)
+    :param fragment_cache: an instance of :class:`FragmentCache
+        <skl2onnx.helpers.conversion_cache.FragmentCache>`, the conversion
+        of every step whose fitted parameters and input types did not change
+        since a previous conversion is taken from this cache
     :return: An ONNX model (type: ModelProto) which is equivalent to the input scikit-learn model
 
     Example of *initial_types*:
@@ -109,6 +131,29 @@ def convert_sklearn(model, name=None, initial_types=None, doc_string='',
                                      options=extra)
 
     It is used in example :ref:`l-example-tfidfvectorizer`.
+
+    .. _l-conv-parallel:
+
+    Parallel conversion
+    +++++++++++++++++++
+
+    Operators whose inputs are known can be converted at the same time,
+    such as the estimators of a *VotingClassifier* or a *BaggingClassifier*
+    or the branches of a *FeatureUnion*. Parameter *n_jobs* converts them
+    in separate processes forked once at the beginning of the conversion,
+    the operators declared by a converter, such as the estimators of an
+    ensemble, are pickled and sent to these processes.
+    Processes are only forked on Linux, *n_jobs* gives no speedup on other
+    systems, operators are converted one after another.
+    Every converter receives temporary names, the final names are
+    given when the results are merged in the order a serial conversion
+    follows. The converted model is the same whatever *n_jobs* is.
+    An exception raised by a converter is raised again by this function.
+
+    ::
+
+        model_onnx = convert_sklearn(bagging, initial_types=initial_types,
+                                     n_jobs=4)
     """ # noqa
     if initial_types is None:
         if hasattr(model, 'infer_initial_types'):
@@ -117,6 +162,7 @@ def convert_sklearn(model, name=None, initial_types=None, doc_string='',
             raise ValueError('Initial types are required. See usage of '
                              'convert(...) in skl2onnx.convert for details')
 
+    _check_n_jobs(n_jobs)
     if name is None:
         name = str(uuid4().hex)
 
@@ -135,13 +181,21 @@ def convert_sklearn(model, name=None, initial_types=None, doc_string='',
 
     # Convert our Topology object into ONNX. The outcome is an ONNX model.
     onnx_model = convert_topology(topology, name, doc_string, target_opset,
-                                  dtype=dtype, options=options)
+                                  dtype=dtype, options=options, n_jobs=n_jobs,
+                                  fragment_cache=fragment_cache)
+
+    if external_data is not None:
+        from .helpers.onnx_helper import save_initializers_as_external_data
+        save_initializers_as_external_data(
+            onnx_model, external_data, size_threshold=external_data_threshold)
 
     return (onnx_model, topology) if intermediate else onnx_model
 
 
 def to_onnx(model, X=None, name=None, initial_types=None,
-            target_opset=None, options=None, dtype=np.float32):
+            target_opset=None, options=None, dtype=np.float32,
+            external_data=None, external_data_threshold=1024,
+            n_jobs=None):
     """
     Calls :func:`convert_sklearn` with simplified parameters.
 
@@ -156,6 +210,9 @@ def to_onnx(model, X=None, name=None, initial_types=None,
     :param name: name of the model
     :param dtype: float type to use everywhere in the graph,
         `np.float32` or `np.float64`
+    :param external_data: see :func:`convert_sklearn`
+    :param external_data_threshold: see :func:`convert_sklearn`
+    :param n_jobs: see :func:`convert_sklearn`
     :return: converted model
 
     This function checks if the model inherits from class
@@ -172,6 +229,9 @@ def to_onnx(model, X=None, name=None, initial_types=None,
         if options is not None:
             raise NotImplementedError(
                 "options not yet implemented for OnnxOperatorMixin.")
+        if external_data is not None:
+            raise NotImplementedError(
+                "external_data not yet implemented for OnnxOperatorMixin.")
         return model.to_onnx(X=X, name=name, dtype=dtype)
     if name is None:
         name = "ONNX(%s)" % model.__class__.__name__
@@ -181,7 +241,202 @@ def to_onnx(model, X=None, name=None, initial_types=None,
             "dtype should be real not {}".format(dtype))
     return convert_sklearn(model, initial_types=initial_types,
                            target_opset=target_opset,
-                           name=name, options=options, dtype=dtype)
+                           name=name, options=options, dtype=dtype,
+                           external_data=external_data,
+                           external_data_threshold=external_data_threshold,
+                           n_jobs=n_jobs)
+
+
+def _check_n_jobs(n_jobs):
+    "Raises an exception if *n_jobs* is not None or a non null integer."
+    if n_jobs is not None and (
+            not isinstance(n_jobs, numbers.Integral) or
+            isinstance(n_jobs, bool) or n_jobs == 0):
+        raise ValueError(
+            "n_jobs must be None or a non null integer not {!r}.".format(
+                n_jobs))
+
+
+def _convert_sklearn_bytes(args):
+    """
+    Converts one model for :func:`convert_sklearn_many`,
+    it returns *(index, serialized model, None)* or
+    *(index, None, exception)*.
+    """
+    index, model, initial_types, kwargs = args
+    try:
+        onx = convert_sklearn(model, initial_types=initial_types, **kwargs)
+        return index, onx.SerializeToString(), None
+    except Exception as e:
+        return index, None, e
+
+
+def _convert_sklearn_pickled(args):
+    """
+    Same as *_convert_sklearn_bytes* but the model is pickled
+    and every returned exception can be pickled.
+    """
+    index, model, initial_types, kwargs = args
+    index, content, exc = _convert_sklearn_bytes(
+        (index, pickle.loads(model), initial_types, kwargs))
+    if exc is not None:
+        try:
+            pickle.dumps(exc)
+        except Exception:
+            exc = RuntimeError("{}: {}".format(type(exc).__name__, exc))
+    return index, content, exc
+
+
+def _registration_maps():
+    """
+    Returns the dictionaries which register models, converters,
+    shape calculators and parsers.
+    """
+    from ._parse import sklearn_parsers_map
+    from ._supported_operators import sklearn_operator_name_map
+    from .common._registration import (
+        _converter_pool, _shape_calculator_pool)
+    return [sklearn_operator_name_map, _converter_pool,
+            _shape_calculator_pool, sklearn_parsers_map]
+
+
+def _registered_converters():
+    """
+    Returns the content of *_registration_maps* which can be sent
+    to a spawned process, it does not inherit the converters
+    registered by the user.
+    """
+    registrations = []
+    for registered in _registration_maps():
+        picklable = {}
+        for key, value in registered.items():
+            try:
+                pickle.dumps((key, value))
+            except Exception:
+                # a lambda function cannot be sent
+                continue
+            picklable[key] = value
+        registrations.append(picklable)
+    return registrations
+
+
+def _init_spawned_process(registrations):
+    "Registers the converters received by a spawned process."
+    from .common._registration import load_all_converters
+    # every converter must be loaded before it is overwritten
+    load_all_converters()
+    for registered, received in zip(_registration_maps(), registrations):
+        registered.update(received)
+
+
+def convert_sklearn_many(models, initial_types=None, n_jobs=None, **kwargs):
+    """
+    Converts many models with a pool of processes.
+    Converters are imported once by every process
+    and reused for every model the process converts.
+
+    :param models: iterable on fitted models, it is consumed
+        while the models are converted, at most twice as many models
+        as processes are waiting for a process
+    :param initial_types: initial types shared by every model or
+        a function returning the initial types of a model
+        (see :func:`convert_sklearn`)
+    :param n_jobs: number of processes, None or 1 converts the models
+        in the current process, -1 uses every core
+    :param kwargs: any other parameter of :func:`convert_sklearn`
+        shared by every model except *intermediate* and *external_data*,
+        models are copied into the processes so *options* cannot
+        be keyed by ``id(model)`` if *n_jobs* is not 1
+    :return: iterator on tuples *(index, content, exception)*
+        in the same order as *models*, *content* is the converted model
+        serialized into bytes or None if the conversion failed,
+        *exception* is None or the exception raised by the conversion
+        or by *initial_types*
+
+    A failing conversion does not stop the others.
+    Processes are forked on Linux, they are spawned on other
+    systems and receive the converters registered with
+    :func:`update_registered_converter
+    <skl2onnx.update_registered_converter>` if they can be pickled.
+
+    ::
+
+        for i, content, exc in convert_sklearn_many(
+                models, initial_types=[('X', FloatTensorType([None, 4]))],
+                n_jobs=4):
+            if exc is not None:
+                print("model %d failed due to %r" % (i, exc))
+                continue
+            with open("model%d.onnx" % i, "wb") as f:
+                f.write(content)
+    """
+    if kwargs.get('intermediate', False):
+        raise ValueError(
+            "intermediate=True is not supported by convert_sklearn_many.")
+    if kwargs.get('external_data', None) is not None:
+        raise NotImplementedError(
+            "external_data is not supported by convert_sklearn_many.")
+
+    _check_n_jobs(n_jobs)
+    if n_jobs is None:
+        n_jobs = 1
+    elif n_jobs < 0:
+        n_jobs = max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return _convert_sklearn_many(models, initial_types, n_jobs, kwargs)
+
+
+def _convert_sklearn_many(models, initial_types, n_jobs, kwargs):
+    "Implements :func:`convert_sklearn_many`."
+    def tasks(pickled):
+        """
+        Yields the arguments of every conversion or
+        *(index, None, exception)* if it cannot start.
+        """
+        for i, model in enumerate(models):
+            try:
+                types = (initial_types(model) if callable(initial_types)
+                         else initial_types)
+            except Exception as e:
+                yield i, None, e
+                continue
+            if pickled:
+                # A model which cannot be pickled must not stop the pool.
+                try:
+                    model = pickle.dumps(model, pickle.HIGHEST_PROTOCOL)
+                except Exception as e:
+                    yield i, None, RuntimeError(
+                        "Unable to pickle model {} due to {}".format(i, e))
+                    continue
+            yield i, model, types, kwargs
+
+    if n_jobs == 1:
+        for task in tasks(False):
+            yield task if len(task) == 3 else _convert_sklearn_bytes(task)
+        return
+
+    if _can_fork():
+        # forked processes inherit the registered converters
+        context = multiprocessing.get_context('fork')
+        initializer, initargs = None, ()
+    else:
+        context = multiprocessing.get_context('spawn')
+        initializer = _init_spawned_process
+        initargs = (_registered_converters(), )
+    pending = deque()
+    with context.Pool(n_jobs, initializer=initializer,
+                      initargs=initargs) as pool:
+        for task in tasks(True):
+            if len(task) == 3:
+                pending.append(task)
+            else:
+                pending.append(pool.apply_async(
+                    _convert_sklearn_pickled, (task, )))
+            if len(pending) >= 2 * n_jobs:
+                res = pending.popleft()
+                yield res if isinstance(res, tuple) else res.get()
+        while pending:
+            res = pending.popleft()
+            yield res if isinstance(res, tuple) else res.get()
 
 
 def wrap_as_onnx_mixin(model):
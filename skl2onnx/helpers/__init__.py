@@ -6,3 +6,4 @@
 
 from .investigate import collect_intermediate_steps, compare_objects  # noqa
 from .investigate import enumerate_pipeline_models  # noqa
+from ..common._profiling import ConversionProfiler  # noqa
@@ -0,0 +1,451 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+On-disk cache for converted models.
+"""
+import functools
+import hashlib
+import os
+from collections import OrderedDict
+import pickle
+import tempfile
+from types import CodeType, ModuleType
+import numpy as np
+import onnx
+from scipy.sparse import issparse
+from sklearn import __version__ as sklearn_version
+from .. import __version__ as skl2onnx_version
+from ..convert import convert_sklearn
+
+
+_scalar_types = (type(None), bool, int, float, str, np.generic)
+
+
+class FingerprintError(ValueError):
+    """
+    Raised when an object a conversion depends on cannot
+    be hashed reliably. Such a conversion is not cached.
+    """
+    pass
+
+
+class _Fingerprint:
+    """
+    Computes a stable hash of any object a conversion depends on.
+    Classes are hashed by name, functions by name, bytecode,
+    default values and the content of their closure,
+    *functools.partial* by function and arguments.
+    Every estimator met while walking through the model receives
+    a number so that options keyed by ``id(estimator)``
+    hash to the same value in every process.
+    """
+
+    def __init__(self):
+        self.hash = hashlib.sha256()
+        self.ids = {}
+
+    def update(self, obj):
+        h = self.hash
+        if obj is None or isinstance(obj, (bool, int, float, complex, str)):
+            h.update(("%s:%r;" % (type(obj).__name__, obj)).encode('utf-8'))
+        elif isinstance(obj, bytes):
+            h.update(b"bytes:%d;" % len(obj))
+            h.update(obj)
+        elif isinstance(obj, (np.ndarray, np.generic)):
+            self._update_array(np.asarray(obj))
+        elif isinstance(obj, (list, tuple)):
+            h.update(("%s:%d[" % (type(obj).__name__, len(obj))).encode())
+            for o in obj:
+                self.update(o)
+            h.update(b"]")
+        elif isinstance(obj, (set, frozenset)):
+            h.update(("%s:%d{" % (type(obj).__name__, len(obj))).encode())
+            if all(type(k) is str for k in obj):
+                h.update(pickle.dumps(sorted(obj), protocol=4))
+            else:
+                for key in sorted(self._key(k) for k in obj):
+                    h.update(key)
+            h.update(b"}")
+        elif (isinstance(obj, dict) and
+                all(type(k) is str for k in obj) and
+                all(isinstance(v, _scalar_types) for v in obj.values())):
+            # vocabularies, much faster than hashing every item
+            h.update(("sdict:%d{" % len(obj)).encode())
+            keys = sorted(obj)
+            values = [obj[k] for k in keys]
+            h.update(pickle.dumps(keys, protocol=4))
+            if len(set(map(type, values))) == 1 and isinstance(
+                    values[0], np.generic):
+                self._update_array(np.array(values))
+            else:
+                h.update(pickle.dumps(values, protocol=4))
+            h.update(b"}")
+        elif isinstance(obj, dict):
+            h.update(("dict:%d{" % len(obj)).encode())
+            keys = [(self._key(k), k) for k in obj]
+            for key, k in sorted(keys, key=lambda kv: kv[0]):
+                h.update(key)
+                self.update(obj[k])
+            h.update(b"}")
+        elif isinstance(obj, CodeType):
+            h.update(b"code:")
+            self.update([obj.co_code, obj.co_consts, obj.co_names])
+        elif id(obj) in self.ids:
+            h.update(("ref:%d;" % self.ids[id(obj)]).encode())
+        elif isinstance(obj, functools.partial):
+            self.ids[id(obj)] = len(self.ids)
+            h.update(b"partial:")
+            self.update([obj.func, obj.args, obj.keywords])
+        elif isinstance(obj, type) or callable(obj) and hasattr(
+                obj, '__qualname__'):
+            h.update(("type:%s.%s;" % (
+                getattr(obj, '__module__', ''),
+                obj.__qualname__)).encode('utf-8'))
+            if not isinstance(obj, type):
+                self._update_callable(obj)
+        else:
+            self.ids[id(obj)] = len(self.ids)
+            cl = obj.__class__
+            h.update(("object:%s.%s(" % (
+                cl.__module__, cl.__qualname__)).encode('utf-8'))
+            if issparse(obj):
+                obj = obj.tocsr()
+                self.update([obj.shape, obj.data, obj.indices, obj.indptr])
+            elif hasattr(obj, '__getstate__'):
+                self.update(obj.__getstate__())
+            elif hasattr(obj, '__dict__'):
+                self.update(obj.__dict__)
+            else:
+                try:
+                    self.update(pickle.dumps(obj))
+                except Exception as e:
+                    raise FingerprintError(
+                        "Unable to hash an object of type %r." % cl) from e
+            h.update(b")")
+
+    def _update_callable(self, obj):
+        # a function or a method may capture values its name
+        # and its bytecode do not reveal
+        self.ids[id(obj)] = len(self.ids)
+        owner = getattr(obj, '__self__', None)
+        if owner is not None and not isinstance(owner, ModuleType):
+            self.update(owner)
+        code = getattr(obj, '__code__', None)
+        if code is None:
+            return
+        # a function edited since the previous conversion
+        # keeps its name
+        self.update(code)
+        self.update([getattr(obj, '__defaults__', None),
+                     getattr(obj, '__kwdefaults__', None)])
+        cells = getattr(obj, '__closure__', None) or ()
+        try:
+            self.update([c.cell_contents for c in cells])
+        except ValueError as e:
+            raise FingerprintError(
+                "Unable to hash the closure of %r." % obj) from e
+
+    def _key(self, k):
+        # options may be keyed by id(estimator)
+        if isinstance(k, int) and not isinstance(k, bool) and k in self.ids:
+            return ("estimator:%d" % self.ids[k]).encode()
+        sub = _Fingerprint()
+        sub.ids = self.ids
+        sub.update(k)
+        return sub.hash.digest()
+
+    def _update_array(self, arr):
+        h = self.hash
+        h.update(("array:%s:%r;" % (arr.dtype.str, arr.shape)).encode())
+        if arr.dtype.kind == 'O':
+            self.update(arr.ravel().tolist())
+        else:
+            h.update(np.ascontiguousarray(arr).tobytes())
+
+
+def get_conversion_key(model, initial_types=None, target_opset=None,
+                       options=None, **kwargs):
+    """
+    Returns a key which identifies the conversion of a fitted model.
+    It hashes the fitted model, the conversion parameters
+    and the versions of *skl2onnx* and *scikit-learn*.
+
+    :param model: fitted model
+    :param initial_types: see :func:`convert_sklearn`
+    :param target_opset: see :func:`convert_sklearn`
+    :param options: see :func:`convert_sklearn`
+    :param kwargs: any other parameter of :func:`convert_sklearn`,
+        *n_jobs* is ignored as it does not change the converted model
+    :return: hexadecimal string
+    :raises FingerprintError: if the model holds an object
+        which cannot be hashed reliably
+    """
+    kwargs.pop('n_jobs', None)
+    fingerprint = _Fingerprint()
+    fingerprint.update([skl2onnx_version, sklearn_version, onnx.__version__])
+    fingerprint.update(model)
+    fingerprint.update(initial_types)
+    fingerprint.update(target_opset)
+    fingerprint.update(options)
+    fingerprint.update(kwargs)
+    return fingerprint.hash.hexdigest()
+
+
+def get_model_fingerprint(model):
+    """
+    Returns a hash of a fitted model (hexadecimal string).
+    """
+    fingerprint = _Fingerprint()
+    fingerprint.update(model)
+    return fingerprint.hash.hexdigest()
+
+
+def get_fragment_key(model_fingerprint, operator_type, converter,
+                     input_types, output_types, target_opset, dtype,
+                     options):
+    """
+    Returns a key which identifies the conversion of one operator
+    of a topology, see :class:`FragmentCache`.
+
+    :param model_fingerprint: fingerprint of the fitted model
+        the operator converts (see :func:`get_model_fingerprint`)
+    :param operator_type: operator alias
+    :param converter: conversion function
+    :param input_types: types of the inputs
+    :param output_types: types of the outputs
+    :param target_opset: targeted opset
+    :param dtype: float type used by the conversion
+    :param options: options given to the converter for this model
+    :return: hexadecimal string
+    """
+    fingerprint = _Fingerprint()
+    fingerprint.update([skl2onnx_version, sklearn_version, onnx.__version__])
+    fingerprint.update([model_fingerprint, operator_type, converter,
+                        input_types, output_types, target_opset,
+                        np.dtype(dtype).str, options])
+    return fingerprint.hash.hexdigest()
+
+
+def _evict_files(cache_dir, max_size, extensions):
+    """
+    Removes the least recently used entries of folder *cache_dir*
+    until its size is below *max_size*. An entry is made of every
+    file sharing the same name with an extension in *extensions*.
+    """
+    entries = {}
+    for name in os.listdir(cache_dir):
+        key, ext = os.path.splitext(name)
+        if ext not in extensions:
+            continue
+        path = os.path.join(cache_dir, name)
+        st = os.stat(path)
+        mtime, size, paths = entries.get(key, (0, 0, []))
+        entries[key] = (max(mtime, st.st_mtime), size + st.st_size,
+                        paths + [path])
+    total = sum(e[1] for e in entries.values())
+    for _, size, paths in sorted(entries.values()):
+        if total <= max_size:
+            break
+        for path in paths:
+            os.remove(path)
+        total -= size
+
+
+class ConversionCache:
+    """
+    Stores converted models in folder *cache_dir*.
+    The least recently used models are removed once
+    the total size of the folder exceeds *max_size* bytes.
+
+    ::
+
+        cache = ConversionCache("onnx_cache")
+        onx = cache.convert_sklearn(model, initial_types=initial_types)
+
+    A cache hit skips the parsing, the compilation of the
+    topology and the conversion.
+    """
+
+    def __init__(self, cache_dir, max_size=2 ** 30):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".onnx")
+
+    def get(self, key):
+        """
+        Returns the model stored for *key* or None.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except (IOError, OSError):
+            return None
+        # updates the access time used by the eviction
+        os.utime(path, None)
+        model = onnx.ModelProto()
+        model.ParseFromString(content)
+        return model
+
+    def put(self, key, model):
+        """
+        Stores *model* for *key* and evicts the least
+        recently used models if the cache is too big.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(model.SerializeToString())
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used models until the
+        size of the cache is below *max_size*.
+        """
+        _evict_files(self.cache_dir, self.max_size, (".onnx", ))
+
+    def convert_sklearn(self, model, name=None, initial_types=None,
+                        target_opset=None, options=None, **kwargs):
+        """
+        Calls :func:`convert_sklearn <skl2onnx.convert_sklearn>`
+        unless the conversion is already cached.
+        Parameters *intermediate* and *external_data* are not supported.
+        A model which cannot be hashed reliably
+        (see :class:`FingerprintError`) is converted but not cached.
+        """
+        if kwargs.get('intermediate', False):
+            raise NotImplementedError(
+                "intermediate=True cannot be cached.")
+        if kwargs.get('external_data', None) is not None:
+            raise NotImplementedError(
+                "A model using external data cannot be cached.")
+        try:
+            key = get_conversion_key(
+                model, initial_types=initial_types,
+                target_opset=target_opset, options=options,
+                name=name, **kwargs)
+        except FingerprintError:
+            key = None
+        onx = None if key is None else self.get(key)
+        if onx is None:
+            onx = convert_sklearn(model, name=name,
+                                  initial_types=initial_types,
+                                  target_opset=target_opset,
+                                  options=options, **kwargs)
+            if key is not None:
+                self.put(key, onx)
+        return onx
+
+
+class FragmentCache:
+    """
+    Stores the conversion of every operator of a topology
+    so that the next conversion of a model only converts
+    the steps which changed. A fragment holds the nodes and
+    the initializers one converter produced with temporary names,
+    the final names are given when it is merged.
+
+    ::
+
+        cache = FragmentCache()
+        onx = convert_sklearn(pipe, initial_types=initial_types,
+                              fragment_cache=cache)
+        pipe.steps[-1][1].fit(X, y)
+        # only the last step is converted again
+        onx = convert_sklearn(pipe, initial_types=initial_types,
+                              fragment_cache=cache)
+
+    Fragments are kept in memory if *cache_dir* is None,
+    in folder *cache_dir* otherwise. Every fragment is stored as
+    a serialized *GraphProto* and a JSON manifest with the names
+    to request, nothing is unpickled. The least recently used
+    fragments are removed once their total size exceeds *max_size*
+    bytes. The model is parsed and its shapes are inferred again,
+    only the converters are skipped. Operators whose converter
+    declares new operators (such as *TfidfVectorizer* or
+    *VotingClassifier*) are always converted, the declared operators
+    are cached. The key of a fragment includes the bytecode of the
+    converter. The converted model is the same with or without the cache.
+    """
+
+    def __init__(self, cache_dir=None, max_size=2 ** 30):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.fragments = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir is not None and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _paths(self, key):
+        return (os.path.join(self.cache_dir, key + ".json"),
+                os.path.join(self.cache_dir, key + ".graph"))
+
+    def get(self, key):
+        """
+        Returns the fragment stored for *key* or None,
+        a fragment is a tuple (manifest, graph), *manifest* is
+        a JSON string, *graph* a serialized *GraphProto*.
+        """
+        if self.cache_dir is None:
+            content = self.fragments.get(key, None)
+            if content is not None:
+                self.fragments.move_to_end(key)
+        else:
+            content = []
+            try:
+                for path, mode in zip(self._paths(key), ["r", "rb"]):
+                    with open(path, mode) as f:
+                        content.append(f.read())
+                    # updates the access time used by the eviction
+                    os.utime(path, None)
+                content = tuple(content)
+            except (IOError, OSError):
+                content = None
+        if content is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return content
+
+    def put(self, key, manifest, graph):
+        """
+        Stores a fragment for *key* and evicts the least recently
+        used fragments if the cache is too big.
+
+        :param key: see :func:`get_fragment_key`
+        :param manifest: JSON string
+        :param graph: serialized *GraphProto*
+        """
+        if self.cache_dir is None:
+            self.fragments[key] = (manifest, graph)
+            self.fragments.move_to_end(key)
+        else:
+            for path, content in zip(self._paths(key),
+                                     [manifest.encode('utf-8'), graph]):
+                fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(content)
+                os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used fragments until the
+        size of the cache is below *max_size*.
+        """
+        if self.cache_dir is not None:
+            _evict_files(self.cache_dir, self.max_size, (".json", ".graph"))
+            return
+        total = sum(len(m) + len(g) for m, g in self.fragments.values())
+        while total > self.max_size and self.fragments:
+            manifest, graph = self.fragments.popitem(last=False)[1]
+            total -= len(manifest) + len(graph)
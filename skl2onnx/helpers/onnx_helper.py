@@ -4,9 +4,10 @@
 # license information.
 # --------------------------------------------------------------------------
 
+import os
 from io import BytesIO
 import onnx
-from onnx import shape_inference
+from onnx import shape_inference, numpy_helper
 from ..proto.onnx_helper_modified import (
     make_node, make_tensor_value_info, make_graph,
     make_model, ValueInfoProto
@@ -23,8 +24,8 @@ def load_onnx_model(onnx_file_or_bytes):
     :return: *ONNX* model
     """
     if isinstance(onnx_file_or_bytes, str):
-        with open(onnx_file_or_bytes, "rb") as f:
-            return onnx.load(f)
+        # onnx.load also loads external data stored next to the file
+        return onnx.load(onnx_file_or_bytes)
     elif hasattr(onnx_file_or_bytes, 'read'):
         return onnx.load(onnx_file_or_bytes)
     else:
@@ -32,14 +33,44 @@ def load_onnx_model(onnx_file_or_bytes):
         return onnx.load(b)
 
 
-def save_onnx_model(model, filename=None):
+def save_onnx_model(model, filename=None, external_data=None,
+                    size_threshold=1024, alignment=4096):
     """
     Saves a model as a file or bytes.
 
     :param model: *ONNX* model
     :param filename: filename or None to return bytes
+    :param external_data: if not None, initializers bigger than
+        *size_threshold* bytes are saved into this file following
+        the external data convention of *ONNX*, a relative path is
+        relative to the folder of *filename*, the file must be
+        in this folder or one of its subfolders
+    :param size_threshold: see *external_data*
+    :param alignment: see :func:`save_initializers_as_external_data`
     :return: bytes
+
+    The initializers of *model* are modified inplace
+    when *external_data* is specified. The model stores the
+    location of the data relative to the folder of *filename*,
+    or the basename of *external_data* if *filename*
+    is not a filename.
     """
+    if external_data is not None:
+        if isinstance(filename, str):
+            folder = os.path.dirname(os.path.abspath(filename))
+            path = os.path.join(folder, external_data)
+            location = os.path.relpath(path, folder)
+            if location.split(os.sep)[0] == os.pardir:
+                raise ValueError(
+                    "External data '{}' must be stored in the folder "
+                    "of the model '{}' or one of its subfolders.".format(
+                        external_data, folder))
+        else:
+            path = external_data
+            location = os.path.basename(external_data)
+        save_initializers_as_external_data(
+            model, path, location=location,
+            size_threshold=size_threshold, alignment=alignment)
     content = model.SerializeToString()
     if filename is not None:
         if hasattr(filename, 'write'):
@@ -50,6 +81,72 @@ def save_onnx_model(model, filename=None):
     return content
 
 
+def save_initializers_as_external_data(model, path, location=None,
+                                       size_threshold=1024, alignment=4096):
+    """
+    Moves every initializer bigger than *size_threshold* bytes
+    into file *path* and replaces its content by a reference to
+    this file (external data). Every tensor starts at an offset
+    multiple of *alignment* so that a runtime can memory-map it.
+
+    :param model: *ONNX* model, modified inplace
+    :param path: file which receives the initializers
+    :param location: location stored in the model, it must be
+        relative to the folder the model is saved into, it is
+        the basename of *path* by default
+    :param size_threshold: smaller initializers remain in the model
+    :param alignment: alignment of every tensor in the file
+    :return: *model*
+
+    The file is not created if no initializer is big enough.
+    New data is appended to the file if initializers of the model
+    already reference *location*, it is overwritten otherwise.
+    """
+    if location is None:
+        location = os.path.basename(path)
+    tensors = []
+    append = False
+    for tensor in model.graph.initializer:
+        if tensor.data_type == onnx_proto.TensorProto.STRING:
+            continue
+        if tensor.data_location == onnx_proto.TensorProto.EXTERNAL:
+            # Data already stored in the same file must be kept.
+            info = {e.key: e.value for e in tensor.external_data}
+            if info.get('location', None) == location:
+                append = True
+            continue
+        if tensor.HasField('raw_data'):
+            raw_data = tensor.raw_data
+        else:
+            raw_data = numpy_helper.to_array(tensor).tobytes()
+        if len(raw_data) >= size_threshold:
+            tensors.append((tensor, raw_data))
+    if len(tensors) == 0:
+        return model
+
+    with open(path, "ab" if append else "wb") as f:
+        offset = f.tell()
+        for tensor, raw_data in tensors:
+            if offset % alignment != 0:
+                padding = alignment - offset % alignment
+                f.write(b'\0' * padding)
+                offset += padding
+            f.write(raw_data)
+            for field in ['float_data', 'int32_data', 'int64_data',
+                          'double_data', 'uint64_data', 'raw_data']:
+                tensor.ClearField(field)
+            del tensor.external_data[:]
+            for key, value in [('location', location),
+                               ('offset', offset),
+                               ('length', len(raw_data))]:
+                entry = tensor.external_data.add()
+                entry.key = key
+                entry.value = str(value)
+            tensor.data_location = onnx_proto.TensorProto.EXTERNAL
+            offset += len(raw_data)
+    return model
+
+
 def enumerate_model_node_outputs(model, add_node=False):
     """
     Enumerates all the nodes of a model.
@@ -5,93 +5,92 @@
 # --------------------------------------------------------------------------
 
 # To register a converter for scikit-learn operators,
-# import associated modules here.
-from . import ada_boost
-from . import array_feature_extractor
-from . import bagging
-from . import binariser
-from . import calibrated_classifier_cv
-from . import concat_op
-from . import decision_tree
-from . import decomposition
-from . import dict_vectoriser
-from . import feature_selection
-from . import flatten_op
-from . import function_transformer
-from . import gaussian_process
-from . import gaussian_mixture
-from . import gradient_boosting
-from . import grid_search_cv
-from . import imputer_op
-from . import k_bins_discretiser
-from . import k_means
-from . import label_binariser
-from . import label_encoder
-from . import linear_classifier
-from . import linear_regressor
-from . import multilayer_perceptron
-from . import multiply_op
-from . import naive_bayes
-from . import nearest_neighbours
-from . import normaliser
-from . import one_hot_encoder
-from . import one_vs_rest_classifier
-from . import ordinal_encoder
-from . import polynomial_features
-from . import random_forest
-from . import ransac_regressor
-from . import scaler_op
-from . import sgd_classifier
-from . import support_vector_machines
-from . import text_vectoriser
-from . import tfidf_transformer
-from . import tfidf_vectoriser
-from . import voting_classifier
-from . import voting_regressor
-from . import zip_map
+# add the associated module here. The module is only imported
+# the first time the converter of one of its operators is needed.
+from ..common._registration import register_converter_modules
 
-__all__ = [
-    ada_boost,
-    array_feature_extractor,
-    bagging,
-    binariser,
-    calibrated_classifier_cv,
-    concat_op,
-    decision_tree,
-    decomposition,
-    dict_vectoriser,
-    feature_selection,
-    flatten_op,
-    function_transformer,
-    gaussian_process,
-    gaussian_mixture,
-    gradient_boosting,
-    grid_search_cv,
-    imputer_op,
-    k_bins_discretiser,
-    k_means,
-    label_binariser,
-    label_encoder,
-    linear_classifier,
-    linear_regressor,
-    multilayer_perceptron,
-    multiply_op,
-    naive_bayes,
-    nearest_neighbours,
-    normaliser,
-    one_hot_encoder,
-    one_vs_rest_classifier,
-    ordinal_encoder,
-    polynomial_features,
-    random_forest,
-    ransac_regressor,
-    scaler_op,
-    sgd_classifier,
-    support_vector_machines,
-    text_vectoriser,
-    tfidf_transformer,
-    tfidf_vectoriser,
-    voting_classifier,
-    voting_regressor,
-    zip_map,
-]
+_converter_modules = {
+    'SklearnAdaBoostClassifier': 'ada_boost',
+    'SklearnAdaBoostRegressor': 'ada_boost',
+    'SklearnArrayFeatureExtractor': 'array_feature_extractor',
+    'SklearnBaggingClassifier': 'bagging',
+    'SklearnBaggingRegressor': 'bagging',
+    'SklearnBayesianGaussianMixture': 'gaussian_mixture',
+    'SklearnBernoulliNB': 'naive_bayes',
+    'SklearnBinarizer': 'binariser',
+    'SklearnCalibratedClassifierCV': 'calibrated_classifier_cv',
+    'SklearnComplementNB': 'naive_bayes',
+    'SklearnConcat': 'concat_op',
+    'SklearnCountVectorizer': 'text_vectoriser',
+    'SklearnDecisionTreeClassifier': 'decision_tree',
+    'SklearnDecisionTreeRegressor': 'decision_tree',
+    'SklearnDictVectorizer': 'dict_vectoriser',
+    'SklearnExtraTreeClassifier': 'decision_tree',
+    'SklearnExtraTreeRegressor': 'decision_tree',
+    'SklearnExtraTreesClassifier': 'random_forest',
+    'SklearnExtraTreesRegressor': 'random_forest',
+    'SklearnFlatten': 'flatten_op',
+    'SklearnFunctionTransformer': 'function_transformer',
+    'SklearnGaussianMixture': 'gaussian_mixture',
+    'SklearnGaussianNB': 'naive_bayes',
+    'SklearnGaussianProcessRegressor': 'gaussian_process',
+    'SklearnGenericUnivariateSelect': 'feature_selection',
+    'SklearnGradientBoostingClassifier': 'gradient_boosting',
+    'SklearnGradientBoostingRegressor': 'gradient_boosting',
+    'SklearnGridSearchCV': 'grid_search_cv',
+    'SklearnImputer': 'imputer_op',
+    'SklearnIncrementalPCA': 'decomposition',
+    'SklearnKBinsDiscretizer': 'k_bins_discretiser',
+    'SklearnKMeans': 'k_means',
+    'SklearnKNeighborsClassifier': 'nearest_neighbours',
+    'SklearnKNeighborsRegressor': 'nearest_neighbours',
+    'SklearnLabelBinarizer': 'label_binariser',
+    'SklearnLabelEncoder': 'label_encoder',
+    'SklearnLinearClassifier': 'linear_classifier',
+    'SklearnLinearRegressor': 'linear_regressor',
+    'SklearnLinearSVC': 'linear_classifier',
+    'SklearnLinearSVR': 'linear_regressor',
+    'SklearnMLPClassifier': 'multilayer_perceptron',
+    'SklearnMLPRegressor': 'multilayer_perceptron',
+    'SklearnMaxAbsScaler': 'scaler_op',
+    'SklearnMinMaxScaler': 'scaler_op',
+    'SklearnMiniBatchKMeans': 'k_means',
+    'SklearnMultinomialNB': 'naive_bayes',
+    'SklearnMultiply': 'multiply_op',
+    'SklearnNearestNeighbors': 'nearest_neighbours',
+    'SklearnNormalizer': 'normaliser',
+    'SklearnOneClassSVM': 'support_vector_machines',
+    'SklearnOneHotEncoder': 'one_hot_encoder',
+    'SklearnOneVsRestClassifier': 'one_vs_rest_classifier',
+    'SklearnOrdinalEncoder': 'ordinal_encoder',
+    'SklearnPCA': 'decomposition',
+    'SklearnPolynomialFeatures': 'polynomial_features',
+    'SklearnRANSACRegressor': 'ransac_regressor',
+    'SklearnRFE': 'feature_selection',
+    'SklearnRFECV': 'feature_selection',
+    'SklearnRandomForestClassifier': 'random_forest',
+    'SklearnRandomForestRegressor': 'random_forest',
+    'SklearnRobustScaler': 'scaler_op',
+    'SklearnSGDClassifier': 'sgd_classifier',
+    'SklearnSVC': 'support_vector_machines',
+    'SklearnSVR': 'support_vector_machines',
+    'SklearnScaler': 'scaler_op',
+    'SklearnSelectFdr': 'feature_selection',
+    'SklearnSelectFpr': 'feature_selection',
+    'SklearnSelectFromModel': 'feature_selection',
+    'SklearnSelectFwe': 'feature_selection',
+    'SklearnSelectKBest': 'feature_selection',
+    'SklearnSelectPercentile': 'feature_selection',
+    'SklearnSimpleImputer': 'imputer_op',
+    'SklearnTfidfTransformer': 'tfidf_transformer',
+    'SklearnTfidfVectorizer': 'tfidf_vectoriser',
+    'SklearnTruncatedSVD': 'decomposition',
+    'SklearnVarianceThreshold': 'feature_selection',
+    'SklearnVotingClassifier': 'voting_classifier',
+    'SklearnVotingRegressor': 'voting_regressor',
+    'SklearnZipMap': 'zip_map',
+}
+
+register_converter_modules(converter_modules={
+    name: __name__ + '.' + module
+    for name, module in _converter_modules.items()})
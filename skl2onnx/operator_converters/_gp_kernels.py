@@ -268,7 +268,7 @@ def convert_kernel(kernel, X, output_names=None,
                                         output_names=output_names,
                                         op_version=op_version)
         else:
-            if len(x_train.shape) != 2:
+            if isinstance(x_train, np.ndarray) and len(x_train.shape) != 2:
                 raise NotImplementedError(
                     "Only DotProduct for two dimension train set is "
                     "implemented.")
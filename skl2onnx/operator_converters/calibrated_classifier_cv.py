@@ -387,7 +387,7 @@ def convert_sklearn_calibrated_classifier_cv(scope, operator, container):
     for clf in op.calibrated_classifiers_:
         if (hasattr(clf.base_estimator, 'decision_function') and
                 not isinstance(clf.base_estimator,
-                               decision_function_classifiers)):
+                               tuple(decision_function_classifiers))):
             raise NotImplementedError(
                 "'{0}' is not supported with CalibratedClassifierCV yet. "
                 "You may raise an issue at "
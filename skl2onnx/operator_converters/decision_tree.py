@@ -10,7 +10,10 @@ import six
 from ..common._apply_operation import apply_cast
 from ..common.data_types import Int64TensorType
 from ..common._registration import register_converter
-from ..common.tree_ensemble import add_tree_to_attribute_pairs
+from ..common.tree_ensemble import (
+    add_tree_to_attribute_pairs_array,
+    concatenate_tree_attribute_pairs
+)
 from ..common.tree_ensemble import get_default_tree_classifier_attribute_pairs
 from ..common.tree_ensemble import get_default_tree_regressor_attribute_pairs
 from ..proto import onnx_proto
@@ -36,8 +39,9 @@ def convert_sklearn_decision_tree_classifier(scope, operator, container):
     else:
         raise ValueError('Labels must be all integers or all strings.')
 
-    add_tree_to_attribute_pairs(attrs, True, op.tree_, 0, 1., 0, True,
-                                True, dtype=container.dtype)
+    add_tree_to_attribute_pairs_array(attrs, True, op.tree_, 0, 1., 0, True,
+                                      True, dtype=container.dtype)
+    concatenate_tree_attribute_pairs(attrs)
 
     container.add_node(
         op_type, operator.input_full_names,
@@ -52,8 +56,9 @@ def convert_sklearn_decision_tree_regressor(scope, operator, container):
     attrs = get_default_tree_regressor_attribute_pairs()
     attrs['name'] = scope.get_unique_operator_name(op_type)
     attrs['n_targets'] = int(op.n_outputs_)
-    add_tree_to_attribute_pairs(attrs, False, op.tree_, 0, 1., 0, False,
-                                True, dtype=container.dtype)
+    add_tree_to_attribute_pairs_array(attrs, False, op.tree_, 0, 1., 0,
+                                      False, True, dtype=container.dtype)
+    concatenate_tree_attribute_pairs(attrs)
 
     input_name = operator.input_full_names
     if type(operator.inputs[0].type) == Int64TensorType:
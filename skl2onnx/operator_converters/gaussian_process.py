@@ -3,12 +3,14 @@
 # Licensed under the MIT License. See License.txt in the project root for
 # license information.
 # --------------------------------------------------------------------------
+from collections import OrderedDict
 import numpy as np
 from sklearn.gaussian_process.kernels import ConstantKernel as C, RBF
 from ..common._registration import register_converter
+from ..common.data_types import FloatTensorType, DoubleTensorType
 from ..algebra.onnx_ops import (
     OnnxAdd, OnnxSqrt, OnnxMatMul, OnnxSub, OnnxReduceSum,
-    OnnxMul, OnnxMax
+    OnnxMul, OnnxMax, OnnxIdentity, OnnxScan, OnnxSqueeze
 )
 try:
     from ..algebra.onnx_ops import OnnxConstantOfShape
@@ -22,6 +24,67 @@ from ._gp_kernels import (
 )
 
 
+def _convert_mean_by_blocks(kernel, X, x_train, alpha, block_size,
+                            dtype=None, optim=None, op_version=None):
+    """
+    Returns the ONNX graph which computes
+    ``kernel(X, x_train) @ alpha`` with a Scan over blocks
+    of *block_size* training examples, every iteration adds
+    ``kernel(X, block) @ alpha_block`` to the result, the kernel
+    matrix [B, M] is never stored. The last block is padded
+    with null coefficients.
+    """
+    block_size = int(block_size)
+    if block_size <= 0:
+        raise ValueError(
+            "block_size must be positive not {}.".format(block_size))
+    alpha_2d = alpha.reshape((alpha.shape[0], -1))
+    n_examples, n_features = x_train.shape
+    n_blocks = (n_examples + block_size - 1) // block_size
+    blocks = np.zeros((n_blocks * block_size, n_features), dtype=dtype)
+    blocks[:n_examples] = x_train
+    alpha_blocks = np.zeros((n_blocks * block_size, alpha_2d.shape[1]),
+                            dtype=dtype)
+    alpha_blocks[:n_examples] = alpha_2d
+
+    k_block = convert_kernel(kernel, 'gpb_input_in', x_train='gpb_block',
+                             dtype=dtype, optim=optim,
+                             op_version=op_version)
+    sum_out = OnnxAdd(
+        'gpb_sum_in', OnnxMatMul(k_block, 'gpb_alpha',
+                                 op_version=op_version),
+        output_names=['gpb_sum_out'], op_version=op_version)
+    input_out = OnnxIdentity('gpb_input_in', output_names=['gpb_input_out'],
+                             op_version=op_version)
+    for node in [sum_out, input_out]:
+        node.set_onnx_name_prefix('gpb')
+    tensor_type = FloatTensorType if dtype == np.float32 else DoubleTensorType
+    scan_body = input_out.to_onnx(
+        OrderedDict([('gpb_input_in', tensor_type()),
+                     ('gpb_sum_in', tensor_type()),
+                     ('gpb_block', tensor_type()),
+                     ('gpb_alpha', tensor_type())]),
+        outputs=[('gpb_input_out', tensor_type()),
+                 ('gpb_sum_out', tensor_type())],
+        other_outputs=[sum_out],
+        dtype=dtype, target_opset=op_version)
+
+    # the sum is initialized with a null [B, T] tensor
+    init = OnnxAdd(
+        _zero_vector_of_size(X, keepdims=1, dtype=dtype,
+                             op_version=op_version),
+        np.zeros((1, alpha_2d.shape[1]), dtype=dtype),
+        op_version=op_version)
+    node = OnnxScan(
+        X, init, blocks.reshape((n_blocks, block_size, n_features)),
+        alpha_blocks.reshape((n_blocks, block_size, alpha_2d.shape[1])),
+        output_names=['scan0_{idself}', 'scan1_{idself}'],
+        num_scan_inputs=2, body=scan_body.graph, op_version=op_version)
+    if len(alpha.shape) == 1:
+        return OnnxSqueeze(node[1], axes=[1], op_version=op_version)
+    return node[1]
+
+
 def convert_gaussian_process_regressor(scope, operator, container):
     """
     The method *predict* from class *GaussianProcessRegressor*
@@ -32,6 +95,13 @@ def convert_gaussian_process_regressor(scope, operator, container):
     See example :ref:`l-gpr-example` to see how to
     use this converter which does not behave exactly
     as the others.
+
+    Option *block_size* bounds the memory used to predict with
+    a large training set, the kernel matrix between the batch and
+    the training set is not stored, a Scan computes it by blocks of
+    *block_size* training examples and accumulates the prediction.
+    It is not available with ``return_std=True`` which needs the
+    whole kernel matrix.
     """
     dtype = container.dtype
     if dtype is None:
@@ -45,7 +115,8 @@ def convert_gaussian_process_regressor(scope, operator, container):
 
     options = container.get_options(op, dict(return_cov=False,
                                              return_std=False,
-                                             optim=None))
+                                             optim=None,
+                                             block_size=None))
     if hasattr(op, 'kernel_') and op.kernel_ is not None:
         kernel = op.kernel_
     elif op.kernel is None:
@@ -79,13 +150,24 @@ def convert_gaussian_process_regressor(scope, operator, container):
         # y_mean = K_trans.dot(self.alpha_)  # Line 4 (y_mean = f_star)
         # y_mean = self._y_train_mean + y_mean  # undo normal.
 
-        k_trans = convert_kernel(kernel, X,
-                                 x_train=op.X_train_.astype(dtype),
-                                 dtype=dtype,
-                                 optim=options.get('optim', None),
-                                 op_version=opv)
-        k_trans.set_onnx_name_prefix('kgpd')
-        y_mean_b = OnnxMatMul(k_trans, op.alpha_.astype(dtype), op_version=opv)
+        if options['block_size'] is not None:
+            if options['return_std']:
+                raise NotImplementedError(
+                    "Option block_size cannot be used with return_std.")
+            y_mean_b = _convert_mean_by_blocks(
+                kernel, X, op.X_train_.astype(dtype),
+                op.alpha_.astype(dtype), options['block_size'],
+                dtype=dtype, optim=options.get('optim', None),
+                op_version=opv)
+        else:
+            k_trans = convert_kernel(kernel, X,
+                                     x_train=op.X_train_.astype(dtype),
+                                     dtype=dtype,
+                                     optim=options.get('optim', None),
+                                     op_version=opv)
+            k_trans.set_onnx_name_prefix('kgpd')
+            y_mean_b = OnnxMatMul(k_trans, op.alpha_.astype(dtype),
+                                  op_version=opv)
 
         mean_y = op._y_train_mean.astype(dtype)
         if len(mean_y.shape) == 1:
@@ -10,7 +10,10 @@ import six
 from ..common._apply_operation import apply_cast
 from ..common.data_types import Int64TensorType
 from ..common._registration import register_converter
-from ..common.tree_ensemble import add_tree_to_attribute_pairs
+from ..common.tree_ensemble import (
+    add_tree_to_attribute_pairs_array,
+    concatenate_tree_attribute_pairs
+)
 from ..common.tree_ensemble import get_default_tree_classifier_attribute_pairs
 from ..common.tree_ensemble import get_default_tree_regressor_attribute_pairs
 from ..proto import onnx_proto
@@ -66,17 +69,18 @@ def convert_sklearn_gradient_boosting_classifier(scope, operator, container):
     if op.n_classes_ == 2:
         for tree_id in range(n_est):
             tree = op.estimators_[tree_id][0].tree_
-            add_tree_to_attribute_pairs(attrs, True, tree, tree_id,
-                                        tree_weight, 0, False, True,
-                                        dtype=container.dtype)
+            add_tree_to_attribute_pairs_array(attrs, True, tree, tree_id,
+                                              tree_weight, 0, False, True,
+                                              dtype=container.dtype)
     else:
         for i in range(n_est):
             for c in range(op.n_classes_):
                 tree_id = i * op.n_classes_ + c
                 tree = op.estimators_[i][c].tree_
-                add_tree_to_attribute_pairs(attrs, True, tree, tree_id,
-                                            tree_weight, c, False, True,
-                                            dtype=container.dtype)
+                add_tree_to_attribute_pairs_array(
+                    attrs, True, tree, tree_id, tree_weight, c, False, True,
+                    dtype=container.dtype)
+    concatenate_tree_attribute_pairs(attrs)
 
     container.add_node(
             op_type, operator.input_full_names,
@@ -114,8 +118,10 @@ def convert_sklearn_gradient_boosting_regressor(scope, operator, container):
     for i in range(n_est):
         tree = op.estimators_[i][0].tree_
         tree_id = i
-        add_tree_to_attribute_pairs(attrs, False, tree, tree_id, tree_weight,
-                                    0, False, True, dtype=container.dtype)
+        add_tree_to_attribute_pairs_array(attrs, False, tree, tree_id,
+                                          tree_weight, 0, False, True,
+                                          dtype=container.dtype)
+    concatenate_tree_attribute_pairs(attrs)
 
     input_name = operator.input_full_names
     if type(operator.inputs[0].type) == Int64TensorType:
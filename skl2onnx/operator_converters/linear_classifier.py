@@ -21,18 +21,18 @@ def convert_sklearn_linear_classifier(scope, operator, container):
     op = operator.raw_operator
     classes = op.classes_
     number_of_classes = len(classes)
-    coefficients = op.coef_.flatten().astype(float).tolist()
+    coefficients = op.coef_.ravel().astype(float)
 
     if isinstance(op.intercept_, (float, np.float32)) and op.intercept_ == 0:
         # fit_intercept = False
-        intercepts = ([0.0] * number_of_classes if number_of_classes != 2 else
-                      [0.0])
+        intercepts = np.zeros(number_of_classes if number_of_classes != 2
+                              else 1)
     else:
-        intercepts = op.intercept_.tolist()
+        intercepts = np.asarray(op.intercept_, dtype=float).ravel()
 
     if number_of_classes == 2:
-        coefficients = list(map(lambda x: -1 * x, coefficients)) + coefficients
-        intercepts = list(map(lambda x: -1 * x, intercepts)) + intercepts
+        coefficients = np.concatenate([-coefficients, coefficients])
+        intercepts = np.concatenate([-intercepts, intercepts])
 
     multi_class = 0
     if hasattr(op, 'multi_class'):
@@ -4,21 +4,34 @@
 # license information.
 # --------------------------------------------------------------------------
 
+from collections import OrderedDict
 import numpy as np
+from sklearn.utils.extmath import row_norms
+
+from ..algebra.onnx_ops import (
+    OnnxAbs, OnnxConcat, OnnxGather, OnnxIdentity, OnnxMul,
+    OnnxPow, OnnxReduceSum, OnnxSub, OnnxTopK
+)
 
 from ..common._apply_operation import apply_abs, apply_cast, apply_mul
-from ..common._apply_operation import apply_add, apply_div
-from ..common._apply_operation import apply_reshape, apply_sub, apply_topk
-from ..common._apply_operation import apply_pow, apply_concat, apply_transpose
-from ..common.data_types import Int64TensorType
+from ..common._apply_operation import apply_add, apply_div, apply_gemm
+from ..common._apply_operation import apply_neg, apply_reshape
+from ..common._apply_operation import apply_sub, apply_topk
+from ..common._apply_operation import apply_pow, apply_concat
+from ..common.data_types import FloatTensorType, Int64TensorType
 from ..common._registration import register_converter
 from ..proto import onnx_proto
+try:
+    from ..algebra.onnx_ops import OnnxGatherElements
+except ImportError:
+    OnnxGatherElements = None
 
 
 def _calculate_distance(scope, container, sub_results_name, metric,
                         distance_power):
     """
-    Calculate distance based on distance metric.
+    Calculate distance based on distance metric,
+    *sub_results_name* is a tensor of differences [B, M, N].
     """
     if metric in (
             'cityblock', 'euclidean', 'l1',
@@ -28,7 +41,6 @@ def _calculate_distance(scope, container, sub_results_name, metric,
         abs_results_name = scope.get_unique_variable_name('abs_result')
         distance_name = scope.get_unique_variable_name('distance')
         reduced_sum_name = scope.get_unique_variable_name('reduced_sum')
-        reshaped_result_name = scope.get_unique_variable_name('reduced_result')
 
         container.add_initializer(distance_power_name,
                                   onnx_proto.TensorProto.FLOAT,
@@ -39,16 +51,334 @@ def _calculate_distance(scope, container, sub_results_name, metric,
                   distance_name, container)
         container.add_node('ReduceSum', distance_name, reduced_sum_name,
                            name=scope.get_unique_operator_name('ReduceSum'),
-                           axes=[1])
-        apply_reshape(scope, reduced_sum_name, reshaped_result_name, container,
-                      desired_shape=[1, -1])
-        return reshaped_result_name
+                           axes=[2], keepdims=0)
+        return reduced_sum_name
     raise NotImplementedError(
         "Metric '{0}' is not supported yet. You "
         "may raise an issue at "
         "https://github.com/onnx/sklearn-onnx/issues.".format(metric))
 
 
+def _calculate_squared_euclidean_distance(scope, container, input_name,
+                                          training_examples_name,
+                                          training_examples):
+    """
+    Calculate the squared euclidean distances [B, M] between
+    the input [B, N] and the training examples [M, N] with
+    ``||x||^2 - 2 x T' + ||T||^2``, it avoids the [B, M, N]
+    tensor of differences, the norms of the training
+    examples are precomputed.
+    """
+    training_norms_name = scope.get_unique_variable_name('training_norms')
+    input_norms_name = scope.get_unique_variable_name('input_norms')
+    gemm_result_name = scope.get_unique_variable_name('gemm_result')
+    distance_name = scope.get_unique_variable_name('squared_distance')
+
+    container.add_initializer(
+        training_norms_name, onnx_proto.TensorProto.FLOAT,
+        [training_examples.shape[0]],
+        row_norms(training_examples, squared=True))
+
+    container.add_node('ReduceSumSquare', input_name, input_norms_name,
+                       name=scope.get_unique_operator_name('ReduceSumSquare'),
+                       axes=[1], keepdims=1)
+    apply_gemm(scope, [input_name, training_examples_name,
+                       training_norms_name],
+               gemm_result_name, container, alpha=-2., beta=1., transB=1)
+    apply_add(scope, [gemm_result_name, input_norms_name],
+              distance_name, container, broadcast=1)
+    return distance_name
+
+
+def _select_candidates(scope, container, distance_name, negate_name,
+                       n_candidates):
+    """
+    Returns the indices [B, C] of the *n_candidates* training
+    examples with the lowest distances, sorted by increasing index
+    so that ties are broken as they are by a TopK on all
+    training examples.
+    """
+    negated_distance_name = scope.get_unique_variable_name(
+        'negated_distance')
+    candidate_values_name = scope.get_unique_variable_name(
+        'candidate_values')
+    candidates_name = scope.get_unique_variable_name('candidates')
+    cast_candidates_name = scope.get_unique_variable_name(
+        'cast_candidates')
+    negated_candidates_name = scope.get_unique_variable_name(
+        'negated_candidates')
+    sorted_values_name = scope.get_unique_variable_name('sorted_values')
+    sorted_positions_name = scope.get_unique_variable_name(
+        'sorted_positions')
+    sorted_candidates_name = scope.get_unique_variable_name(
+        'sorted_candidates')
+    final_candidates_name = scope.get_unique_variable_name(
+        'final_candidates')
+
+    apply_mul(scope, [distance_name, negate_name], negated_distance_name,
+              container, broadcast=1)
+    apply_topk(scope, negated_distance_name,
+               [candidate_values_name, candidates_name], container,
+               k=n_candidates)
+    # indices below 2**24 are exactly represented by floats
+    apply_cast(scope, candidates_name, cast_candidates_name, container,
+               to=onnx_proto.TensorProto.FLOAT)
+    apply_neg(scope, cast_candidates_name, negated_candidates_name,
+              container)
+    apply_topk(scope, negated_candidates_name,
+               [sorted_values_name, sorted_positions_name], container,
+               k=n_candidates)
+    apply_neg(scope, sorted_values_name, sorted_candidates_name, container)
+    apply_cast(scope, sorted_candidates_name, final_candidates_name,
+               container, to=onnx_proto.TensorProto.INT64)
+    return final_candidates_name
+
+
+def _build_partitions(training_examples, n_partitions, n_neighbors):
+    """
+    Clusters the training examples with *KMeans* and returns the
+    centroids and the indices of the examples of every partition.
+    Partitions with less than *n_neighbors* examples are merged
+    into the partition of the nearest remaining centroid so that
+    any partition holds enough examples to find the neighbours.
+    """
+    from sklearn.cluster import KMeans
+    n_partitions = min(int(n_partitions), training_examples.shape[0])
+    km = KMeans(n_clusters=n_partitions, n_init=1, random_state=0)
+    labels = km.fit_predict(training_examples)
+    centroids = km.cluster_centers_
+    while True:
+        sizes = np.bincount(labels, minlength=centroids.shape[0])
+        if sizes.min() >= n_neighbors or centroids.shape[0] == 1:
+            break
+        smallest = sizes.argmin()
+        keep = np.arange(centroids.shape[0]) != smallest
+        centroids = centroids[keep]
+        members = labels == smallest
+        labels[labels > smallest] -= 1
+        distances = ((training_examples[members, np.newaxis, :] -
+                      centroids[np.newaxis, :, :]) ** 2).sum(axis=2)
+        labels[members] = distances.argmin(axis=1)
+    partitions = [np.where(labels == i)[0]
+                  for i in range(centroids.shape[0])]
+    centroids = np.vstack([training_examples[part].mean(axis=0)
+                           for part in partitions])
+    return centroids, partitions
+
+
+def _calculate_partition_candidates(scope, container, input_name,
+                                    training_examples, n_partitions,
+                                    n_probe, n_neighbors, negate_name):
+    """
+    Selects the training examples of the *n_probe* partitions
+    whose centroids are the nearest to every input, returns
+    the candidate examples [B, C, N] and their indices [B, C].
+    Partitions are padded with examples far away from any input.
+    """
+    if container.target_opset < 11:
+        raise RuntimeError(
+            "Option n_partitions requires target_opset >= 11.")
+    centroids, partitions = _build_partitions(
+        training_examples, n_partitions, n_neighbors)
+    n_probe = min(int(n_probe), len(partitions))
+    if n_probe <= 0:
+        raise ValueError("n_probe must be positive not {}.".format(n_probe))
+    n_features = training_examples.shape[1]
+    size = max(len(part) for part in partitions)
+    partition_examples = np.full((len(partitions), size, n_features),
+                                 np.finfo(np.float32).max, dtype=np.float32)
+    partition_indices = np.zeros((len(partitions), size), dtype=np.int64)
+    for i, part in enumerate(partitions):
+        partition_examples[i, :len(part)] = training_examples[part]
+        partition_indices[i, :len(part)] = part
+
+    centroids_name = scope.get_unique_variable_name('centroids')
+    partition_examples_name = scope.get_unique_variable_name(
+        'partition_examples')
+    partition_indices_name = scope.get_unique_variable_name(
+        'partition_indices')
+    probe_values_name = scope.get_unique_variable_name('probe_values')
+    probe_name = scope.get_unique_variable_name('probe')
+    negated_centroid_distance_name = scope.get_unique_variable_name(
+        'negated_centroid_distance')
+    probed_examples_name = scope.get_unique_variable_name(
+        'probed_examples')
+    probed_indices_name = scope.get_unique_variable_name('probed_indices')
+    candidate_examples_name = scope.get_unique_variable_name(
+        'candidate_examples')
+    candidates_name = scope.get_unique_variable_name('candidates')
+
+    container.add_initializer(
+        centroids_name, onnx_proto.TensorProto.FLOAT, centroids.shape,
+        centroids.ravel())
+    container.add_initializer(
+        partition_examples_name, onnx_proto.TensorProto.FLOAT,
+        partition_examples.shape, partition_examples.ravel())
+    container.add_initializer(
+        partition_indices_name, onnx_proto.TensorProto.INT64,
+        partition_indices.shape, partition_indices.ravel())
+
+    centroid_distance_name = _calculate_squared_euclidean_distance(
+        scope, container, input_name, centroids_name, centroids)
+    apply_mul(scope, [centroid_distance_name, negate_name],
+              negated_centroid_distance_name, container, broadcast=1)
+    apply_topk(scope, negated_centroid_distance_name,
+               [probe_values_name, probe_name], container, k=n_probe)
+    # probed_examples is [B, n_probe, P, N], candidates are [B, n_probe * P]
+    container.add_node(
+        'Gather', [partition_examples_name, probe_name],
+        probed_examples_name, name=scope.get_unique_operator_name('Gather'))
+    container.add_node(
+        'Gather', [partition_indices_name, probe_name],
+        probed_indices_name, name=scope.get_unique_operator_name('Gather'))
+    apply_reshape(scope, probed_examples_name, candidate_examples_name,
+                  container, desired_shape=[0, -1, n_features])
+    apply_reshape(scope, probed_indices_name, candidates_name,
+                  container, desired_shape=[0, -1])
+    return candidate_examples_name, candidates_name
+
+
+def _topk_block_body(n_neighbors, block_size, distance_power):
+    """
+    Returns the body of the Scan which updates the running top-k
+    with one block of training examples. The states are the
+    unsqueezed input [B, 1, N], the best negated distances [B, K]
+    and their indices [B, K], the scan inputs are one block of
+    training examples [S, N] and their indices [S].
+    """
+    opv = 11
+    diff = OnnxSub('knnb_input_in', 'knnb_block', op_version=opv)
+    distance = OnnxReduceSum(
+        OnnxPow(OnnxAbs(diff, op_version=opv),
+                np.array([distance_power], dtype=np.float32),
+                op_version=opv),
+        axes=[2], keepdims=0, op_version=opv)
+    negated = OnnxMul(distance, np.array([-1], dtype=np.float32),
+                      op_version=opv)
+    # top-k of the block, then top-k of the block and the previous best
+    block_topk = OnnxTopK(
+        negated, np.array([min(n_neighbors, block_size)], dtype=np.int64),
+        op_version=opv)
+    block_indices = OnnxGather('knnb_block_indices', block_topk[1],
+                               op_version=opv)
+    values = OnnxConcat('knnb_values_in', block_topk[0], axis=1,
+                        op_version=opv)
+    indices = OnnxConcat('knnb_indices_in', block_indices, axis=1,
+                         op_version=opv)
+    topk = OnnxTopK(values, np.array([n_neighbors], dtype=np.int64),
+                    op_version=opv)
+    values_out = OnnxIdentity(topk[0], output_names=['knnb_values_out'],
+                              op_version=opv)
+    indices_out = OnnxGatherElements(
+        indices, topk[1], axis=1, output_names=['knnb_indices_out'],
+        op_version=opv)
+    input_out = OnnxIdentity('knnb_input_in',
+                             output_names=['knnb_input_out'],
+                             op_version=opv)
+    for node in [input_out, values_out, indices_out]:
+        node.set_onnx_name_prefix('knnb')
+    return input_out.to_onnx(
+        OrderedDict([('knnb_input_in', FloatTensorType()),
+                     ('knnb_values_in', FloatTensorType()),
+                     ('knnb_indices_in', Int64TensorType()),
+                     ('knnb_block', FloatTensorType()),
+                     ('knnb_block_indices', Int64TensorType())]),
+        outputs=[('knnb_input_out', FloatTensorType()),
+                 ('knnb_values_out', FloatTensorType()),
+                 ('knnb_indices_out', Int64TensorType())],
+        other_outputs=[values_out, indices_out],
+        dtype=np.float32, target_opset=opv)
+
+
+def _calculate_topk_by_blocks(scope, container, input_name,
+                              unsqueezed_input_name, training_examples,
+                              metric, distance_power, n_neighbors,
+                              block_size, topk_values_name,
+                              topk_indices_name):
+    """
+    Computes the negated distances [B, K] to the *n_neighbors*
+    nearest training examples and their indices [B, K] with a Scan
+    over blocks of *block_size* training examples. Every iteration
+    computes the distances to one block [B, S] and merges them
+    with the best ones found so far, the [B, M] distances are
+    never stored. The last block is padded with examples
+    far away from any input.
+    """
+    if metric not in ('cityblock', 'euclidean', 'l1',
+                      'l2', 'manhattan', 'minkowski'):
+        raise NotImplementedError(
+            "Metric '{0}' is not supported yet. You "
+            "may raise an issue at "
+            "https://github.com/onnx/sklearn-onnx/issues.".format(metric))
+    if container.target_opset < 11 or OnnxGatherElements is None:
+        raise RuntimeError(
+            "Option block_size requires target_opset >= 11.")
+    block_size = int(block_size)
+    if block_size <= 0:
+        raise ValueError(
+            "block_size must be positive not {}.".format(block_size))
+    n_examples, n_features = training_examples.shape
+    n_blocks = (n_examples + block_size - 1) // block_size
+    blocks = np.full((n_blocks * block_size, n_features),
+                     np.finfo(np.float32).max, dtype=np.float32)
+    blocks[:n_examples] = training_examples
+    blocks = blocks.reshape((n_blocks, block_size, n_features))
+    block_indices = np.arange(n_blocks * block_size).reshape(
+        (n_blocks, block_size))
+
+    blocks_name = scope.get_unique_variable_name('training_blocks')
+    block_indices_name = scope.get_unique_variable_name('block_indices')
+    initial_values_name = scope.get_unique_variable_name('initial_values')
+    initial_indices_name = scope.get_unique_variable_name(
+        'initial_indices')
+    reduced_input_name = scope.get_unique_variable_name('reduced_input')
+    reduced_shape_name = scope.get_unique_variable_name('reduced_shape')
+    zeros_name = scope.get_unique_variable_name('zeros')
+    int_zeros_name = scope.get_unique_variable_name('int_zeros')
+    values_state_name = scope.get_unique_variable_name('values_state')
+    indices_state_name = scope.get_unique_variable_name('indices_state')
+    input_state_name = scope.get_unique_variable_name('input_state')
+
+    container.add_initializer(
+        blocks_name, onnx_proto.TensorProto.FLOAT, blocks.shape,
+        blocks.ravel())
+    container.add_initializer(
+        block_indices_name, onnx_proto.TensorProto.INT64,
+        block_indices.shape, block_indices.ravel())
+    container.add_initializer(
+        initial_values_name, onnx_proto.TensorProto.FLOAT,
+        [1, n_neighbors], [-np.inf] * n_neighbors)
+    container.add_initializer(
+        initial_indices_name, onnx_proto.TensorProto.INT64,
+        [1, n_neighbors], [0] * n_neighbors)
+
+    # states are initialized with [B, K] tensors
+    container.add_node(
+        'ReduceSum', input_name, reduced_input_name,
+        name=scope.get_unique_operator_name('ReduceSum'),
+        axes=[1], keepdims=1)
+    container.add_node('Shape', reduced_input_name, reduced_shape_name,
+                       name=scope.get_unique_operator_name('Shape'))
+    container.add_node('ConstantOfShape', reduced_shape_name, zeros_name,
+                       name=scope.get_unique_operator_name(
+                           'ConstantOfShape'),
+                       op_version=9)
+    apply_add(scope, [zeros_name, initial_values_name],
+              values_state_name, container, broadcast=1)
+    apply_cast(scope, zeros_name, int_zeros_name, container,
+               to=onnx_proto.TensorProto.INT64)
+    apply_add(scope, [int_zeros_name, initial_indices_name],
+              indices_state_name, container, broadcast=1)
+
+    body = _topk_block_body(n_neighbors, block_size, distance_power)
+    container.add_node(
+        'Scan', [unsqueezed_input_name, values_state_name,
+                 indices_state_name, blocks_name, block_indices_name],
+        [input_state_name, topk_values_name, topk_indices_name],
+        name=scope.get_unique_operator_name('Scan'),
+        body=body.graph, num_scan_inputs=2, op_version=11)
+
+
 def _calculate_weights(scope, container, unity, distance):
     """
     weights = 1 / distance
@@ -228,9 +558,8 @@ def _convert_k_neighbours_classifier(scope, container, operator, classes,
         training_labels.shape, training_labels.ravel())
 
     container.add_node(
-        'ArrayFeatureExtractor', [training_labels_name, topk_indices_name],
-        topk_labels_name, op_domain='ai.onnx.ml',
-        name=scope.get_unique_operator_name('ArrayFeatureExtractor'))
+        'Gather', [training_labels_name, topk_indices_name],
+        topk_labels_name, name=scope.get_unique_operator_name('Gather'))
     proba = _get_probability_score(scope, container, operator,
                                    weights, topk_values_name, distance_power,
                                    topk_labels_name, classes)
@@ -256,8 +585,7 @@ def _convert_k_neighbours_classifier(scope, container, operator, classes,
                       desired_shape=(-1,))
 
 
-def _convert_k_neighbours_regressor(scope, container, new_training_labels,
-                                    new_training_labels_shape,
+def _convert_k_neighbours_regressor(scope, container, training_labels,
                                     topk_values_name, topk_indices_name,
                                     distance_power, weights):
     """
@@ -269,13 +597,12 @@ def _convert_k_neighbours_regressor(scope, container, new_training_labels,
 
     container.add_initializer(
         training_labels_name, onnx_proto.TensorProto.FLOAT,
-        new_training_labels_shape,
-        new_training_labels.ravel().astype(float))
+        training_labels.shape, training_labels.ravel().astype(float))
 
+    # topk_labels is [B, K] or [B, K, T] if there are T targets
     container.add_node(
-        'ArrayFeatureExtractor', [training_labels_name, topk_indices_name],
-        topk_labels_name, op_domain='ai.onnx.ml',
-        name=scope.get_unique_operator_name('ArrayFeatureExtractor'))
+        'Gather', [training_labels_name, topk_indices_name],
+        topk_labels_name, name=scope.get_unique_operator_name('Gather'))
     weighted_labels = topk_labels_name
     final_op_type = 'ReduceMean'
     if weights == 'distance':
@@ -288,8 +615,15 @@ def _convert_k_neighbours_regressor(scope, container, new_training_labels,
 
         weights_val = _get_weights(
             scope, container, topk_values_name, distance_power)
+        if len(training_labels.shape) > 1:
+            unsqueezed_weights_name = scope.get_unique_variable_name(
+                'unsqueezed_weights')
+            container.add_node(
+                'Unsqueeze', weights_val, unsqueezed_weights_name,
+                name=scope.get_unique_operator_name('Unsqueeze'), axes=[2])
+            weights_val = unsqueezed_weights_name
         apply_mul(scope, [topk_labels_name, weights_val],
-                  weighted_distance_name, container, broadcast=0)
+                  weighted_distance_name, container, broadcast=1)
         container.add_node(
             'ReduceSum', weights_val, reduced_weights_name,
             name=scope.get_unique_operator_name('ReduceSum'), axes=[1])
@@ -303,6 +637,43 @@ def _convert_k_neighbours_regressor(scope, container, new_training_labels,
 def convert_sklearn_knn(scope, operator, container):
     """
     Converter for KNN models to onnx format.
+    The converter computes the distances between every row of the
+    batch and every training example, that is a [B, M] matrix.
+    Option *block_size* bounds the memory used to predict with
+    a large training set: the training examples are split into
+    blocks of *block_size* rows, a Scan computes the distances to
+    one block at a time and keeps the *n_neighbors* nearest examples
+    found so far. The memory used by one iteration is proportional
+    to ``B * block_size * N`` instead of ``B * M``.
+    It requires ``target_opset >= 11``.
+
+    ::
+
+        options = {id(model): {'block_size': 1000}}
+        onx = to_onnx(model, X, options=options)
+
+    Option *n_partitions* converts the model into an approximate
+    search. The training examples are clustered into *n_partitions*
+    partitions with *KMeans* when the model is converted, the graph
+    looks for the neighbours among the examples of the *n_probe*
+    (option, 1 by default) partitions whose centroids are the nearest
+    to the input. Probing more partitions improves the recall
+    and slows down the prediction. It requires ``target_opset >= 11``.
+
+    ::
+
+        options = {id(model): {'n_partitions': 1000, 'n_probe': 4}}
+        onx = to_onnx(model, X, options=options)
+
+    Option ``optim='gemm'`` is another approximate search for the
+    euclidean distance. The squared distances
+    ``||x||^2 - 2 x T' + ||T||^2`` are computed with a Gemm in float
+    to select ``2 * n_neighbors + 10`` candidates, the distances
+    to the candidates are then computed exactly. It is faster
+    but the expression loses precision when the training examples
+    are close to each other compared to their norm, the candidates
+    may then miss the true neighbours. It requires
+    ``target_opset >= 11``.
     """
     # Computational graph:
     #
@@ -316,8 +687,10 @@ def convert_sklearn_knn(scope, operator, container):
     # below) are found.
     #
     # Symbols:
+    # B: Number of rows in the batch
     # M: Number of training set instances
     # N: Number of features
+    # K: Number of neighbors
     # C: Number of classes
     # input: input
     # output: output
@@ -325,31 +698,31 @@ def convert_sklearn_knn(scope, operator, container):
     #
     # Graph:
     #
-    #   input [1, N] --> SUB <---- training_examples [M, N]
-    #                     |
-    #                     V
-    #           sub_results [M, N] ----> POW <---- distance_power [1]
-    #                                     |
-    #                                     V
-    #  reduced_sum [M] <-- REDUCESUM <-- distance [M, N]
-    #            |
-    #            V
-    # length -> RESHAPE -> reshaped_result [1, M]
-    #                       |
-    #                       V
-    # n_neighbors [1] ----> TOPK
+    #   input [B, N] --> UNSQUEEZE --> unsqueezed_input [B, 1, N]
+    #                                         |
+    #                                         V
+    #                training_examples [M, N] --> SUB
+    #                                              |
+    #                                              V
+    #           sub_results [B, M, N] ----> POW <---- distance_power [1]
+    #                                        |
+    #                                        V
+    #  reduced_sum [B, M] <-- REDUCESUM <-- distance [B, M, N]
+    #                |
+    #                V
+    # n_neighbors [1] ----> TOPK (axis=1)
     #                       |
     #                      / \
     #                     /   \
     #                     |    |
     #                     V    V
-    #       topk_indices [K]   topk_values [K]
+    #    topk_indices [B, K]   topk_values [B, K]
     #               |
     #               V
-    #   ARRAYFEATUREEXTRACTOR <- training_labels [M]
+    #            GATHER <- training_labels [M]
     #           |
     #           V                   (KNN Regressor)
-    #          topk_labels [K] ---------------------> REDUCEMEAN --> output [1]
+    #   topk_labels [B, K] -------------------> REDUCEMEAN --> output [B, 1]
     #                    |
     #                    |
     #                    | (KNN Classifier)
@@ -403,28 +776,27 @@ def convert_sklearn_knn(scope, operator, container):
     #               output_probability [1, C]  <-  ZipMap
 
     knn = operator.raw_operator
-    training_examples = knn._fit_X.astype(float)
+    training_examples = knn._fit_X
+    options = container.get_options(
+        knn, dict(block_size=None, n_partitions=None, n_probe=1,
+                  optim=None))
+    block_size = options['block_size']
+    n_partitions = options['n_partitions']
+    if block_size is not None and n_partitions is not None:
+        raise ValueError(
+            "Options block_size and n_partitions cannot be used together.")
     distance_power = knn.p if knn.metric == 'minkowski' else (
         2 if knn.metric in ('euclidean', 'l2') else 1)
 
     if operator.type != 'SklearnNearestNeighbors':
         training_labels = knn._y
 
-    training_examples_name = scope.get_unique_variable_name(
-        'training_examples')
-    sub_results_name = scope.get_unique_variable_name('sub_results')
     topk_values_name = scope.get_unique_variable_name('topk_values')
     topk_indices_name = scope.get_unique_variable_name('topk_indices')
     negate_name = scope.get_unique_variable_name('negate')
     negated_reshaped_result_name = scope.get_unique_variable_name(
         'negated_reshaped_result')
 
-    container.add_initializer(
-        training_examples_name, onnx_proto.TensorProto.FLOAT,
-        training_examples.shape, training_examples.flatten())
-    container.add_initializer(negate_name, onnx_proto.TensorProto.FLOAT,
-                              [], [-1])
-
     input_name = operator.inputs[0].full_name
     if type(operator.inputs[0].type) == Int64TensorType:
         cast_input_name = scope.get_unique_variable_name('cast_input')
@@ -433,15 +805,118 @@ def convert_sklearn_knn(scope, operator, container):
                    container, to=onnx_proto.TensorProto.FLOAT)
         input_name = cast_input_name
 
-    apply_sub(scope, [input_name, training_examples_name],
-              sub_results_name, container, broadcast=1)
-    distance_result = _calculate_distance(scope, container, sub_results_name,
-                                          knn.metric, distance_power)
-    apply_mul(scope, [distance_result, negate_name],
-              negated_reshaped_result_name, container, broadcast=1)
-    apply_topk(scope, negated_reshaped_result_name,
-               [topk_values_name, topk_indices_name], container,
-               k=knn.n_neighbors)
+    # With optim='gemm', euclidean distances are computed with a Gemm
+    # to select candidates among the training examples, the distances
+    # to the candidates are then computed exactly. The selection
+    # needs GatherElements.
+    optim = options['optim']
+    n_candidates = 2 * knn.n_neighbors + 10
+    if optim not in (None, 'gemm'):
+        raise ValueError("Unknown optimization '{}'.".format(optim))
+    if optim == 'gemm':
+        if block_size is not None or n_partitions is not None:
+            raise ValueError(
+                "Option optim='gemm' cannot be used with block_size "
+                "or n_partitions.")
+        if (distance_power != 2 or
+                knn.metric not in ('euclidean', 'l2', 'minkowski')):
+            raise NotImplementedError(
+                "Option optim='gemm' requires the euclidean distance.")
+        if container.target_opset < 11:
+            raise RuntimeError(
+                "Option optim='gemm' requires target_opset >= 11.")
+        if training_examples.shape[0] >= 2 ** 24:
+            raise RuntimeError(
+                "Option optim='gemm' requires less than 2**24 "
+                "training examples.")
+    use_gemm = (optim == 'gemm' and
+                n_candidates < training_examples.shape[0])
+
+    training_examples_name = scope.get_unique_variable_name(
+        'training_examples')
+    unsqueezed_input_name = scope.get_unique_variable_name(
+        'unsqueezed_input')
+    sub_results_name = scope.get_unique_variable_name('sub_results')
+
+    if use_gemm:
+        # Data is centered to reduce rounding errors, the training
+        # examples are centered in float like the input so that
+        # the distance between two equal vectors remains null.
+        mean = training_examples.mean(axis=0).astype(np.float32)
+        training_examples = training_examples.astype(np.float32) - mean
+        mean_name = scope.get_unique_variable_name('training_mean')
+        centered_input_name = scope.get_unique_variable_name(
+            'centered_input')
+        container.add_initializer(
+            mean_name, onnx_proto.TensorProto.FLOAT, mean.shape, mean)
+        apply_sub(scope, [input_name, mean_name], centered_input_name,
+                  container, broadcast=1)
+        input_name = centered_input_name
+
+    # input [B, N] is unsqueezed into [B, 1, N] so that the difference
+    # with training_examples [M, N] is [B, M, N] and every row
+    # of the batch is scored in a single run
+    container.add_node('Unsqueeze', input_name, unsqueezed_input_name,
+                       name=scope.get_unique_operator_name('Unsqueeze'),
+                       axes=[1])
+
+    if block_size is not None:
+        _calculate_topk_by_blocks(
+            scope, container, input_name, unsqueezed_input_name,
+            training_examples, knn.metric, distance_power,
+            knn.n_neighbors, block_size, topk_values_name,
+            topk_indices_name)
+    else:
+        container.add_initializer(negate_name, onnx_proto.TensorProto.FLOAT,
+                                  [], [-1])
+        # candidate_examples is [B, C, N], candidates [B, C]
+        candidates_name = None
+        if n_partitions is not None:
+            candidate_examples_name, candidates_name = (
+                _calculate_partition_candidates(
+                    scope, container, input_name, training_examples,
+                    n_partitions, options['n_probe'], knn.n_neighbors,
+                    negate_name))
+        else:
+            container.add_initializer(
+                training_examples_name, onnx_proto.TensorProto.FLOAT,
+                training_examples.shape, training_examples.ravel())
+        if use_gemm:
+            approx_distance_name = _calculate_squared_euclidean_distance(
+                scope, container, input_name, training_examples_name,
+                training_examples)
+            candidates_name = _select_candidates(
+                scope, container, approx_distance_name, negate_name,
+                n_candidates)
+            candidate_examples_name = scope.get_unique_variable_name(
+                'candidate_examples')
+            container.add_node(
+                'Gather', [training_examples_name, candidates_name],
+                candidate_examples_name,
+                name=scope.get_unique_operator_name('Gather'))
+        if candidates_name is not None:
+            topk_positions_name = scope.get_unique_variable_name(
+                'topk_positions')
+            apply_sub(scope,
+                      [unsqueezed_input_name, candidate_examples_name],
+                      sub_results_name, container, broadcast=1)
+            topk_outputs = [topk_values_name, topk_positions_name]
+        else:
+            apply_sub(scope, [unsqueezed_input_name, training_examples_name],
+                      sub_results_name, container, broadcast=1)
+            topk_outputs = [topk_values_name, topk_indices_name]
+
+        distance_result = _calculate_distance(
+            scope, container, sub_results_name, knn.metric, distance_power)
+        apply_mul(scope, [distance_result, negate_name],
+                  negated_reshaped_result_name, container, broadcast=1)
+        apply_topk(scope, negated_reshaped_result_name, topk_outputs,
+                   container, k=knn.n_neighbors)
+        if candidates_name is not None:
+            container.add_node(
+                'GatherElements', [candidates_name, topk_positions_name],
+                topk_indices_name, axis=1, op_version=11,
+                name=scope.get_unique_operator_name('GatherElements'))
 
     if operator.type == 'SklearnKNeighborsClassifier':
         classes = knn.classes_
@@ -460,41 +935,32 @@ def convert_sklearn_knn(scope, operator, container):
             topk_values_name, topk_indices_name, distance_power,
             knn.weights)
     elif operator.type == 'SklearnKNeighborsRegressor':
-        multi_reg = (len(training_labels.shape) > 1 and
-                     (len(training_labels.shape) > 2 or
-                      training_labels.shape[1] > 1))
-        if multi_reg:
-            shape = training_labels.shape
-            irange = tuple(range(len(shape)))
-            new_shape = (shape[-1],) + shape[:-1]
-            perm = irange[-1:] + irange[:-1]
-            new_training_labels = training_labels.transpose(perm)
-            perm = irange[1:] + (0,)
-            shape = new_shape
-        else:
-            shape = training_labels.shape
-            new_training_labels = training_labels
-
         final_op_type, weighted_labels = _convert_k_neighbours_regressor(
-            scope, container, new_training_labels, shape,
-            topk_values_name, topk_indices_name, distance_power, knn.weights)
-        if multi_reg:
-            means_name = scope.get_unique_variable_name('means')
-            container.add_node(
-                final_op_type, weighted_labels, means_name,
-                name=scope.get_unique_operator_name(final_op_type), axes=[1])
-            apply_transpose(scope, means_name, operator.output_full_names,
-                            container, perm=perm)
-        else:
-            container.add_node(
-                final_op_type, weighted_labels, operator.output_full_names,
-                name=scope.get_unique_operator_name(final_op_type), axes=[1])
+            scope, container, training_labels, topk_values_name,
+            topk_indices_name, distance_power, knn.weights)
+        # output is [B, 1] with one target, [B, T] with T targets
+        multi_reg = len(training_labels.shape) > 1
+        container.add_node(
+            final_op_type, weighted_labels, operator.output_full_names,
+            name=scope.get_unique_operator_name(final_op_type), axes=[1],
+            keepdims=0 if multi_reg else 1)
     elif operator.type == 'SklearnNearestNeighbors':
         container.add_node(
             'Identity', topk_indices_name, operator.outputs[0].full_name,
             name=scope.get_unique_operator_name('Identity'))
-        apply_abs(scope, topk_values_name, operator.outputs[1].full_name,
-                  container)
+        if distance_power == 1:
+            apply_abs(scope, topk_values_name, operator.outputs[1].full_name,
+                      container)
+        else:
+            # topk_values holds the distances raised to the power p
+            abs_values_name = scope.get_unique_variable_name('abs_values')
+            root_power_name = scope.get_unique_variable_name('root_power')
+            container.add_initializer(root_power_name,
+                                      onnx_proto.TensorProto.FLOAT,
+                                      [], [1. / distance_power])
+            apply_abs(scope, topk_values_name, abs_values_name, container)
+            apply_pow(scope, [abs_values_name, root_power_name],
+                      operator.outputs[1].full_name, container)
 
 
 register_converter('SklearnKNeighborsClassifier', convert_sklearn_knn)
@@ -10,7 +10,10 @@ import six
 from ..common._apply_operation import apply_cast
 from ..common.data_types import Int64TensorType
 from ..common._registration import register_converter
-from ..common.tree_ensemble import add_tree_to_attribute_pairs
+from ..common.tree_ensemble import (
+    add_tree_to_attribute_pairs_array,
+    concatenate_tree_attribute_pairs
+)
 from ..common.tree_ensemble import get_default_tree_classifier_attribute_pairs
 from ..common.tree_ensemble import get_default_tree_regressor_attribute_pairs
 from ..proto import onnx_proto
@@ -54,9 +57,10 @@ def convert_sklearn_random_forest_classifier(scope, operator, container):
 
     for tree_id in range(estimtator_count):
         tree = op.estimators_[tree_id].tree_
-        add_tree_to_attribute_pairs(attr_pairs, True, tree, tree_id,
-                                    tree_weight, 0, True, True,
-                                    dtype=container.dtype)
+        add_tree_to_attribute_pairs_array(attr_pairs, True, tree, tree_id,
+                                          tree_weight, 0, True, True,
+                                          dtype=container.dtype)
+    concatenate_tree_attribute_pairs(attr_pairs)
 
     container.add_node(
         op_type, operator.input_full_names,
@@ -78,9 +82,10 @@ def convert_sklearn_random_forest_regressor_converter(scope,
     tree_weight = 1. / estimtator_count
     for tree_id in range(estimtator_count):
         tree = op.estimators_[tree_id].tree_
-        add_tree_to_attribute_pairs(attrs, False, tree, tree_id,
-                                    tree_weight, 0, False, True,
-                                    dtype=container.dtype)
+        add_tree_to_attribute_pairs_array(attrs, False, tree, tree_id,
+                                          tree_weight, 0, False, True,
+                                          dtype=container.dtype)
+    concatenate_tree_attribute_pairs(attrs)
 
     input_name = operator.input_full_names
     if type(operator.inputs[0].type) == Int64TensorType:
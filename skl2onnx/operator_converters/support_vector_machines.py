@@ -39,12 +39,12 @@ def convert_sklearn_svm(scope, operator, container):
     svm_attrs = {'name': scope.get_unique_operator_name('SVM')}
     op = operator.raw_operator
     if isinstance(op.dual_coef_, np.ndarray):
-        coef = op.dual_coef_.ravel().tolist()
+        coef = op.dual_coef_.ravel()
     else:
         coef = op.dual_coef_
     intercept = op.intercept_
     if isinstance(op.support_vectors_, np.ndarray):
-        support_vectors = op.support_vectors_.ravel().tolist()
+        support_vectors = op.support_vectors_.ravel()
     else:
         support_vectors = op.support_vectors_
 
@@ -55,8 +55,11 @@ def convert_sklearn_svm(scope, operator, container):
 
     if (operator.type in ['SklearnSVC', 'SklearnNuSVC'] or isinstance(
             op, (SVC, NuSVC))) and len(op.classes_) == 2:
-        svm_attrs['coefficients'] = [-v for v in coef]
-        svm_attrs['rho'] = [-v for v in intercept]
+        svm_attrs['coefficients'] = (
+            -coef if isinstance(coef, np.ndarray) else [-v for v in coef])
+        svm_attrs['rho'] = (
+            -intercept if isinstance(intercept, np.ndarray)
+            else [-v for v in intercept])
     else:
         svm_attrs['coefficients'] = coef
         svm_attrs['rho'] = intercept
@@ -115,6 +115,16 @@ def make_attribute(
         attr.g.CopyFrom(value)
         attr.type = AttributeProto.GRAPH
     # third, iterable cases
+    elif (isinstance(value, np.ndarray) and
+            value.dtype.kind in ('f', 'i', 'u')):
+        # numpy arrays are converted at once without checking
+        # every element
+        if value.dtype.kind == 'f':
+            attr.floats.extend(value.ravel().tolist())
+            attr.type = AttributeProto.FLOATS
+        else:
+            attr.ints.extend(value.ravel().tolist())
+            attr.type = AttributeProto.INTS
     elif is_iterable:
         byte_array = [_to_bytes_or_false(v) for v in value]
         if all(isinstance(v, np.float32) for v in value):
@@ -4,64 +4,93 @@
 # license information.
 # --------------------------------------------------------------------------
 
-# To register shape calculators for scikit-learn operators,
-# import associated modules here.
-from . import array_feature_extractor
-from . import concat
-from . import dict_vectorizer
-from . import flatten
-from . import function_transformer
-from . import gaussian_process
-from . import grid_search_cv
-from . import imputer
-from . import k_bins_discretiser
-from . import k_means
-from . import label_binariser
-from . import label_encoder
-from . import linear_classifier
-from . import linear_regressor
-from . import mixture
-from . import nearest_neighbours
-from . import one_hot_encoder
-from . import ordinal_encoder
-from . import one_vs_rest_classifier
-from . import polynomial_features
-from . import scaler
-from . import svd
-from . import support_vector_machines
-from . import text_vectorizer
-from . import tfidf_transformer
-from . import voting_classifier
-from . import voting_regressor
-from . import zip_map
+# To register a shape calculator for scikit-learn operators,
+# add the associated module here. The module is only imported
+# the first time the shape calculator of one of its operators is needed.
+from ..common._registration import register_converter_modules
 
-__all__ = [
-    array_feature_extractor,
-    concat,
-    dict_vectorizer,
-    flatten,
-    function_transformer,
-    gaussian_process,
-    grid_search_cv,
-    imputer,
-    k_bins_discretiser,
-    k_means,
-    label_binariser,
-    label_encoder,
-    linear_classifier,
-    linear_regressor,
-    mixture,
-    nearest_neighbours,
-    one_hot_encoder,
-    ordinal_encoder,
-    one_vs_rest_classifier,
-    polynomial_features,
-    scaler,
-    svd,
-    support_vector_machines,
-    text_vectorizer,
-    tfidf_transformer,
-    voting_classifier,
-    voting_regressor,
-    zip_map,
-]
+_shape_calculator_modules = {
+    'SklearnAdaBoostClassifier': 'linear_classifier',
+    'SklearnAdaBoostRegressor': 'linear_regressor',
+    'SklearnArrayFeatureExtractor': 'array_feature_extractor',
+    'SklearnBaggingClassifier': 'linear_classifier',
+    'SklearnBaggingRegressor': 'linear_regressor',
+    'SklearnBayesianGaussianMixture': 'mixture',
+    'SklearnBernoulliNB': 'linear_classifier',
+    'SklearnBinarizer': 'imputer',
+    'SklearnCalibratedClassifierCV': 'linear_classifier',
+    'SklearnComplementNB': 'linear_classifier',
+    'SklearnConcat': 'concat',
+    'SklearnCountVectorizer': 'text_vectorizer',
+    'SklearnDecisionTreeClassifier': 'linear_classifier',
+    'SklearnDecisionTreeRegressor': 'linear_regressor',
+    'SklearnDictVectorizer': 'dict_vectorizer',
+    'SklearnExtraTreeClassifier': 'linear_classifier',
+    'SklearnExtraTreeRegressor': 'linear_regressor',
+    'SklearnExtraTreesClassifier': 'linear_classifier',
+    'SklearnExtraTreesRegressor': 'linear_regressor',
+    'SklearnFlatten': 'flatten',
+    'SklearnFunctionTransformer': 'function_transformer',
+    'SklearnGaussianMixture': 'mixture',
+    'SklearnGaussianNB': 'linear_classifier',
+    'SklearnGaussianProcessRegressor': 'gaussian_process',
+    'SklearnGenericUnivariateSelect': 'concat',
+    'SklearnGradientBoostingClassifier': 'linear_classifier',
+    'SklearnGradientBoostingRegressor': 'linear_regressor',
+    'SklearnGridSearchCV': 'grid_search_cv',
+    'SklearnImputer': 'imputer',
+    'SklearnIncrementalPCA': 'svd',
+    'SklearnKBinsDiscretizer': 'k_bins_discretiser',
+    'SklearnKMeans': 'k_means',
+    'SklearnKNeighborsClassifier': 'linear_classifier',
+    'SklearnKNeighborsRegressor': 'nearest_neighbours',
+    'SklearnLabelBinarizer': 'label_binariser',
+    'SklearnLabelEncoder': 'label_encoder',
+    'SklearnLinearClassifier': 'linear_classifier',
+    'SklearnLinearRegressor': 'linear_regressor',
+    'SklearnLinearSVC': 'linear_classifier',
+    'SklearnLinearSVR': 'linear_regressor',
+    'SklearnMLPClassifier': 'linear_classifier',
+    'SklearnMLPRegressor': 'linear_regressor',
+    'SklearnMaxAbsScaler': 'scaler',
+    'SklearnMinMaxScaler': 'scaler',
+    'SklearnMiniBatchKMeans': 'k_means',
+    'SklearnMultinomialNB': 'linear_classifier',
+    'SklearnMultiply': 'concat',
+    'SklearnNearestNeighbors': 'nearest_neighbours',
+    'SklearnNormalizer': 'scaler',
+    'SklearnOneClassSVM': 'support_vector_machines',
+    'SklearnOneHotEncoder': 'one_hot_encoder',
+    'SklearnOneVsRestClassifier': 'one_vs_rest_classifier',
+    'SklearnOrdinalEncoder': 'ordinal_encoder',
+    'SklearnPCA': 'svd',
+    'SklearnPolynomialFeatures': 'polynomial_features',
+    'SklearnRANSACRegressor': 'linear_regressor',
+    'SklearnRFE': 'concat',
+    'SklearnRFECV': 'concat',
+    'SklearnRandomForestClassifier': 'linear_classifier',
+    'SklearnRandomForestRegressor': 'linear_regressor',
+    'SklearnRobustScaler': 'scaler',
+    'SklearnSGDClassifier': 'linear_classifier',
+    'SklearnSVC': 'support_vector_machines',
+    'SklearnSVR': 'support_vector_machines',
+    'SklearnScaler': 'scaler',
+    'SklearnSelectFdr': 'concat',
+    'SklearnSelectFpr': 'concat',
+    'SklearnSelectFromModel': 'concat',
+    'SklearnSelectFwe': 'concat',
+    'SklearnSelectKBest': 'concat',
+    'SklearnSelectPercentile': 'concat',
+    'SklearnSimpleImputer': 'imputer',
+    'SklearnTfidfTransformer': 'tfidf_transformer',
+    'SklearnTfidfVectorizer': 'text_vectorizer',
+    'SklearnTruncatedSVD': 'svd',
+    'SklearnVarianceThreshold': 'concat',
+    'SklearnVotingClassifier': 'voting_classifier',
+    'SklearnVotingRegressor': 'voting_regressor',
+    'SklearnZipMap': 'zip_map',
+}
+
+register_converter_modules(shape_calculator_modules={
+    name: __name__ + '.' + module
+    for name, module in _shape_calculator_modules.items()})
@@ -26,8 +26,6 @@ register_shape_calculator('SklearnExtraTreesRegressor',
                           calculate_linear_regressor_output_shapes)
 register_shape_calculator('SklearnGradientBoostingRegressor',
                           calculate_linear_regressor_output_shapes)
-register_shape_calculator('SklearnKNeighborsRegressor',
-                          calculate_linear_regressor_output_shapes)
 register_shape_calculator('SklearnMLPRegressor',
                           calculate_linear_regressor_output_shapes)
 register_shape_calculator('SklearnRANSACRegressor',
@@ -25,5 +25,20 @@ def calculate_sklearn_nearest_neighbours(operator):
     operator.outputs[1].type.shape = [N, neighbours]
 
 
+def calculate_sklearn_nearest_neighbours_regressor(operator):
+    check_input_and_output_numbers(operator, input_count_range=1,
+                                   output_count_range=1)
+    check_input_and_output_types(
+        operator, good_input_types=[
+            FloatTensorType, Int64TensorType, DoubleTensorType])
+
+    N = operator.inputs[0].type.shape[0]
+    y = operator.raw_operator._y
+    n_targets = 1 if len(y.shape) == 1 else y.shape[1]
+    operator.outputs[0].type.shape = [N, n_targets]
+
+
+register_shape_calculator('SklearnKNeighborsRegressor',
+                          calculate_sklearn_nearest_neighbours_regressor)
 register_shape_calculator('SklearnNearestNeighbors',
                           calculate_sklearn_nearest_neighbours)
@@ -40,6 +40,21 @@ class TestAlgebraOnnxDoc(unittest.TestCase):
         res = self.predict_with_onnxruntime(model_def, X)
         assert_almost_equal(res['Y'], X)
 
+    @unittest.skipIf(sys.version_info[:2] < (3, 7),
+                     reason="module __getattr__ not available")
+    def test_lazy_classes(self):
+        from skl2onnx.algebra import onnx_ops
+        from skl2onnx.algebra.onnx_ops import OnnxClip, OnnxClip_6
+        self.assertIs(OnnxClip.past_version['OnnxClip_6'], OnnxClip_6)
+        self.assertIs(onnx_ops.OnnxClip, OnnxClip)
+        self.assertIn("**Version**", OnnxClip.__doc__)
+        self.assertIn('OnnxAbs', dir(onnx_ops))
+        self.assertEqual(set(name for name in dir(onnx_ops)
+                             if name.startswith('Onnx')),
+                         set(self._algebra))
+        with self.assertRaises(AttributeError):
+            onnx_ops.OnnxUnknownOperator
+
     @unittest.skipIf(sys.platform.startswith("win"),
                      reason="onnx schema are incorrect on Windows")
     def test_doc_onnx(self):
@@ -0,0 +1,94 @@
+"""
+Tests the latency benchmark of a converted model.
+"""
+import csv
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from sklearn.datasets import load_iris
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from skl2onnx.benchmark import benchmark_model, main
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def _model(self):
+        X, y = load_iris(return_X_y=True)
+        model = make_pipeline(
+            StandardScaler(),
+            LogisticRegression(solver='liblinear', multi_class='ovr'))
+        return model.fit(X, y), X
+
+    def test_benchmark_model(self):
+        model, X = self._model()
+        res = benchmark_model(model, X, batch_sizes=[1, 200],
+                              threads=[1, 2], repeat=5)
+        onnx = [r for r in res if r['runtime'] == 'onnxruntime']
+        self.assertEqual([(r['batch_size'], r['threads']) for r in onnx],
+                         [(1, 1), (200, 1), (1, 2), (200, 2)])
+        skl = [r for r in res if r['runtime'] == 'sklearn']
+        self.assertEqual(set(r['batch_size'] for r in skl), {1, 200})
+        for r in res:
+            self.assertLessEqual(r['n_runs'], 5)
+            self.assertLessEqual(r['p50'], r['p99'])
+            self.assertGreater(r['rows_per_sec'], 0)
+
+    def test_benchmark_inputs_outputs(self):
+        from onnxruntime import InferenceSession
+        model, X = self._model()
+        dtypes = []
+        predict = model.predict
+
+        def spy(X):
+            dtypes.append(X.dtype)
+            return predict(X)
+
+        model.predict = spy
+        run = InferenceSession.run
+        with mock.patch.object(InferenceSession, 'run', autospec=True,
+                               side_effect=run) as ort_run:
+            benchmark_model(model, X, batch_sizes=[10], repeat=2)
+        # scikit-learn receives the original features
+        self.assertEqual(set(dtypes), {np.dtype(np.float64)})
+        # the probabilities and the ZipMap are not computed
+        for call in ort_run.call_args_list:
+            self.assertEqual(call[0][1], ['output_label'])
+
+    def test_max_time(self):
+        model, X = self._model()
+        res = benchmark_model(model, X, batch_sizes=[10], repeat=1000,
+                              max_time=0., runtimes=['onnxruntime'])
+        self.assertEqual(len(res), 1)
+        self.assertEqual(res[0]['n_runs'], 1)
+
+    def test_command_line(self):
+        model, X = self._model()
+        with tempfile.TemporaryDirectory() as temp:
+            name = os.path.join(temp, 'model.pkl')
+            with open(name, 'wb') as f:
+                pickle.dump(model, f)
+            data = os.path.join(temp, 'data.npy')
+            np.save(data, X)
+            for ext in ['json', 'csv']:
+                output = os.path.join(temp, 'res.' + ext)
+                res = main([name, data, '--batch-sizes', '1', '10',
+                            '--repeat', '3', '--output', output])
+                with open(output, 'r') as f:
+                    if ext == 'json':
+                        saved = json.load(f)
+                    else:
+                        saved = list(csv.DictReader(f))
+                self.assertEqual(len(saved), len(res))
+                self.assertEqual(
+                    [str(r['batch_size']) for r in saved],
+                    [str(r['batch_size']) for r in res])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests ModelComponentContainer.
+"""
+import inspect
+import unittest
+from unittest import mock
+import numpy as np
+from onnx import helper
+from onnx.numpy_helper import to_array
+from skl2onnx.proto import TensorProto
+from onnxconverter_common.onnx_ops import __dict__ as dict_apply_operation
+from skl2onnx.common import _container
+from skl2onnx.common._container import (
+    ModelComponentContainer, _get_operation_list, _apply_operation_names
+)
+
+
+class TestModelComponentContainer(unittest.TestCase):
+
+    def test_unique_node_names(self):
+        container = ModelComponentContainer(9, dtype=np.float32)
+        container.add_node('Identity', 'X', 'Y0')
+        container.add_node('Identity', 'Y0', 'Y1', name='N0')
+        container.add_node('Identity', 'Y1', 'Y2', name='id')
+        container.add_node('Identity', 'Y2', 'Y3', name='id')
+        names = [node.name for node in container.nodes]
+        self.assertEqual(names, ['N0', 'N0-N1', 'id', 'id-N3'])
+        self.assertEqual(container.node_names, set(names))
+
+    def test_check_operators(self):
+        def check_operator(op_type):
+            raise AssertionError(op_type)
+
+        container = ModelComponentContainer(9, dtype=np.float32)
+        container._check_operator = check_operator
+        container.add_node('Identity', 'X', 'Y')
+        container.check_operators = True
+        with self.assertRaises(AssertionError):
+            container.add_node('Identity', 'Y', 'Z')
+
+    def test_add_initializer_raw_data(self):
+        container = ModelComponentContainer(9, dtype=np.float32)
+        values = np.arange(6, dtype=np.float64).reshape((2, 3))
+        init = container.add_initializer(
+            'X', TensorProto.FLOAT, values.shape, values.ravel())
+        self.assertEqual(len(init.float_data), 0)
+        self.assertEqual(len(init.raw_data), 6 * 4)
+        got = to_array(init)
+        self.assertEqual(got.dtype, np.float32)
+        self.assertEqual(got.tolist(), values.tolist())
+
+        values = np.array([3, -4], dtype='>i8')
+        init = container.add_initializer(
+            'Y', TensorProto.INT64, [2], values)
+        self.assertEqual(to_array(init).tolist(), [3, -4])
+
+        init = container.add_initializer(
+            'Z', TensorProto.INT64, [2], [3, -4])
+        self.assertEqual(list(init.int64_data), [3, -4])
+
+        init = container.add_initializer(
+            'W', TensorProto.INT64, [2], np.array([3., -4.]))
+        self.assertEqual(to_array(init).tolist(), [3, -4])
+        for values in [[3.5, -4.], [np.nan, 1.]]:
+            with self.assertRaises(ValueError):
+                container.add_initializer(
+                    'V', TensorProto.INT64, [2], np.array(values))
+
+    def test_make_raw_tensor_element_size(self):
+        # onnx >= 1.14 maps BFLOAT16 to float32
+        with mock.patch.object(_container, 'tensor_dtype_to_np_dtype',
+                               return_value=np.float32):
+            self.assertIsNone(_container._make_raw_tensor(
+                'B', TensorProto.BFLOAT16, [2],
+                np.array([1., -2.5], dtype=np.float32)))
+
+    @unittest.skipIf(not hasattr(helper, 'float32_to_bfloat16'),
+                     reason="onnx cannot convert floats into bfloat16")
+    def test_add_initializer_bfloat16(self):
+        container = ModelComponentContainer(9, dtype=np.float32)
+        init = container.add_initializer(
+            'B', TensorProto.BFLOAT16, [2],
+            np.array([1., -2.5], dtype=np.float32))
+        self.assertEqual(init.data_type, TensorProto.BFLOAT16)
+        self.assertEqual(
+            to_array(init).astype(np.float32).tolist(), [1., -2.5])
+
+    def test_operation_list(self):
+        operations = _get_operation_list()
+        self.assertIn('Add', operations)
+        for op_type, fct in operations.items():
+            self.assertTrue(fct.__name__.startswith('apply_'))
+            self.assertIn("'%s'" % op_type, inspect.getsource(fct))
+
+    def test_operation_names_complete(self):
+        # every function apply_* must be in the table
+        mapped = set(_apply_operation_names.values())
+        for name, fct in sorted(dict_apply_operation.items()):
+            if name.startswith('apply_') and callable(fct):
+                self.assertIn(name, mapped)
+
+
+if __name__ == "__main__":
+    unittest.main()
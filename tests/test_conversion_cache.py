@@ -0,0 +1,258 @@
+"""
+Tests ConversionCache and FragmentCache.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from functools import partial
+import numpy as np
+from sklearn.datasets import load_iris
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import FeatureUnion, make_pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType, StringTensorType
+from skl2onnx.helpers import conversion_cache
+from skl2onnx.helpers.conversion_cache import (
+    ConversionCache, FingerprintError, FragmentCache, get_conversion_key,
+    get_model_fingerprint
+)
+
+
+class TestConversionCache(unittest.TestCase):
+
+    def setUp(self):
+        X, y = load_iris(return_X_y=True)
+        self.X, self.y = X, y
+        self.initial_types = [('X', FloatTensorType([None, 4]))]
+
+    def fit(self, C=1.):
+        return make_pipeline(
+            StandardScaler(),
+            LogisticRegression(solver='liblinear', C=C)).fit(self.X, self.y)
+
+    def test_conversion_key(self):
+        model = self.fit()
+        key = get_conversion_key(model, self.initial_types)
+        self.assertEqual(key, get_conversion_key(self.fit(),
+                                                 self.initial_types))
+        self.assertNotEqual(key, get_conversion_key(self.fit(C=0.5),
+                                                    self.initial_types))
+        self.assertNotEqual(key, get_conversion_key(model, self.initial_types,
+                                                    target_opset=9))
+        self.assertNotEqual(
+            key, get_conversion_key(
+                model, [('X', FloatTensorType([None, 3]))]))
+
+        # options keyed by id(model) do not depend on the process
+        options = {id(model.steps[-1][-1]): {'zipmap': False}}
+        model2 = self.fit()
+        options2 = {id(model2.steps[-1][-1]): {'zipmap': False}}
+        self.assertEqual(
+            get_conversion_key(model, self.initial_types, options=options),
+            get_conversion_key(model2, self.initial_types, options=options2))
+        self.assertNotEqual(
+            key, get_conversion_key(model, self.initial_types,
+                                    options=options))
+
+    def test_conversion_cache(self):
+        calls = []
+        convert_sklearn = conversion_cache.convert_sklearn
+
+        def convert(*args, **kwargs):
+            calls.append(1)
+            return convert_sklearn(*args, **kwargs)
+
+        conversion_cache.convert_sklearn = convert
+        try:
+            with tempfile.TemporaryDirectory() as folder:
+                cache = ConversionCache(folder)
+                onx1 = cache.convert_sklearn(
+                    self.fit(), 'model', initial_types=self.initial_types)
+                onx2 = cache.convert_sklearn(
+                    self.fit(), 'model', initial_types=self.initial_types)
+                self.assertEqual(len(calls), 1)
+                self.assertEqual(onx1.SerializeToString(),
+                                 onx2.SerializeToString())
+                cache.convert_sklearn(
+                    self.fit(C=0.5), 'model',
+                    initial_types=self.initial_types)
+                self.assertEqual(len(calls), 2)
+                self.assertEqual(len(os.listdir(folder)), 2)
+        finally:
+            conversion_cache.convert_sklearn = convert_sklearn
+
+    def test_conversion_cache_eviction(self):
+        with tempfile.TemporaryDirectory() as folder:
+            cache = ConversionCache(folder)
+            onx = cache.convert_sklearn(
+                self.fit(), 'model', initial_types=self.initial_types)
+            size = len(onx.SerializeToString())
+            cache.max_size = int(size * 1.5)
+            cache.convert_sklearn(
+                self.fit(C=0.5), 'model', initial_types=self.initial_types)
+            names = os.listdir(folder)
+            self.assertEqual(len(names), 1)
+            key = get_conversion_key(self.fit(C=0.5), self.initial_types,
+                                     name='model')
+            self.assertEqual(names, [key + '.onnx'])
+            self.assertIsNone(cache.get(get_conversion_key(
+                self.fit(), self.initial_types, name='model')))
+            self.assertIsNotNone(cache.get(key))
+
+    def test_model_fingerprint(self):
+        vocabulary = {'b': np.int64(1), 'a': np.int64(0)}
+        same = dict(sorted(vocabulary.items()))
+        self.assertEqual(get_model_fingerprint(vocabulary),
+                         get_model_fingerprint(same))
+        self.assertNotEqual(get_model_fingerprint(vocabulary),
+                            get_model_fingerprint({'a': 1, 'b': 0}))
+        self.assertEqual(get_model_fingerprint({'a', 'b'}),
+                         get_model_fingerprint({'b', 'a'}))
+
+    def test_function_fingerprint(self):
+        def make_tokenizer(sep):
+            if sep:
+                def tokenizer(text):
+                    return text.split(',')
+            else:
+                def tokenizer(text):
+                    return text.split()
+            return tokenizer
+
+        first, second = make_tokenizer(True), make_tokenizer(False)
+        self.assertEqual(first.__qualname__, second.__qualname__)
+        self.assertEqual(get_model_fingerprint(first),
+                         get_model_fingerprint(make_tokenizer(True)))
+        self.assertNotEqual(get_model_fingerprint(first),
+                            get_model_fingerprint(second))
+        self.assertNotEqual(
+            get_model_fingerprint(TfidfVectorizer(tokenizer=first)),
+            get_model_fingerprint(TfidfVectorizer(tokenizer=second)))
+
+    def test_closure_fingerprint(self):
+        def mk(factor):
+            def scale(X):
+                return X * factor
+            return scale
+
+        def key(func):
+            return get_conversion_key(FunctionTransformer(func),
+                                      initial_types=self.initial_types)
+
+        self.assertEqual(key(mk(2)), key(mk(2)))
+        self.assertNotEqual(key(mk(2)), key(mk(3)))
+        self.assertNotEqual(key(partial(np.multiply, 2)),
+                            key(partial(np.multiply, 3)))
+        self.assertNotEqual(key(partial(np.multiply, x2=2)),
+                            key(partial(np.multiply, x2=3)))
+
+        def scale(X, factor=2, *, offset=0):
+            return X * factor + offset
+
+        first = key(scale)
+        scale.__defaults__ = (3, )
+        second = key(scale)
+        scale.__kwdefaults__ = {'offset': 1}
+        self.assertEqual(len({first, second, key(scale)}), 3)
+
+    def test_unhashable_not_cached(self):
+        model = StandardScaler().fit(self.X)
+        model.lock_ = threading.Lock()
+        self.assertRaises(FingerprintError, get_model_fingerprint, model)
+        cache_dir = tempfile.mkdtemp()
+        try:
+            cache = ConversionCache(cache_dir)
+            onx = cache.convert_sklearn(model,
+                                        initial_types=self.initial_types)
+            self.assertEqual(len(onx.graph.node), len(convert_sklearn(
+                model, initial_types=self.initial_types).graph.node))
+            self.assertEqual(os.listdir(cache_dir), [])
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def _check_fragment_cache(self, cache, n_jobs=None):
+        corpus = np.array(["first document", "second document",
+                           "third one", "is it the first one"] * 3)
+        y = np.array([0, 1, 2, 1] * 3)
+        union = FeatureUnion([
+            ('words', TfidfVectorizer()),
+            ('chars', TfidfVectorizer(analyzer='char', ngram_range=(1, 2)))])
+        model = make_pipeline(
+            union, LogisticRegression(solver='liblinear')).fit(corpus, y)
+        initial_types = [('text', StringTensorType([None, 1]))]
+
+        expected = convert_sklearn(model, 'model', initial_types)
+        got = convert_sklearn(model, 'model', initial_types,
+                              fragment_cache=cache, n_jobs=n_jobs)
+        self.assertEqual(expected.SerializeToString(),
+                         got.SerializeToString())
+        self.assertEqual(cache.hits, 0)
+        misses = cache.misses
+
+        # only the classifier changes
+        model.steps[-1][-1].set_params(C=0.5).fit(
+            union.transform(corpus), y)
+        expected = convert_sklearn(model, 'model', initial_types)
+        got = convert_sklearn(model, 'model', initial_types,
+                              fragment_cache=cache, n_jobs=n_jobs)
+        self.assertEqual(expected.SerializeToString(),
+                         got.SerializeToString())
+        # the vectorizers declare the operators which are cached
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(cache.misses, misses + 3)
+
+    def test_fragment_cache(self):
+        self._check_fragment_cache(FragmentCache())
+
+    def test_fragment_cache_folder(self):
+        with tempfile.TemporaryDirectory() as folder:
+            self._check_fragment_cache(FragmentCache(folder))
+            self.assertGreater(len(os.listdir(folder)), 0)
+
+    def test_fragment_cache_files(self):
+        with tempfile.TemporaryDirectory() as folder:
+            self._check_fragment_cache(FragmentCache(folder))
+            names = os.listdir(folder)
+            keys = set(os.path.splitext(name)[0] for name in names)
+            self.assertEqual(set(names),
+                             set(k + ext for k in keys
+                                 for ext in ['.json', '.graph']))
+            for name in names:
+                if name.endswith('.json'):
+                    with open(os.path.join(folder, name), 'r') as f:
+                        manifest = json.load(f)
+                    self.assertEqual(set(manifest),
+                                     {'requests', 'node_log'})
+
+    def test_fragment_cache_eviction(self):
+        for folder in [None, tempfile.mkdtemp()]:
+            with self.subTest(folder=folder):
+                cache = FragmentCache(folder)
+                # file times may have a coarse resolution
+                for key in ['a', 'b']:
+                    cache.put(key, '{}', key.encode() * 100)
+                    time.sleep(0.05)
+                self.assertIsNotNone(cache.get('a'))
+                time.sleep(0.05)
+                cache.max_size = 250
+                cache.put('c', '{}', b'c' * 100)
+                # 'b' is the least recently used fragment
+                self.assertIsNone(cache.get('b'))
+                self.assertEqual(cache.get('a'), ('{}', b'a' * 100))
+                self.assertIsNotNone(cache.get('c'))
+                if folder is not None:
+                    self.assertEqual(len(os.listdir(folder)), 4)
+                    shutil.rmtree(folder)
+
+    def test_fragment_cache_parallel(self):
+        self._check_fragment_cache(FragmentCache(), n_jobs=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
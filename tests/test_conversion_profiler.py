@@ -0,0 +1,61 @@
+"""
+Tests ConversionProfiler.
+"""
+import tracemalloc
+import unittest
+from sklearn.datasets import load_iris
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.pipeline import FeatureUnion, Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from skl2onnx import convert_sklearn
+from skl2onnx.common import _profiling
+from skl2onnx.common.data_types import FloatTensorType
+from skl2onnx.helpers import ConversionProfiler
+
+
+class TestConversionProfiler(unittest.TestCase):
+
+    def _convert(self, memory):
+        X, y = load_iris(return_X_y=True)
+        model = Pipeline([
+            ('union', FeatureUnion([('std', StandardScaler()),
+                                    ('minmax', MinMaxScaler())])),
+            ('knn', KNeighborsRegressor())]).fit(X, y)
+        with ConversionProfiler(memory=memory) as prof:
+            self.assertIs(_profiling.active_profiler, prof)
+            onx = convert_sklearn(
+                model, initial_types=[('X', FloatTensorType([None, 4]))],
+                n_jobs=2)
+        self.assertIsNone(_profiling.active_profiler)
+        self.assertFalse(tracemalloc.is_tracing())
+        return onx, prof
+
+    def test_profiler(self):
+        onx, prof = self._convert(True)
+        df = prof.to_dataframe()
+        models = set(df.model)
+        self.assertTrue({'Pipeline', 'FeatureUnion', 'StandardScaler',
+                         'MinMaxScaler', 'KNeighborsRegressor'} <= models)
+        self.assertEqual(set(df[df.model == 'Pipeline'].name), {''})
+        self.assertIn('SklearnConcat', set(df.type))
+        self.assertEqual(df.n_nodes.sum(), len(onx.graph.node))
+        self.assertEqual(df.initializer_bytes.sum(),
+                         sum(init.ByteSize()
+                             for init in onx.graph.initializer))
+        knn = df[df.model == 'KNeighborsRegressor'].iloc[0]
+        self.assertGreater(knn.initializer_bytes, 4 * 150 * 4)
+        self.assertGreater(knn.convert_time, 0)
+        self.assertGreater(knn.convert_memory, 0)
+        self.assertGreater(df.parse_time.sum(), 0)
+        self.assertGreater(df.shape_time.sum(), 0)
+
+    def test_profiler_no_memory(self):
+        onx, prof = self._convert(False)
+        report = prof.report()
+        self.assertEqual(sum(row['n_nodes'] for row in report),
+                         len(onx.graph.node))
+        self.assertEqual(sum(row['convert_memory'] for row in report), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Tests function convert_sklearn_many.
+"""
+import unittest
+from unittest import mock
+import numpy as np
+from onnx import ModelProto
+from sklearn.base import BaseEstimator
+from sklearn.datasets import load_iris
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+from skl2onnx import (
+    convert, convert_sklearn, convert_sklearn_many,
+    update_registered_converter
+)
+from skl2onnx._supported_operators import sklearn_operator_name_map
+from skl2onnx.common._registration import (
+    _converter_pool, _shape_calculator_pool
+)
+from skl2onnx.common.data_types import FloatTensorType
+from skl2onnx.common.exceptions import MissingShapeCalculator
+
+
+class UnknownEstimator(BaseEstimator):
+
+    def fit(self, X, y=None):
+        return self
+
+
+class CustomIdentity(BaseEstimator):
+
+    def fit(self, X, y=None):
+        return self
+
+
+def custom_identity_shape_calculator(operator):
+    operator.outputs[0].type = operator.inputs[0].type
+
+
+def custom_identity_converter(scope, operator, container):
+    container.add_node('Identity', operator.inputs[0].full_name,
+                       operator.outputs[0].full_name,
+                       name=scope.get_unique_operator_name('CustomIdentity'))
+
+
+class TestConvertMany(unittest.TestCase):
+
+    def _models(self):
+        X, y = load_iris(return_X_y=True)
+        return [
+            LogisticRegression(solver='liblinear').fit(X, y),
+            UnknownEstimator().fit(X),
+            StandardScaler().fit(X),
+            FunctionTransformer(lambda x: x).fit(X),
+            LinearRegression().fit(X[:, :2], y),
+        ]
+
+    def _check_results(self, models, results):
+        self.assertEqual([res[0] for res in results],
+                         list(range(len(models))))
+        for i in [0, 2, 4]:
+            index, content, exc = results[i]
+            self.assertIsNone(exc)
+            n_features = 2 if i == 4 else 4
+            expected = convert_sklearn(
+                models[i], 'many',
+                [('X', FloatTensorType([None, n_features]))])
+            self.assertEqual(content, expected.SerializeToString())
+            onx = ModelProto()
+            onx.ParseFromString(content)
+            self.assertEqual(onx.graph.name, 'many')
+        self.assertIsNone(results[1][1])
+        self.assertIsInstance(results[1][2], MissingShapeCalculator)
+        self.assertIsNone(results[3][1])
+        self.assertIsInstance(results[3][2], Exception)
+
+    def test_convert_sklearn_many(self):
+        def initial_types(model):
+            n_features = getattr(model, 'n_features_in_', None)
+            if isinstance(model, LinearRegression):
+                n_features = model.coef_.shape[-1]
+            return [('X', FloatTensorType([None, n_features or 4]))]
+
+        models = self._models()
+        for n_jobs in [None, 2]:
+            with self.subTest(n_jobs=n_jobs):
+                results = list(convert_sklearn_many(
+                    iter(models), initial_types=initial_types,
+                    n_jobs=n_jobs, name='many', dtype=np.float32))
+                self._check_results(models, results)
+
+    def test_convert_sklearn_many_errors(self):
+        with self.assertRaises(ValueError):
+            convert_sklearn_many([], intermediate=True)
+        with self.assertRaises(NotImplementedError):
+            convert_sklearn_many([], external_data='data.bin')
+        for n_jobs in [0, 1.5, '2', True]:
+            with self.assertRaises(ValueError):
+                convert_sklearn_many([], n_jobs=n_jobs)
+
+    def test_convert_sklearn_many_initial_types_error(self):
+        def initial_types(model):
+            if isinstance(model, UnknownEstimator):
+                raise TypeError("no initial types")
+            return [('X', FloatTensorType([None, 4]))]
+
+        X = load_iris(return_X_y=True)[0]
+        models = [StandardScaler().fit(X), UnknownEstimator().fit(X),
+                  StandardScaler().fit(X)]
+        for n_jobs in [None, 2]:
+            with self.subTest(n_jobs=n_jobs):
+                results = list(convert_sklearn_many(
+                    models, initial_types=initial_types, n_jobs=n_jobs))
+                self.assertEqual([res[0] for res in results], [0, 1, 2])
+                self.assertIsNone(results[0][2])
+                self.assertIsInstance(results[1][2], TypeError)
+                self.assertIsNone(results[2][2])
+
+    def test_convert_sklearn_many_bounded(self):
+        X = load_iris(return_X_y=True)[0]
+        consumed = []
+
+        def models():
+            for i in range(20):
+                consumed.append(i)
+                yield StandardScaler().fit(X)
+
+        results = convert_sklearn_many(
+            models(), initial_types=[('X', FloatTensorType([None, 4]))],
+            n_jobs=2)
+        self.assertEqual(next(results)[0], 0)
+        self.assertLessEqual(len(consumed), 4)
+        self.assertEqual(len(list(results)), 19)
+
+    def test_convert_sklearn_many_spawn(self):
+        X = load_iris(return_X_y=True)[0]
+        update_registered_converter(
+            CustomIdentity, 'CustomIdentity',
+            custom_identity_shape_calculator, custom_identity_converter)
+        try:
+            with mock.patch.object(convert, '_can_fork', return_value=False):
+                results = list(convert_sklearn_many(
+                    [CustomIdentity().fit(X), StandardScaler().fit(X)],
+                    initial_types=[('X', FloatTensorType([None, 4]))],
+                    n_jobs=2))
+        finally:
+            del sklearn_operator_name_map[CustomIdentity]
+            del _converter_pool['CustomIdentity']
+            del _shape_calculator_pool['CustomIdentity']
+        self.assertEqual([res[2] for res in results], [None, None])
+        onx = ModelProto()
+        onx.ParseFromString(results[0][1])
+        self.assertEqual([node.op_type for node in onx.graph.node],
+                         ['Identity'])
+
+
+if __name__ == "__main__":
+    unittest.main()
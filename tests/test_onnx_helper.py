@@ -1,17 +1,23 @@
 """
 Tests on functions in *onnx_helper*.
 """
+import os
+import tempfile
 import unittest
 from distutils.version import StrictVersion
 import numpy
 from sklearn import __version__ as sklearn_version
+from sklearn.neighbors import KNeighborsRegressor
 from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import Binarizer, StandardScaler, OneHotEncoder
+from onnx import TensorProto, numpy_helper
+from onnx.external_data_helper import load_external_data_for_model
 from skl2onnx import convert_sklearn
 from skl2onnx.common.data_types import FloatTensorType
 from skl2onnx.helpers.onnx_helper import (
     load_onnx_model,
     save_onnx_model,
+    save_initializers_as_external_data,
     select_model_inputs_outputs,
 )
 
@@ -79,6 +85,109 @@ class TestOnnxHelper(unittest.TestCase):
         assert X1.shape == (4, 2)
         assert X2.shape == (4, 2)
 
+    def test_onnx_helper_external_data(self):
+        X = numpy.random.rand(100, 4)
+        y = X.sum(axis=1)
+        model = KNeighborsRegressor(n_neighbors=3).fit(X, y)
+        X = X.astype(numpy.float32)
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "knn.onnx")
+            model_onnx = convert_sklearn(
+                model, "knn", [("input", FloatTensorType([None, 4]))])
+            save_onnx_model(model_onnx, filename, external_data="knn.data",
+                            alignment=64)
+            external = [init for init in model_onnx.graph.initializer
+                        if init.data_location == TensorProto.EXTERNAL]
+            self.assertEqual(len(external), 1)
+            info = {e.key: e.value for e in external[0].external_data}
+            self.assertEqual(info['location'], "knn.data")
+            self.assertEqual(int(info['offset']) % 64, 0)
+            self.assertEqual(int(info['length']), X.size * 4)
+            self.assertTrue(os.path.exists(os.path.join(folder, "knn.data")))
+
+            loaded = load_onnx_model(filename)
+            init = [i for i in loaded.graph.initializer
+                    if i.name == external[0].name][0]
+            self.assertEqual(len(init.raw_data), X.size * 4)
+
+            path = os.path.join(folder, "knn2.data")
+            model_onnx = convert_sklearn(
+                model, "knn", [("input", FloatTensorType([None, 4]))],
+                external_data=path)
+            filename = os.path.join(folder, "knn2.onnx")
+            save_onnx_model(model_onnx, filename)
+            try:
+                from onnxruntime import InferenceSession
+            except ImportError:
+                return
+            session = InferenceSession(filename)
+            got = session.run(None, {"input": X[:1]})[0]
+            numpy.testing.assert_allclose(
+                got.ravel(), model.predict(X[:1]), rtol=1e-5)
+
+    def test_onnx_helper_external_data_location(self):
+        X = numpy.random.rand(100, 4)
+        model = KNeighborsRegressor(n_neighbors=3).fit(X, X.sum(axis=1))
+
+        def location(filename, external_data):
+            model_onnx = convert_sklearn(
+                model, "knn", [("input", FloatTensorType([None, 4]))])
+            save_onnx_model(model_onnx, filename,
+                            external_data=external_data)
+            external = [init for init in model_onnx.graph.initializer
+                        if init.data_location == TensorProto.EXTERNAL]
+            return {e.key: e.value for e in external[0].external_data}[
+                'location']
+
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "knn.onnx")
+            self.assertEqual(
+                location(filename, os.path.join(folder, "knn.data")),
+                "knn.data")
+            os.mkdir(os.path.join(folder, "data"))
+            sub = os.path.join(folder, "data", "knn.data")
+            self.assertEqual(location(filename, sub),
+                             os.path.join("data", "knn.data"))
+            self.assertEqual(load_onnx_model(filename).graph.name, "knn")
+            self.assertRaises(
+                ValueError, location, os.path.join(folder, "data", "k.onnx"),
+                os.path.join(folder, "knn.data"))
+            self.assertRaises(ValueError, location, filename,
+                              os.path.join("..", "knn.data"))
+
+    def test_save_initializers_as_external_data_threshold(self):
+        model = make_pipeline(StandardScaler())
+        model.fit(numpy.array([[0.1, 1.1], [0.2, 2.2]]))
+        model_onnx = convert_sklearn(model, "scaler",
+                                     [("input", FloatTensorType([None, 2]))])
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "scaler.data")
+            save_initializers_as_external_data(model_onnx, path)
+            self.assertFalse(os.path.exists(path))
+
+    def test_save_initializers_as_external_data_append(self):
+        X = numpy.random.rand(100, 4)
+        model = KNeighborsRegressor(n_neighbors=3).fit(X, X.sum(axis=1))
+        model_onnx = convert_sklearn(
+            model, "knn", [("input", FloatTensorType([None, 4]))])
+        expected = {init.name: numpy_helper.to_array(init)
+                    for init in model_onnx.graph.initializer}
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "knn.data")
+            save_initializers_as_external_data(
+                model_onnx, path, size_threshold=1000, alignment=64)
+            size = os.path.getsize(path)
+            save_initializers_as_external_data(
+                model_onnx, path, size_threshold=100, alignment=64)
+            self.assertGreater(os.path.getsize(path), size)
+            external = [init for init in model_onnx.graph.initializer
+                        if init.data_location == TensorProto.EXTERNAL]
+            self.assertEqual(len(external), 2)
+            load_external_data_for_model(model_onnx, folder)
+            for init in model_onnx.graph.initializer:
+                numpy.testing.assert_array_equal(
+                    numpy_helper.to_array(init), expected[init.name])
+
 
 if __name__ == "__main__":
     unittest.main()
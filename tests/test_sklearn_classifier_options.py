@@ -0,0 +1,73 @@
+"""Tests options zipmap and labels_only of classifiers."""
+
+import unittest
+import numpy
+from numpy.testing import assert_almost_equal
+from sklearn.datasets import load_iris
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from onnxruntime import InferenceSession
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+from skl2onnx.common.data_types import onnx_built_with_ml
+
+
+class TestClassifierOptions(unittest.TestCase):
+
+    def _fit(self, model):
+        X, y = load_iris(return_X_y=True)
+        model.fit(X, y)
+        return model, X.astype(numpy.float32)
+
+    def _run(self, model, X, options):
+        model_onnx = convert_sklearn(
+            model, 'classifier',
+            [('input', FloatTensorType([None, X.shape[1]]))],
+            options=options)
+        ops = [node.op_type for node in model_onnx.graph.node]
+        sess = InferenceSession(model_onnx.SerializeToString())
+        return ops, sess.get_outputs(), sess.run(None, {'input': X})
+
+    @unittest.skipIf(not onnx_built_with_ml(),
+                     reason="Requires ONNX-ML extension.")
+    def test_zipmap_false(self):
+        model, X = self._fit(LogisticRegression(
+            solver='liblinear', multi_class='ovr'))
+        # options given for a class or for one model
+        for options in [{LogisticRegression: {'zipmap': False}},
+                        {id(model): {'zipmap': False}}]:
+            ops, outputs, got = self._run(model, X, options)
+            self.assertNotIn('ZipMap', ops)
+            self.assertEqual(outputs[1].type, 'tensor(float)')
+            assert_almost_equal(got[0], model.predict(X))
+            assert_almost_equal(got[1], model.predict_proba(X), decimal=5)
+
+    @unittest.skipIf(not onnx_built_with_ml(),
+                     reason="Requires ONNX-ML extension.")
+    def test_zipmap_default(self):
+        model, X = self._fit(LogisticRegression(
+            solver='liblinear', multi_class='ovr'))
+        ops, outputs, got = self._run(model, X, None)
+        self.assertIn('ZipMap', ops)
+        self.assertIsInstance(got[1][0], dict)
+
+    @unittest.skipIf(not onnx_built_with_ml(),
+                     reason="Requires ONNX-ML extension.")
+    def test_labels_only(self):
+        for model in [make_pipeline(StandardScaler(), LogisticRegression(
+                          solver='liblinear', multi_class='ovr')),
+                      SVC(gamma='scale')]:
+            model, X = self._fit(model)
+            last = model.steps[-1][1] if hasattr(model, 'steps') else model
+            with self.subTest(model=last.__class__.__name__):
+                ops, outputs, got = self._run(
+                    model, X, {id(last): {'labels_only': True}})
+                self.assertNotIn('ZipMap', ops)
+                self.assertEqual(len(outputs), 1)
+                assert_almost_equal(got[0], model.predict(X))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,6 +16,9 @@ from sklearn.datasets import make_classification
 from skl2onnx.common.data_types import onnx_built_with_ml
 from skl2onnx.common.data_types import FloatTensorType, Int64TensorType
 from skl2onnx import convert_sklearn
+from skl2onnx.common.tree_ensemble import (
+    sklearn_threshold, sklearn_threshold_array
+)
 from test_utils import (
     dump_one_class_classification,
     dump_binary_classification,
@@ -159,6 +162,19 @@ class TestSklearnDecisionTreeModels(unittest.TestCase):
                           " <= StrictVersion('0.2.1')"
         )
 
+    def test_sklearn_threshold_array(self):
+        rnd = np.random.RandomState(0)
+        thresholds = np.hstack([
+            rnd.randn(1000), rnd.randn(1000) * 1e6, rnd.rand(100) * 1e-30,
+            rnd.randn(1000).astype(np.float32).astype(np.float64),
+            np.array([0., 1., -1., 0.5, 1e-45])])
+        for dtype in [np.float32, np.float64]:
+            expected = np.array([sklearn_threshold(th, dtype, 'BRANCH_LEQ')
+                                 for th in thresholds])
+            got = sklearn_threshold_array(thresholds, dtype, 'BRANCH_LEQ')
+            self.assertEqual(got.dtype, np.float64)
+            self.assertEqual(expected.tolist(), got.tolist())
+
 
 if __name__ == "__main__":
     unittest.main()
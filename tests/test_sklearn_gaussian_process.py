@@ -607,6 +607,43 @@ class TestSklearnGaussianProcess(unittest.TestCase):
                            predict_attributes=options[
                              GaussianProcessRegressor])
 
+    @unittest.skipIf(
+        StrictVersion(ort_version) <= StrictVersion(THRESHOLD),
+        reason="onnxruntime %s" % THRESHOLD)
+    def test_gpr_block_size(self):
+        rs = np.random.RandomState(0)
+        X = rs.randn(53, 3)
+        y = np.sin(X.sum(axis=1))
+        kernels = [C(2.) * RBF(1.5), DotProduct() + C(1.),
+                   RationalQuadratic()]
+        for kernel in kernels:
+            for yt in [y, np.vstack([y, -y]).T]:
+                gp = GaussianProcessRegressor(kernel=kernel, alpha=1e-2,
+                                              optimizer=None)
+                gp.fit(X, yt)
+                exp = gp.predict(X[:11])
+                for block_size in [10, 100]:
+                    with self.subTest(kernel=kernel, n_targets=yt.ndim,
+                                      block_size=block_size):
+                        options = {GaussianProcessRegressor: {
+                            'block_size': block_size}}
+                        model_onnx = to_onnx(gp, X.astype(np.float64),
+                                             options=options,
+                                             dtype=np.float64)
+                        sess = InferenceSession(
+                            model_onnx.SerializeToString())
+                        got = sess.run(None, {'X': X[:11]})[0]
+                        assert_almost_equal(got.reshape(exp.shape), exp)
+
+    def test_gpr_block_size_return_std(self):
+        gp = GaussianProcessRegressor(alpha=1e-2, optimizer=None)
+        gp.fit(Xtrain_, Ytrain_)
+        gp.predict(Xtrain_, return_std=True)
+        options = {GaussianProcessRegressor: {'block_size': 10,
+                                              'return_std': True}}
+        with self.assertRaises(NotImplementedError):
+            to_onnx(gp, Xtrain_.astype(np.float32), options=options)
+
     @unittest.skipIf(True, "needs to convert cho_solve")
     def test_gpr_rbf_fitted_return_cov(self):
 
@@ -4,10 +4,16 @@ Tests scikit-learn's KNeighbours Classifier and Regressor converters.
 import unittest
 import numpy
 from sklearn import datasets
-from sklearn.neighbors import KNeighborsRegressor, KNeighborsClassifier
+from sklearn.neighbors import (
+    KNeighborsRegressor, KNeighborsClassifier, NearestNeighbors
+)
 from skl2onnx import convert_sklearn
 from skl2onnx.common.data_types import FloatTensorType, Int64TensorType
 from skl2onnx.common.data_types import onnx_built_with_ml
+from skl2onnx.operator_converters.nearest_neighbours import (
+    _build_partitions
+)
+from onnxruntime import InferenceSession
 from test_utils import dump_data_and_model
 
 
@@ -43,7 +49,7 @@ class TestNearestNeighbourConverter(unittest.TestCase):
             X.astype(numpy.float32)[:7],
             model,
             model_onnx,
-            basename="SklearnKNeighborsRegressor-OneOffArray",
+            basename="SklearnKNeighborsRegressor",
             allow_failure="StrictVersion(onnxruntime.__version__) "
             "<= StrictVersion('0.2.1') or "
             "StrictVersion(onnx.__version__) == StrictVersion('1.4.1')",
@@ -59,7 +65,7 @@ class TestNearestNeighbourConverter(unittest.TestCase):
             X.astype(numpy.float32)[:2],
             model,
             model_onnx,
-            basename="SklearnKNeighborsRegressor2-OneOffArray",
+            basename="SklearnKNeighborsRegressor2",
             allow_failure="StrictVersion(onnxruntime.__version__) "
             "<= StrictVersion('0.2.1') or "
             "StrictVersion(onnx.__version__) == StrictVersion('1.4.1')",
@@ -75,7 +81,7 @@ class TestNearestNeighbourConverter(unittest.TestCase):
             X.astype(numpy.float32)[:2],
             model,
             model_onnx,
-            basename="SklearnKNeighborsRegressor2-OneOffArray",
+            basename="SklearnKNeighborsRegressor2",
             allow_failure="StrictVersion(onnxruntime.__version__) "
             "<= StrictVersion('0.2.1') or "
             "StrictVersion(onnx.__version__) == StrictVersion('1.4.1')",
@@ -90,7 +96,7 @@ class TestNearestNeighbourConverter(unittest.TestCase):
             X.astype(numpy.float32)[:7],
             model,
             model_onnx,
-            basename="SklearnKNeighborsRegressorWeightsDistance-OneOffArray",
+            basename="SklearnKNeighborsRegressorWeightsDistance",
             allow_failure="StrictVersion(onnxruntime.__version__) <= "
             "StrictVersion('0.2.1') or "
             "StrictVersion(onnx.__version__) == StrictVersion('1.4.1')",
@@ -105,7 +111,7 @@ class TestNearestNeighbourConverter(unittest.TestCase):
             X.astype(numpy.float32)[:7],
             model,
             model_onnx,
-            basename="SklearnKNeighborsRegressorMetricCityblock-OneOffArray",
+            basename="SklearnKNeighborsRegressorMetricCityblock",
             allow_failure="StrictVersion(onnxruntime.__version__) <= "
             "StrictVersion('0.2.1') or "
             "StrictVersion(onnx.__version__) == StrictVersion('1.4.1')",
@@ -126,7 +132,7 @@ class TestNearestNeighbourConverter(unittest.TestCase):
             X.astype(numpy.float32),
             model,
             model_onnx,
-            basename="SklearnKNeighborsClassifierBinary-OneOffArray",
+            basename="SklearnKNeighborsClassifierBinary",
             allow_failure="StrictVersion(onnx.__version__) "
             "== StrictVersion('1.1.2') or "
             "StrictVersion(onnxruntime.__version__) <= StrictVersion('0.2.1') "
@@ -148,7 +154,7 @@ class TestNearestNeighbourConverter(unittest.TestCase):
             X.astype(numpy.float32),
             model,
             model_onnx,
-            basename="SklearnKNeighborsClassifierMulti-OneOffArray",
+            basename="SklearnKNeighborsClassifierMulti",
             allow_failure="StrictVersion(onnx.__version__) "
             "== StrictVersion('1.1.2') or "
             "StrictVersion(onnxruntime.__version__) <= StrictVersion('0.2.1') "
@@ -163,7 +169,7 @@ class TestNearestNeighbourConverter(unittest.TestCase):
         self.assertIsNotNone(model_onnx)
         dump_data_and_model(
             X.astype(numpy.float32)[:7], model, model_onnx,
-            basename="SklearnKNeighborsClassifierWeightsDistance-OneOffArray",
+            basename="SklearnKNeighborsClassifierWeightsDistance",
             allow_failure="StrictVersion(onnxruntime.__version__) <= "
             "StrictVersion('0.2.1') or "
             "StrictVersion(onnx.__version__) == StrictVersion('1.4.1')")
@@ -176,7 +182,7 @@ class TestNearestNeighbourConverter(unittest.TestCase):
         self.assertIsNotNone(model_onnx)
         dump_data_and_model(
             X.astype(numpy.float32)[:7], model, model_onnx,
-            basename="SklearnKNeighborsClassifierMetricCityblock-OneOffArray",
+            basename="SklearnKNeighborsClassifierMetricCityblock",
             allow_failure="StrictVersion(onnxruntime.__version__) <= "
             "StrictVersion('0.2.1') or "
             "StrictVersion(onnx.__version__) == StrictVersion('1.4.1')")
@@ -194,11 +200,162 @@ class TestNearestNeighbourConverter(unittest.TestCase):
             X,
             model,
             model_onnx,
-            basename="SklearnGradientBoostingRegressionInt-OneOffArray",
+            basename="SklearnGradientBoostingRegressionInt-Dec4",
             allow_failure="StrictVersion(onnxruntime.__version__)"
                           " <= StrictVersion('0.2.1')"
         )
 
+    def test_model_knn_nearest_neighbors(self):
+        # random features avoid ties between neighbours
+        X = numpy.random.RandomState(0).rand(100, 4).astype(numpy.float32)
+        for metric in ['minkowski', 'cityblock']:
+            with self.subTest(metric=metric):
+                model = NearestNeighbors(n_neighbors=3, metric=metric)
+                model.fit(X)
+                model_onnx = convert_sklearn(
+                    model, 'KNN', [('input', FloatTensorType([None, 4]))])
+                sess = InferenceSession(model_onnx.SerializeToString())
+                indices, distances = sess.run(None, {'input': X[::5] + 0.01})
+                exp_distances, exp_indices = model.kneighbors(X[::5] + 0.01)
+                numpy.testing.assert_array_equal(indices, exp_indices)
+                numpy.testing.assert_almost_equal(
+                    distances, exp_distances, decimal=5)
+
+    def test_model_knn_regressor_gemm(self):
+        X = numpy.random.RandomState(0).rand(300, 5).astype(numpy.float32)
+        y = X.sum(axis=1)
+        model = KNeighborsRegressor(weights='distance').fit(X, y)
+        for optim, gemm in [(None, False), ('gemm', True)]:
+            with self.subTest(optim=optim):
+                model_onnx = convert_sklearn(
+                    model, 'KNN', [('input', FloatTensorType([None, 5]))],
+                    options={id(model): {'optim': optim}})
+                ops = set(node.op_type for node in model_onnx.graph.node)
+                self.assertEqual('Gemm' in ops, gemm)
+                sess = InferenceSession(model_onnx.SerializeToString())
+                # the first rows are training examples
+                XT = numpy.vstack([X[:10], X[::10] + 0.01])
+                got = sess.run(None, {'input': XT})[0]
+                numpy.testing.assert_almost_equal(
+                    got.ravel(), model.predict(XT), decimal=4)
+        with self.assertRaises(RuntimeError):
+            convert_sklearn(
+                model, 'KNN', [('input', FloatTensorType([None, 5]))],
+                options={id(model): {'optim': 'gemm'}}, target_opset=10)
+
+    def test_model_knn_clustered_far_from_origin(self):
+        # rows are close to each other compared to their norm,
+        # float32 ||x||^2 - 2xT' + ||T||^2 cannot rank them
+        rs = numpy.random.RandomState(0)
+        centres = rs.randn(20, 4) * 1e3
+        X = (centres[rs.randint(0, 20, 2000)] +
+             rs.randn(2000, 4) * 0.01).astype(numpy.float32)
+        XT = X[:100] + rs.randn(100, 4).astype(numpy.float32) * 1e-3
+        model = NearestNeighbors(n_neighbors=3).fit(X)
+        exp_indices = model.kneighbors(XT)[1]
+        for opset in [10, None]:
+            with self.subTest(target_opset=opset):
+                model_onnx = convert_sklearn(
+                    model, 'KNN', [('input', FloatTensorType([None, 4]))],
+                    target_opset=opset)
+                sess = InferenceSession(model_onnx.SerializeToString())
+                indices = sess.run(None, {'input': XT})[0]
+                numpy.testing.assert_array_equal(indices, exp_indices)
+
+    def test_model_knn_block_size(self):
+        rs = numpy.random.RandomState(0)
+        X = rs.rand(103, 4).astype(numpy.float32)
+        y = X.sum(axis=1)
+        XT = numpy.vstack([X[:5], rs.rand(10, 4).astype(numpy.float32)])
+        models = [KNeighborsRegressor(n_neighbors=4, weights='distance'),
+                  KNeighborsClassifier(n_neighbors=3, p=1),
+                  NearestNeighbors(n_neighbors=3, p=3)]
+        for model in models:
+            if isinstance(model, KNeighborsClassifier):
+                model.fit(X, (y > 2).astype(numpy.int64))
+            else:
+                model.fit(X, y)
+            # blocks smaller than n_neighbors, a padded last block
+            # and a single block
+            for block_size in [2, 10, 200]:
+                with self.subTest(model=model.__class__.__name__,
+                                  block_size=block_size):
+                    model_onnx = convert_sklearn(
+                        model, 'KNN', [('input', FloatTensorType([None, 4]))],
+                        options={id(model): {'block_size': block_size}})
+                    ops = set(node.op_type for node in model_onnx.graph.node)
+                    self.assertIn('Scan', ops)
+                    sess = InferenceSession(model_onnx.SerializeToString())
+                    got = sess.run(None, {'input': XT})
+                    if isinstance(model, NearestNeighbors):
+                        exp_distances, exp_indices = model.kneighbors(XT)
+                        numpy.testing.assert_array_equal(got[0], exp_indices)
+                        numpy.testing.assert_almost_equal(
+                            got[1], exp_distances, decimal=5)
+                    elif isinstance(model, KNeighborsClassifier):
+                        numpy.testing.assert_array_equal(
+                            got[0], model.predict(XT))
+                    else:
+                        numpy.testing.assert_almost_equal(
+                            got[0].ravel(), model.predict(XT), decimal=5)
+
+    def test_model_knn_block_size_opset10(self):
+        model, X = self._fit_model(KNeighborsRegressor(n_neighbors=2))
+        with self.assertRaises(RuntimeError):
+            convert_sklearn(model, 'KNN',
+                            [('input', FloatTensorType([None, 4]))],
+                            options={id(model): {'block_size': 10}},
+                            target_opset=10)
+
+    def test_model_knn_partitions(self):
+        rs = numpy.random.RandomState(0)
+        X = rs.rand(500, 4).astype(numpy.float32)
+        y = X.sum(axis=1)
+        XT = rs.rand(50, 4).astype(numpy.float32)
+        model = NearestNeighbors(n_neighbors=5).fit(X)
+        exp_distances, exp_indices = model.kneighbors(XT)
+        recalls = []
+        for n_probe in [1, 4, 20]:
+            with self.subTest(n_probe=n_probe):
+                model_onnx = convert_sklearn(
+                    model, 'KNN', [('input', FloatTensorType([None, 4]))],
+                    options={id(model): {'n_partitions': 20,
+                                         'n_probe': n_probe}})
+                sess = InferenceSession(model_onnx.SerializeToString())
+                indices, distances = sess.run(None, {'input': XT})
+                recalls.append(numpy.mean([
+                    len(set(a) & set(b)) for a, b in zip(
+                        indices, exp_indices)]) / 5)
+        # probing every partition is an exact search
+        numpy.testing.assert_array_equal(indices, exp_indices)
+        numpy.testing.assert_almost_equal(distances, exp_distances,
+                                          decimal=5)
+        self.assertGreater(recalls[1], recalls[0])
+        self.assertGreater(recalls[0], 0.3)
+
+        for model in [KNeighborsRegressor(n_neighbors=3).fit(X, y),
+                      KNeighborsClassifier(n_neighbors=3).fit(
+                          X, (y > 2).astype(numpy.int64))]:
+            with self.subTest(model=model.__class__.__name__):
+                model_onnx = convert_sklearn(
+                    model, 'KNN', [('input', FloatTensorType([None, 4]))],
+                    options={id(model): {'n_partitions': 10,
+                                         'n_probe': 10}})
+                sess = InferenceSession(model_onnx.SerializeToString())
+                got = sess.run(None, {'input': XT})[0]
+                numpy.testing.assert_almost_equal(
+                    got.ravel(), model.predict(XT), decimal=5)
+
+    def test_build_partitions(self):
+        rs = numpy.random.RandomState(0)
+        # a few outliers make small clusters
+        X = numpy.vstack([rs.rand(200, 3), rs.rand(3, 3) * 100])
+        centroids, partitions = _build_partitions(X, 30, 5)
+        self.assertEqual(centroids.shape, (len(partitions), 3))
+        self.assertGreaterEqual(min(len(p) for p in partitions), 5)
+        numpy.testing.assert_array_equal(
+            numpy.sort(numpy.hstack(partitions)), numpy.arange(X.shape[0]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -13,6 +13,13 @@ from sklearn.ensemble import (
     ExtraTreesClassifier, ExtraTreesRegressor
 )
 from skl2onnx.common.data_types import onnx_built_with_ml, FloatTensorType
+from skl2onnx.common.tree_ensemble import (
+    add_tree_to_attribute_pairs,
+    add_tree_to_attribute_pairs_array,
+    concatenate_tree_attribute_pairs,
+    get_default_tree_classifier_attribute_pairs,
+    get_default_tree_regressor_attribute_pairs,
+)
 from test_utils import (
     dump_one_class_classification,
     dump_binary_classification,
@@ -162,6 +169,39 @@ class TestSklearnTreeEnsembleModels(unittest.TestCase):
                           " <= StrictVersion('0.2.1')",
         )
 
+    def _check_attribute_arrays(self, model, is_classifier, counts, dtype):
+        if is_classifier:
+            attrs = get_default_tree_classifier_attribute_pairs()
+            attrs_array = get_default_tree_classifier_attribute_pairs()
+        else:
+            attrs = get_default_tree_regressor_attribute_pairs()
+            attrs_array = get_default_tree_regressor_attribute_pairs()
+        for tree_id, est in enumerate(model.estimators_):
+            add_tree_to_attribute_pairs(
+                attrs, is_classifier, est.tree_, tree_id, 0.5, 0,
+                counts, True, dtype=dtype)
+            add_tree_to_attribute_pairs_array(
+                attrs_array, is_classifier, est.tree_, tree_id, 0.5, 0,
+                counts, True, dtype=dtype)
+        concatenate_tree_attribute_pairs(attrs_array)
+        self.assertEqual(set(attrs), set(attrs_array))
+        for k, v in attrs.items():
+            if isinstance(v, list):
+                self.assertEqual(list(v), list(attrs_array[k]), k)
+
+    def test_tree_attribute_arrays(self):
+        X, y = load_iris(return_X_y=True)
+        clr = RandomForestClassifier(n_estimators=5, random_state=0)
+        clr.fit(X, y)
+        clr2 = RandomForestClassifier(n_estimators=5, random_state=0)
+        clr2.fit(X, y % 2)
+        reg = RandomForestRegressor(n_estimators=5, random_state=0)
+        reg.fit(X, y)
+        for dtype in [numpy.float32, numpy.float64]:
+            self._check_attribute_arrays(clr, True, True, dtype)
+            self._check_attribute_arrays(clr2, True, True, dtype)
+            self._check_attribute_arrays(reg, False, False, dtype)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,8 +2,16 @@
 Tests scikit-learn's binarizer converter.
 """
 
+import subprocess
+import sys
 import unittest
 from skl2onnx import supported_converters
+from skl2onnx._supported_operators import (
+    build_sklearn_operator_name_map, _LazyClassMap
+)
+from skl2onnx.common._registration import (
+    _converter_pool, _shape_calculator_pool, load_all_converters
+)
 
 
 class TestSupportedConverters(unittest.TestCase):
@@ -17,6 +25,44 @@ class TestSupportedConverters(unittest.TestCase):
         assert "BernoulliNB" in names
         assert len(names) > 35
 
+    def test_lazy_class_map(self):
+        class SVC:
+            pass
+
+        from sklearn.svm import SVC as SklearnSVC
+        classes = _LazyClassMap({'sklearn.svm.SVC': 1,
+                                 'sklearn.unknown_module.Model': 2})
+        self.assertNotIn(SVC, classes)
+        self.assertIn(SklearnSVC, classes)
+        self.assertEqual(classes[SklearnSVC], 1)
+        self.assertEqual(classes.get(SVC, 3), 3)
+        classes[SVC] = 4
+        self.assertEqual(dict(classes.items()), {SklearnSVC: 1, SVC: 4})
+
+    def test_lazy_registration(self):
+        load_all_converters()
+        names = supported_converters(False)
+        self.assertEqual(set(names), set(_converter_pool))
+        self.assertEqual(set(names), set(_shape_calculator_pool))
+        for name in build_sklearn_operator_name_map().values():
+            self.assertIn(name, _converter_pool)
+
+    def test_cold_start(self):
+        code = "\n".join([
+            "import sys",
+            "import numpy",
+            "from sklearn.linear_model import LinearRegression",
+            "from skl2onnx import convert_sklearn",
+            "from skl2onnx.common.data_types import FloatTensorType",
+            "X = numpy.array([[0, 1], [1, 0], [1, 1]], dtype=numpy.float32)",
+            "model = LinearRegression().fit(X, X.sum(axis=1))",
+            "convert_sklearn(model, initial_types=[",
+            "    ('X', FloatTensorType([None, 2]))])",
+            "print(sorted(name for name in sys.modules",
+            "             if 'gaussian_process' in name))"])
+        out = subprocess.check_output([sys.executable, "-c", code])
+        self.assertEqual(out.decode('ascii').strip(), "[]")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,174 @@
+"""
+Tests the parallel conversion of a topology.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from onnx import helper, TensorProto
+from sklearn.datasets import load_iris
+from sklearn.ensemble import BaggingClassifier, VotingClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.pipeline import FeatureUnion, Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+from skl2onnx import convert_sklearn
+from skl2onnx.common import _parallel
+from skl2onnx.common.data_types import FloatTensorType, StringTensorType
+
+
+class TestTopologyParallel(unittest.TestCase):
+
+    def _models(self):
+        X, y = load_iris(return_X_y=True)
+        types = [('X', FloatTensorType([None, 4]))]
+        yield BaggingClassifier(
+            DecisionTreeClassifier(max_depth=3), n_estimators=5,
+            random_state=0).fit(X, y), types
+        yield VotingClassifier(
+            [('lr', LogisticRegression(solver='liblinear',
+                                       multi_class='ovr')),
+             ('dt', DecisionTreeClassifier(max_depth=3))],
+            voting='soft', flatten_transform=False).fit(X, y), types
+        yield OneVsRestClassifier(
+            LogisticRegression(solver='liblinear')).fit(X, y), types
+        yield Pipeline([
+            ('union', FeatureUnion([('std', StandardScaler()),
+                                    ('minmax', MinMaxScaler())])),
+            ('lr', LogisticRegression(solver='liblinear',
+                                      multi_class='ovr'))]).fit(X, y), types
+        corpus = np.array(["first document", "second document",
+                           "third one", "is it the first one"])
+        yield FeatureUnion([
+            ('words', TfidfVectorizer()),
+            ('chars', TfidfVectorizer(analyzer='char', ngram_range=(1, 2)))
+        ]).fit(corpus), [('text', StringTensorType([None, 1]))]
+
+    def _check_models(self, n_jobs):
+        for model, types in self._models():
+            with self.subTest(model=model.__class__.__name__):
+                expected = convert_sklearn(
+                    model, 'parallel', initial_types=types)
+                got = convert_sklearn(
+                    model, 'parallel', initial_types=types, n_jobs=n_jobs)
+                self.assertEqual(expected.SerializeToString(),
+                                 got.SerializeToString())
+
+    def test_processes(self):
+        self._check_models(2)
+        self._check_models(-1)
+
+    @unittest.skipIf(not _parallel._can_fork(),
+                     reason="processes are only forked on Linux")
+    def test_declared_operators_in_processes(self):
+        # the trees are declared by the converter of the ensemble,
+        # every converter writes the process it runs in
+        convert_branch = _parallel._convert_branch
+
+        def spy(topology, container, operator, fragment=False):
+            with open(log, 'a') as f:
+                f.write('%s %d\n' % (operator.type, os.getpid()))
+            return convert_branch(topology, container, operator,
+                                  fragment=fragment)
+
+        X, y = load_iris(return_X_y=True)
+        models = [
+            BaggingClassifier(DecisionTreeClassifier(max_depth=3),
+                              n_estimators=8, random_state=0).fit(X, y),
+            VotingClassifier(
+                [('lr', LogisticRegression(solver='liblinear',
+                                           multi_class='ovr')),
+                 ('dt', DecisionTreeClassifier(max_depth=3))],
+                voting='soft', flatten_transform=False).fit(X, y)]
+        types = [('X', FloatTensorType([None, 4]))]
+        for model in models:
+            with self.subTest(model=model.__class__.__name__):
+                expected = convert_sklearn(model, 'parallel', types)
+                with tempfile.TemporaryDirectory() as folder:
+                    log = os.path.join(folder, 'log.txt')
+                    with mock.patch.object(_parallel, '_convert_branch',
+                                           side_effect=spy):
+                        got = convert_sklearn(model, 'parallel', types,
+                                              n_jobs=4)
+                    with open(log, 'r') as f:
+                        lines = [line.split() for line in f]
+                self.assertEqual(expected.SerializeToString(),
+                                 got.SerializeToString())
+                trees = [int(pid) for op_type, pid in lines
+                         if op_type == 'SklearnDecisionTreeClassifier']
+                self.assertGreater(len(trees), 0)
+                self.assertNotIn(os.getpid(), trees)
+
+    def test_wrong_n_jobs(self):
+        X, y = load_iris(return_X_y=True)
+        model = StandardScaler().fit(X)
+        for n_jobs in [0, 1.5, '2', True]:
+            with self.assertRaises(ValueError):
+                convert_sklearn(model, initial_types=[
+                    ('X', FloatTensorType([None, 4]))], n_jobs=n_jobs)
+
+    def test_other_systems(self):
+        # processes are only forked on Linux
+        with mock.patch.object(_parallel.sys, 'platform', 'darwin'):
+            with mock.patch.object(_parallel, '_fork_pool',
+                                   wraps=_parallel._fork_pool) as fork_pool:
+                with mock.patch.object(_parallel.multiprocessing,
+                                       'get_context') as get_context:
+                    self._check_models(3)
+            self.assertTrue(fork_pool.called)
+            self.assertNotIn(mock.call('fork'), get_context.call_args_list)
+
+    def test_subgraph_names(self):
+        def scan_converter(scope, operator, container):
+            body_in = scope.get_unique_variable_name('body_in')
+            body_out = scope.get_unique_variable_name('body_out')
+            body = helper.make_graph(
+                [helper.make_node(
+                    'Identity', [body_in], [body_out],
+                    name=scope.get_unique_operator_name('BodyIdentity'))],
+                'body',
+                [helper.make_tensor_value_info(
+                    body_in, TensorProto.FLOAT, [4])],
+                [helper.make_tensor_value_info(
+                    body_out, TensorProto.FLOAT, [4])])
+            container.add_node(
+                'Scan', operator.inputs[0].full_name,
+                operator.outputs[0].full_name, op_version=9,
+                name=scope.get_unique_operator_name('Scan'),
+                body=body, num_scan_inputs=1)
+
+        X, y = load_iris(return_X_y=True)
+        model = FeatureUnion([('std', StandardScaler()),
+                              ('minmax', StandardScaler())]).fit(X)
+        types = [('X', FloatTensorType([None, 4]))]
+        custom = {StandardScaler: scan_converter}
+        expected = convert_sklearn(model, 'scan', initial_types=types,
+                                   custom_conversion_functions=custom)
+        got = convert_sklearn(model, 'scan', initial_types=types, n_jobs=2,
+                              custom_conversion_functions=custom)
+        self.assertEqual(expected.SerializeToString(),
+                         got.SerializeToString())
+
+    def test_failing_converter(self):
+        def failing_converter(scope, operator, container):
+            scope.get_unique_variable_name('failing')
+            raise RuntimeError("failing converter")
+
+        X, y = load_iris(return_X_y=True)
+        model = FeatureUnion([('std', StandardScaler()),
+                              ('minmax', MinMaxScaler())]).fit(X)
+        types = [('X', FloatTensorType([None, 4]))]
+        for n_jobs in [None, 2]:
+            with self.assertRaises(RuntimeError) as cm:
+                convert_sklearn(
+                    model, initial_types=types, n_jobs=n_jobs,
+                    custom_conversion_functions={
+                        MinMaxScaler: failing_converter})
+            self.assertEqual(str(cm.exception), "failing converter")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ from sklearn.pipeline import make_pipeline
 from sklearn import datasets
 
 from skl2onnx.common.data_types import FloatTensorType
+from skl2onnx.common._topology import Topology
 from skl2onnx import convert_sklearn, update_registered_converter
 from skl2onnx.algebra.onnx_ops import OnnxIdentity
 
@@ -70,6 +71,63 @@ class TestTopologyPrune(unittest.TestCase):
                   if node.op_type == "Identity"]
         assert len(idnode) == 2
 
+    def test_topological_operator_iterator(self):
+        topology = Topology(None)
+        scope = topology.declare_scope('__root__')
+        x = scope.declare_local_variable('X', FloatTensorType())
+        # operators are declared in reverse order of their dependencies
+        variables = [scope.declare_local_variable('V%d' % i)
+                     for i in range(4)]
+        label = scope.declare_local_operator('tensorToLabel')
+        label.inputs.append(variables[2])
+        label.outputs.append(variables[3])
+        ops = []
+        for i in [2, 1, 0]:
+            op = scope.declare_local_operator('op%d' % i)
+            op.inputs.append(x if i == 0 else variables[i - 1])
+            op.outputs.append(variables[i])
+            ops.append(op)
+        order = [op.type
+                 for op in topology.topological_operator_iterator()]
+        self.assertEqual(order, ['op0', 'op1', 'op2', 'tensorToLabel'])
+        self.assertTrue(all(op.is_evaluated for op in ops))
+
+        # an operator declared while iterating is evaluated as well
+        order = []
+        for op in topology.topological_operator_iterator():
+            order.append(op.type)
+            if op.type == 'op2':
+                new_op = scope.declare_local_operator('new')
+                new_op.inputs.append(variables[2])
+                new_op.outputs.append(scope.declare_local_variable('W'))
+        self.assertEqual(order, ['op0', 'op1', 'op2', 'tensorToLabel',
+                                 'new'])
+
+    def test_variable_consumers(self):
+        topology = Topology(None)
+        scope = topology.declare_scope('__root__')
+        x = scope.declare_local_variable('X', FloatTensorType())
+        y = scope.declare_local_variable('Y', FloatTensorType())
+        z = scope.declare_local_variable('Z', FloatTensorType())
+        op1 = scope.declare_local_operator('op1')
+        op1.inputs.append(x)
+        op1.outputs.append(y)
+        op2 = scope.declare_local_operator('op2')
+        op2.inputs.extend([x, y])
+        op2.outputs.append(z)
+        consumers = topology.variable_consumers
+        self.assertEqual(consumers.get_consumers(x), [op1, op2])
+        self.assertEqual(consumers.get_consumers(y), [op2])
+        self.assertEqual(consumers.get_consumers(z), [])
+
+        consumers.replace_input(y, x)
+        self.assertEqual(op2.inputs, [x, x])
+        self.assertEqual(consumers.get_consumers(y), [])
+        self.assertEqual(consumers.get_consumers(x), [op1, op2])
+
+        scope.delete_local_operator(op1.onnx_name)
+        self.assertEqual(consumers.get_consumers(x), [op2])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,42 @@
+"""
+Tests the compact representation of variables and operators.
+"""
+import copy
+import pickle
+import unittest
+import numpy as np
+from skl2onnx.common._topology import Operator, Scope, Variable
+from skl2onnx.common.data_types import FloatTensorType
+
+
+class TestTopologySlots(unittest.TestCase):
+
+    def test_variable(self):
+        var = Variable('X', 'X1', 'scope', FloatTensorType([None, 2]))
+        self.assertFalse(hasattr(var, '__dict__'))
+        with self.assertRaises(AttributeError):
+            var.unknown = 0
+        for got in [copy.copy(var), pickle.loads(pickle.dumps(var))]:
+            self.assertEqual(got.onnx_name, 'X1')
+            self.assertEqual(got.raw_name, 'X')
+            self.assertFalse(got.is_abandoned)
+
+    def test_operator(self):
+        op = Operator('op', 'scope', 'SklearnZipMap', object(), 9,
+                      np.float32)
+        # parsers may add attributes to an operator
+        op.classlabels_int64s = [0, 1]
+        got = copy.copy(op)
+        self.assertEqual(got.onnx_name, 'op')
+        self.assertEqual(got.classlabels_int64s, [0, 1])
+        self.assertEqual(got.inputs, [])
+
+    def test_scope(self):
+        scope = Scope('scope')
+        self.assertFalse(hasattr(scope, '__dict__'))
+        var = scope.declare_local_variable('X', FloatTensorType())
+        self.assertIs(scope.variables[var.onnx_name], var)
+
+
+if __name__ == "__main__":
+    unittest.main()